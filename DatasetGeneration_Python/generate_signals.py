@@ -0,0 +1,466 @@
+import os
+import sys
+import json
+import argparse
+import multiprocessing
+import h5py
+import numpy as np
+
+# Attribute written with every dataset by ModulationProcessingGUI.m
+FRAME_SIZE = (50, 50)
+
+# Bits of one 50x50 black-and-white video frame (the MATLAB generator encodes video frames)
+BITS_PER_FRAME = FRAME_SIZE[0] * FRAME_SIZE[1]
+
+# Chips of the 11-chip Barker code of the 1 and 2 Mbps DSSS modes (DSSS_mod.m)
+BARKER_11 = np.array([1, 1, 1, -1, 1, 1, -1, 1, 1, -1, -1], dtype=np.float64)
+
+# Guard subcarriers at the lower and upper edge of the OFDM spectrum (OFDM_mod.m)
+OFDM_GUARD_BANDS = (6, 5)
+
+# Order and phase offset of the OFDM subcarrier modulations; the others are '<M>QAM'
+OFDM_PSK = {"BPSK": (2, 0.0), "QPSK": (4, np.pi / 4)}
+
+# Modulation parameters used when no configuration file is given, in the format of the
+# `modulationParams` struct of ModulationSelectionGUI.m ('<type>_<n>' keys)
+DEFAULT_MODULATIONS = {
+    "PSK_1": {"modOrder": "4", "symRate": 1e6, "snr": 30},
+    "QAM_1": {"modOrder": "16", "symRate": 1e6, "snr": 30},
+    "OFDM_1": {"FFTLength": 64, "cyclicPrefixLength": 16, "numSymbols": 100, "subcarrierSpacing": 1e6,
+               "DCnull": False, "modulation": "QPSK", "snr": 30},
+    "DSSS_1": {"dataRate": "1Mbps", "snr": 30}
+}
+
+# ==============================
+# Symbol Mappers
+# ==============================
+
+def gray_code(values):
+    """
+    Binary-reflected Gray code of non-negative integers (vectorized).
+    """
+    return values ^ (values >> 1)
+
+
+def bits_to_int(bits, bits_per_symbol):
+    """
+    Group the bits of every row into integers, most significant bit first (MATLAB `bit2int`).
+
+    Parameters:
+    ----------
+    bits : np.ndarray
+        Bits [N, B], with B a multiple of `bits_per_symbol`.
+    bits_per_symbol : int
+        Bits per integer.
+
+    Returns:
+    -------
+    np.ndarray
+        int64 integers [N, B / bits_per_symbol].
+    """
+    groups = bits.reshape(bits.shape[0], -1, bits_per_symbol).astype(np.int64)
+    return groups @ (1 << np.arange(bits_per_symbol - 1, -1, -1))
+
+
+def _gray_positions(values, levels):
+    # Position p whose Gray code is `value`, for every value (inverse Gray mapping by table lookup)
+    return np.argsort(gray_code(np.arange(levels)))[values]
+
+
+def psk_modulate(bits, order, phase_offset):
+    """
+    Gray PSK symbols of a batch of bit streams (MATLAB `bit2int` followed by
+    `pskmod(..., phaseOffset, 'gray')`). Trailing bits that do not fill a symbol are dropped.
+
+    Parameters:
+    ----------
+    bits : np.ndarray
+        Bits [N, B].
+    order : int
+        Modulation order M.
+    phase_offset : float
+        Phase of the first constellation point, in radians.
+
+    Returns:
+    -------
+    np.ndarray
+        Unit-power complex symbols [N, floor(B / log2(M))].
+    """
+    bits_per_symbol = int(np.log2(order))
+    used = bits[:, :bits.shape[1] // bits_per_symbol * bits_per_symbol]
+    positions = _gray_positions(bits_to_int(used, bits_per_symbol), order)
+    return np.exp(1j * (phase_offset + 2 * np.pi * positions / order))
+
+
+def qam_modulate(bits, order):
+    """
+    Gray square-QAM symbols with unit average power of a batch of bit streams
+    (MATLAB `qammod(..., 'gray', 'InputType', 'bit', 'UnitAveragePower', true)`).
+
+    The most significant half of the bits of a symbol selects the in-phase level (left to
+    right) and the other half the quadrature level (top to bottom), each Gray coded.
+
+    Parameters:
+    ----------
+    bits : np.ndarray
+        Bits [N, B], with B a multiple of log2(M).
+    order : int
+        Modulation order M (a power of 4).
+
+    Returns:
+    -------
+    np.ndarray
+        Complex symbols [N, B / log2(M)].
+    """
+    bits_per_symbol = int(np.log2(order))
+    side = int(round(np.sqrt(order)))
+    if side * side != order:
+        raise ValueError(f"Only square QAM constellations are supported (M = {order})")
+
+    values = bits_to_int(bits, bits_per_symbol)
+    half = bits_per_symbol // 2
+    column = _gray_positions(values >> half, side)
+    row = _gray_positions(values & ((1 << half) - 1), side)
+    symbols = (2 * column - (side - 1)) + 1j * ((side - 1) - 2 * row)
+    return symbols / np.sqrt(2 * (order - 1) / 3)
+
+# ==============================
+# Batched Modulators
+# ==============================
+
+def modulate_psk(bits, params):
+    """
+    PSK waveforms of a batch of bit streams, one sample per symbol (PSK_mod.m).
+
+    Parameters:
+    ----------
+    bits : np.ndarray
+        Bits [N, B] (one row per signal).
+    params : dict
+        'modOrder' (e.g. '8') and 'symRate' in Hz.
+
+    Returns:
+    -------
+    waveforms : np.ndarray
+        Complex waveforms [N, L].
+    metadata : dict
+        Signal description written to '<name>.json' (fields of PSK_mod.m).
+    """
+    order = int(params["modOrder"])
+    waveforms = psk_modulate(bits, order, np.pi / order)
+    metadata = {"type": "PSK", "modulation": f"{order}-PSK", "fs": params["symRate"], "oversamplingFactor": 1,
+                "cbw": params["symRate"], "payload": waveforms.shape[1] * int(np.log2(order)),
+                "waveformLength": waveforms.shape[1], "lengthBits": bits.shape[1]}
+    return waveforms, metadata
+
+
+def modulate_qam(bits, params):
+    """
+    Square QAM waveforms of a batch of bit streams, one sample per symbol (QAM_mod.m).
+    The bit streams are zero padded to a whole number of symbols.
+
+    Parameters:
+    ----------
+    bits : np.ndarray
+        Bits [N, B].
+    params : dict
+        'modOrder' (e.g. '16') and 'symRate' in Hz.
+
+    Returns:
+    -------
+    waveforms : np.ndarray
+        Complex waveforms [N, L].
+    metadata : dict
+        Signal description (fields of QAM_mod.m).
+    """
+    order = int(params["modOrder"])
+    bits_per_symbol = int(np.log2(order))
+    padded = np.pad(bits, ((0, 0), (0, -bits.shape[1] % bits_per_symbol)))
+    waveforms = qam_modulate(padded, order)
+    metadata = {"type": "QAM", "modulation": f"{order}-QAM", "fs": params["symRate"], "oversamplingFactor": 1,
+                "cbw": params["symRate"], "payload": padded.shape[1], "waveformLength": waveforms.shape[1],
+                "lengthBits": bits.shape[1]}
+    return waveforms, metadata
+
+
+def modulate_ofdm(bits, params):
+    """
+    OFDM waveforms of a batch of bit streams (OFDM_mod.m), with one batched inverse FFT over
+    every OFDM symbol of every signal.
+
+    The bits are split into blocks of `numSymbols` OFDM symbols (the last block is zero padded).
+    Each block fills the data subcarriers (no guard bands, optional DC null) subcarrier after
+    subcarrier, symbol after symbol, and every OFDM symbol gets its cyclic prefix.
+
+    Parameters:
+    ----------
+    bits : np.ndarray
+        Bits [N, B].
+    params : dict
+        'FFTLength', 'cyclicPrefixLength', 'numSymbols', 'subcarrierSpacing' (Hz), 'DCnull'
+        and 'modulation' ('BPSK', 'QPSK', '16QAM', '64QAM', '256QAM' or '1024QAM').
+
+    Returns:
+    -------
+    waveforms : np.ndarray
+        Complex waveforms [N, blocks * numSymbols * (FFTLength + cyclicPrefixLength)].
+    metadata : dict
+        Signal description (fields of OFDM_mod.m; 'waveformLength' is the length of one block).
+    """
+    fft_length, cp_length = int(params["FFTLength"]), int(params["cyclicPrefixLength"])
+    num_symbols, dc_null = int(params["numSymbols"]), bool(params["DCnull"])
+    modulation = params["modulation"]
+    order = OFDM_PSK[modulation][0] if modulation in OFDM_PSK else int(modulation.split('QAM')[0])
+
+    carriers = np.arange(OFDM_GUARD_BANDS[0], fft_length - OFDM_GUARD_BANDS[1])
+    if dc_null:
+        carriers = carriers[carriers != fft_length // 2]
+    block_bits = len(carriers) * num_symbols * int(np.log2(order))
+
+    num_blocks = max(-(-bits.shape[1] // block_bits), 1)
+    padded = np.pad(bits, ((0, 0), (0, num_blocks * block_bits - bits.shape[1])))
+    if modulation in OFDM_PSK:
+        symbols = psk_modulate(padded, *OFDM_PSK[modulation])
+    else:
+        symbols = qam_modulate(padded, order)
+
+    spectra = np.zeros((bits.shape[0], num_blocks * num_symbols, fft_length), dtype=np.complex128)
+    spectra[:, :, carriers] = symbols.reshape(bits.shape[0], num_blocks * num_symbols, len(carriers))
+    time_symbols = np.fft.ifft(np.fft.ifftshift(spectra, axes=-1), axis=-1)
+    with_prefix = np.concatenate([time_symbols[:, :, fft_length - cp_length:], time_symbols], axis=-1)
+    waveforms = with_prefix.reshape(bits.shape[0], -1)
+
+    metadata = {"mod": f"OFDM_{modulation}", "type": "OFDM",
+                "modulation": modulation if modulation in OFDM_PSK else f"{order}QAM",
+                "fs": fft_length * params["subcarrierSpacing"], "oversamplingFactor": 1, "cbw": 20e6,
+                "payload": block_bits, "waveformLength": num_symbols * (fft_length + cp_length),
+                "cyclicPrefixLength": cp_length, "FFTLength": fft_length, "guardBandCarriers": list(OFDM_GUARD_BANDS),
+                "numSymbols": num_symbols, "subcarrierSpacing": params["subcarrierSpacing"], "DCnull": dc_null,
+                "lengthBits": bits.shape[1]}
+    return waveforms, metadata
+
+
+def modulate_dsss(bits, params):
+    """
+    1 Mbps (DBPSK) or 2 Mbps (DQPSK) DSSS waveforms spread with the 11-chip Barker code
+    (DSSS_mod.m): every symbol becomes 11 chips, as a single outer product for the batch.
+
+    As in DSSS_mod.m, the symbols are spread with their conjugate (MATLAB `'`), so the
+    quadrature bits of the 2 Mbps mode are sent with inverted sign. An odd number of bits
+    is padded with a zero at 2 Mbps.
+
+    Parameters:
+    ----------
+    bits : np.ndarray
+        Bits [N, B].
+    params : dict
+        'dataRate': '1Mbps' or '2Mbps' (CCK rates are only available in MATLAB).
+
+    Returns:
+    -------
+    waveforms : np.ndarray
+        Complex waveforms [N, 11 * symbols] at 11 MHz.
+    metadata : dict
+        Signal description (fields of DSSS_mod.m).
+    """
+    data_rate = params["dataRate"]
+    if data_rate == '1Mbps':
+        modulation = 'DBPSK'
+        symbols = 2.0 * bits - 1
+    elif data_rate == '2Mbps':
+        modulation = 'DQPSK'
+        bits = np.pad(bits, ((0, 0), (0, bits.shape[1] % 2)))
+        symbols = (2.0 * bits[:, 0::2] - 1) + 1j * (2.0 * bits[:, 1::2] - 1)
+    else:
+        raise ValueError(f"DSSS data rate {data_rate} not supported in Python (use 1Mbps or 2Mbps)")
+
+    waveforms = (np.conj(symbols)[:, :, np.newaxis] * BARKER_11).reshape(bits.shape[0], -1)
+    metadata = {"type": "DSSS", "DSSS": data_rate, "modulation": modulation, "fs": 11e6, "oversamplingFactor": 1,
+                "cbw": 20e6, "payload": bits.shape[1], "waveformLength": waveforms.shape[1],
+                "lengthBits": bits.shape[1]}
+    return waveforms, metadata
+
+
+# Modulator of each modulation type (the part of the key before '_', as in ModulationProcessingGUI.m)
+MODULATORS = {"PSK": modulate_psk, "QAM": modulate_qam, "OFDM": modulate_ofdm, "DSSS": modulate_dsss}
+
+
+def add_awgn(waveforms, snr, rng):
+    """
+    Add white Gaussian noise as MATLAB `awgn(x, snr)` does on the real and imaginary parts
+    separately: the signal power is taken as 1 (0 dBW), so each part gets noise of power
+    10^(-snr / 10) whatever the power of the waveform.
+
+    Parameters:
+    ----------
+    waveforms : np.ndarray
+        Complex waveforms [N, L].
+    snr : float
+        SNR in dB.
+    rng : np.random.Generator
+        Noise generator.
+
+    Returns:
+    -------
+    np.ndarray
+        Noisy waveforms [N, L].
+    """
+    std = np.sqrt(10 ** (-snr / 10))
+    return waveforms + std * (rng.standard_normal(waveforms.shape) + 1j * rng.standard_normal(waveforms.shape))
+
+# ==============================
+# Dataset Writing
+# ==============================
+
+def generate_bits(num_signals, num_bits, seed=0):
+    """
+    Random bit streams shared by every modulation of a run (the MATLAB generator modulates the
+    same video bits with each modulation).
+
+    Returns:
+    -------
+    np.ndarray
+        int8 bits [num_signals, num_bits].
+    """
+    return np.random.default_rng(seed).integers(0, 2, (num_signals, num_bits), dtype=np.int8)
+
+
+def generate_dataset(mod_key, params, output_dir, num_signals, num_bits, batch_size=64, seed=0, noise_seed=None):
+    """
+    Modulate, add noise to and save one dataset, batch by batch, in the layout of
+    ModulationProcessingGUI.m:
+
+    - '<mod_key>.h5': 'dataset' [N, 2, L] float32 (I and Q) with the 'FrameSize' attribute.
+    - 'bits_<mod_key>.h5': 'dataset' [N, B] int8 with the transmitted bits.
+    - '<mod_key>.json': signal description of the modulator plus 'snr'.
+
+    Parameters:
+    ----------
+    mod_key : str
+        Dataset name, '<type>_<n>' (e.g. 'OFDM_1').
+    params : dict
+        Modulation parameters (see the modulate_* functions) and 'snr' in dB (no noise if missing).
+    output_dir : str
+        Dataset folder.
+    num_signals, num_bits : int
+        Number of signals and of bits per signal.
+    batch_size : int
+        Signals modulated at a time.
+    seed : int
+        Seed of the bits (see generate_bits).
+    noise_seed : int or None
+        Seed of the noise.
+
+    Returns:
+    -------
+    str
+        Path of the signals file.
+    """
+    modulate = MODULATORS.get(mod_key.split('_')[0])
+    if modulate is None:
+        raise ValueError(f"No Python modulator for {mod_key} (available: {', '.join(MODULATORS)})")
+
+    bits = generate_bits(num_signals, num_bits, seed)
+    rng = np.random.default_rng(noise_seed)
+    signals_path = os.path.join(output_dir, mod_key + '.h5')
+
+    with h5py.File(signals_path, 'w') as f:
+        dataset = None
+        for start in range(0, num_signals, batch_size):
+            waveforms, metadata = modulate(bits[start:start + batch_size], params)
+            if 'snr' in params:
+                waveforms = add_awgn(waveforms, params['snr'], rng)
+            if dataset is None:
+                dataset = f.create_dataset('dataset', shape=(num_signals, 2, waveforms.shape[1]), dtype=np.float32)
+                dataset.attrs['FrameSize'] = np.array(FRAME_SIZE, dtype=np.float64)
+            dataset[start:start + len(waveforms)] = np.stack([waveforms.real, waveforms.imag], axis=1)
+
+    with h5py.File(os.path.join(output_dir, f"bits_{mod_key}.h5"), 'w') as f:
+        dataset = f.create_dataset('dataset', data=bits)
+        dataset.attrs['FrameSize'] = np.array(FRAME_SIZE, dtype=np.float64)
+
+    if 'snr' in params:
+        metadata["snr"] = params["snr"]
+    with open(os.path.join(output_dir, mod_key + '.json'), 'w') as f:
+        json.dump(metadata, f)
+    return signals_path
+
+
+def _generate_task(arguments):
+    mod_key = arguments[0]
+    generate_dataset(*arguments)
+    return mod_key
+
+
+def generate_datasets(modulations, output_dir, num_signals=100, num_bits=10 * BITS_PER_FRAME, batch_size=64,
+                      workers=None, seed=0):
+    """
+    Generate one dataset per modulation, in parallel across files.
+
+    Parameters:
+    ----------
+    modulations : dict
+        {'<type>_<n>': parameters}, as the `modulationParams` struct of the MATLAB GUI.
+    output_dir : str
+        Dataset folder (created if needed).
+    num_signals : int
+        Signals per dataset.
+    num_bits : int
+        Bits per signal (10 video frames of 50x50 by default).
+    batch_size : int
+        Signals modulated at a time.
+    workers : int or None
+        Number of processes (default: number of CPUs).
+    seed : int
+        Seed of the bits (the same for every modulation) and of the noise (one stream per file).
+
+    Returns:
+    -------
+    list of str
+        Names of the generated datasets.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    noise_seeds = np.random.SeedSequence(seed).generate_state(len(modulations))
+    arguments = [(mod_key, params, output_dir, num_signals, num_bits, batch_size, seed, int(noise_seed))
+                 for (mod_key, params), noise_seed in zip(modulations.items(), noise_seeds)]
+
+    workers = min(workers or os.cpu_count() or 1, max(len(arguments), 1))
+    if workers == 1:
+        return [_generate_task(args) for args in arguments]
+    with multiprocessing.get_context("spawn").Pool(workers) as pool:
+        return list(pool.imap(_generate_task, arguments))
+
+def cli(argv=None):
+    """
+    Command-line entry point: generate the datasets of a configuration.
+
+    Parameters:
+    ----------
+    argv : list of str or None
+        Arguments, without the program name (default: sys.argv[1:]).
+    """
+    parser = argparse.ArgumentParser(description="Generate PSK, QAM, OFDM and DSSS datasets in the layout of the MATLAB generator.")
+    parser.add_argument("output_dir", help="Dataset folder")
+    parser.add_argument("--config", help="JSON file {'<type>_<n>': parameters} (default: one PSK, QAM, OFDM and DSSS dataset)")
+    parser.add_argument("--signals", type=int, default=100, help="Signals per dataset")
+    parser.add_argument("--bits", type=int, default=10 * BITS_PER_FRAME, help="Bits per signal")
+    parser.add_argument("--batch-size", type=int, default=64, help="Signals modulated at a time")
+    parser.add_argument("--workers", type=int, help="Number of processes (default: number of CPUs)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    modulations = DEFAULT_MODULATIONS
+    if args.config:
+        with open(args.config, 'r') as f:
+            modulations = json.load(f)
+    unsupported = [key for key in modulations if key.split('_')[0] not in MODULATORS]
+    if unsupported:
+        print(f"No Python modulator for: {', '.join(unsupported)} (available: {', '.join(MODULATORS)})")
+        sys.exit(1)
+
+    for mod_key in generate_datasets(modulations, args.output_dir, args.signals, args.bits, args.batch_size,
+                                     args.workers, args.seed):
+        print(f"Completed: {mod_key}")
+
+if __name__ == "__main__":
+    cli()
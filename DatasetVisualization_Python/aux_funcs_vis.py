@@ -1,13 +1,12 @@
 import os
 import json
+from collections import OrderedDict
 import h5py
 import numpy as np
 import matplotlib.pyplot as plt
-import torch
-import scipy.signal as signal
-from torch.utils.data import DataLoader, Dataset
-import ipywidgets as widgets
-from IPython.display import display, clear_output
+from waveform_lod import waveform_lods
+from psd_summary import WELCH_PARAMS, welch_psd_batch, load_psd_summary
+from psd_summary import summarize_folder  # noqa: F401 (re-exported for the notebook's star import)
 
 # List objects from current folder into a list
 def ls(ruta = os.getcwd()):
@@ -58,6 +57,8 @@ def print_mods_full(mod):
 
 # Function to be executed each time the user changes selection at Dropdown
 def update_output(change):
+    from IPython.display import clear_output  # Notebook-only: not loaded by headless scripts
+
     with output:
         clear_output(wait=True)  # Cleans previous output
         print_mods_full(change['new'])  # Displays the info from new selection
@@ -66,50 +67,152 @@ def update_output(change):
 
 
 # Class for reading the datasets into dataloaders
-class HDF5Dataset(Dataset):
+# Maximum number of dataset files kept open between widget callbacks
+MAX_OPEN_FILES = 8
+
+# Open HDF5 handles, least recently used first: {path: (handle, (size, mtime))}
+_open_files = OrderedDict()
+
+def open_hdf5(hdf5_file):
+    """
+    Returns an open (read-only) handle of a dataset file, reusing it across calls.
+
+    Handles are kept in a small LRU cache (MAX_OPEN_FILES): the least recently used one is
+    closed when the cache is full, and a handle is reopened if its file changed on disk.
+
+    Inputs:
+    - hdf5_file: Path of the HDF5 file.
+
+    Returns:
+    - f: Open h5py.File.
+    """
+    path = os.path.abspath(hdf5_file)
+    stat = os.stat(path)
+    fingerprint = (stat.st_size, stat.st_mtime_ns)
+
+    if path in _open_files:
+        handle, cached_fingerprint = _open_files.pop(path)
+        if handle.id.valid and cached_fingerprint == fingerprint:
+            _open_files[path] = (handle, fingerprint)
+            return handle
+        if handle.id.valid:
+            handle.close()
+
+    while len(_open_files) >= MAX_OPEN_FILES:
+        _, (oldest, _) = _open_files.popitem(last=False)
+        if oldest.id.valid:
+            oldest.close()
+
+    handle = h5py.File(path, 'r')
+    _open_files[path] = (handle, fingerprint)
+    return handle
+
+def close_hdf5_files():
+    """
+    Closes every cached dataset handle.
+    """
+    while _open_files:
+        _, (handle, _) = _open_files.popitem()
+        if handle.id.valid:
+            handle.close()
+
+def num_signals(hdf5_file):
+    """
+    Number of signals of a dataset file (reads only the metadata).
+    """
+    return open_hdf5(hdf5_file)['dataset'].shape[0]
+
+def random_indices(total, batch_size, rng=None):
+    """
+    Chooses `batch_size` different random signal indices out of `total` (all of them if there are fewer).
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    return rng.choice(total, size=min(batch_size, total), replace=False)
+
+def read_signals(hdf5_file, indices):
+    """
+    Reads only the given rows of a dataset file.
+
+    Inputs:
+    - hdf5_file: Path of the HDF5 file ('dataset' key, [N, 2, L]).
+    - indices: Signal indices, in any order (repetitions allowed).
+
+    Returns:
+    - signals: float32 array [len(indices), 2, L], in the order of `indices`.
+    """
+    indices = np.asarray(indices)
+    unique, inverse = np.unique(indices, return_inverse=True)  # h5py needs increasing indices
+    rows = open_hdf5(hdf5_file)['dataset'][unique]
+    return rows[inverse.reshape(-1)].astype(np.float32)
+
+def signal_key(hdf5_file, index):
+    """
+    Identifier of a stored signal for plot caches: (file path, modification time, index).
+    """
+    path = os.path.abspath(hdf5_file)
+    return (path, os.stat(path).st_mtime_ns, int(index))
+
+def mix_signals(soi, interf, mix_factor=0.5):
+    """
+    Adds an interference to a signal of interest, cutting or repeating it to the SoI length.
+
+    Inputs:
+    - soi: SoI signals [..., 2, L].
+    - interf: Interference signals [..., 2, L_i].
+    - mix_factor: Level of interference.
+
+    Returns:
+    - mix: soi + mix_factor * interf [..., 2, L].
+    """
+    length = soi.shape[-1]
+    if interf.shape[-1] < length:
+        # if the interference signal is shorter than the soi, the interference signal will be concatenated several times
+        n_interf = -(-length // interf.shape[-1])
+        interf = np.concatenate([interf] * n_interf, axis=-1)
+    return soi + mix_factor * interf[..., :length]
+
+class HDF5Dataset:
+    """
+    Signals of a dataset file, read row by row when indexed (the file is not loaded in memory).
+    Map-style dataset: it can be given to a torch DataLoader (torch is only loaded when indexing).
+    """
     def __init__(self, hdf5_file):
-        with h5py.File(hdf5_file, 'r') as f:
-            self.data = f['dataset'][:]
-        self.data = torch.tensor(self.data, dtype=torch.float32)
+        self.hdf5_file = hdf5_file
+        self.length = num_signals(hdf5_file)
 
     def __len__(self):
-        return self.data.shape[0]
+        return self.length
 
     def __getitem__(self, idx):
-        signal = self.data[idx]
+        import torch
+
+        signal = torch.from_numpy(read_signals(self.hdf5_file, [idx])[0])
         return signal
 
-class HDF5Dataset_mixed(Dataset):
+class HDF5Dataset_mixed:
+    """
+    Pairs (SoI + interference, SoI) built from two dataset files, read row by row when indexed.
+    Map-style dataset, like HDF5Dataset.
+    """
     def __init__(self, hdf5_file1, hdf5_file2, mix_factor=0.5):
-        with h5py.File(hdf5_file1, 'r') as f:
-            self.signal_soi = f['dataset'][:]
-
-        with h5py.File(hdf5_file2, 'r') as f:
-            self.signal_interf = f['dataset'][:]
-
-        self.signal_soi = torch.tensor(self.signal_soi, dtype=torch.float32)
-        self.signal_interf = torch.tensor(self.signal_interf, dtype=torch.float32)
+        self.hdf5_file1 = hdf5_file1
+        self.hdf5_file2 = hdf5_file2
+        self.length = num_signals(hdf5_file1)
+        self.length_interf = num_signals(hdf5_file2)
         self.mix_factor = mix_factor
 
     def __len__(self):
-        return self.signal_soi.shape[0]
+        return self.length
 
     def __getitem__(self, idx):
-        soi = self.signal_soi[idx]
-        interf = self.signal_interf[idx]
-
-        if interf.shape[1] > soi.shape[1]:
-            interf = interf[:, :soi.shape[1]]
+        import torch
 
-        elif interf.shape[1] < soi.shape[1]:
-            # if the interference signal is shorter than the soi, the interference signal will be concatenated several times
-            n_interf = -(-soi.shape[1] // interf.shape[1])
+        soi = read_signals(self.hdf5_file1, [idx])[0]
+        interf = read_signals(self.hdf5_file2, [idx % self.length_interf])[0]
 
-            interf = interf.repeat(1,n_interf)[:,:soi.shape[1]]
+        mix = mix_signals(soi, interf, self.mix_factor)
 
-        mix = soi + self.mix_factor * interf
-
-        return mix, soi
+        return torch.from_numpy(mix), torch.from_numpy(soi)
 
 
 def to_complex_signal(signal_tensor):
@@ -117,40 +220,117 @@ def to_complex_signal(signal_tensor):
     imag_part = signal_tensor[:, 1]  # Imaginary part
     return real_part.numpy() + 1j * imag_part.numpy()
 
-def plot_time_domain(signal, fs, title="Waveform", num_samples=20000):
-    plt.figure(figsize=(20, 4))
-    plt.plot(np.arange(num_samples) / fs, signal[:num_samples].real, label="Real")
-    plt.plot(np.arange(num_samples) / fs, signal[:num_samples].imag, label="Imaginary", linestyle='dashed')
-    plt.xlabel("Time (s)")
-    plt.ylabel("Amplitude")
-    plt.title(title)
-    plt.legend()
-    plt.grid()
+def to_complex_batch(signals):
+    """
+    Converts a batch of real-valued signals [N, 2, L] (I and Q channels) into complex waveforms [N, L].
+
+    Inputs:
+    - signals: NumPy array or tensor [N, 2, L].
+
+    Returns:
+    - waveforms: Complex NumPy array [N, L].
+    """
+    signals = signals.numpy() if hasattr(signals, 'numpy') else np.asarray(signals)  # Tensors without importing torch
+    return signals[:, 0] + 1j * signals[:, 1]
+
+def plot_time_domain(signal, fs, title="Waveform", num_samples=None, cache_key=None):
+    """
+    Plots the real and imaginary parts of a waveform.
+
+    Long waveforms are drawn as a per-pixel min/max envelope (see waveform_lod.WaveformLOD),
+    so the whole frame is shown without plotting every sample. When the view is zoomed
+    (interactive backends), the envelope is redrawn from a finer level, down to the raw samples.
+
+    Inputs:
+    - signal: Complex waveform.
+    - fs: Sample frequency in Hz.
+    - title: Title.
+    - num_samples: (Optional) Plot only the first num_samples samples (whole waveform by default).
+    - cache_key: (Optional) Identifier of the signal to reuse its envelopes (see waveform_lods).
+    """
+    if num_samples is not None:
+        signal = signal[:num_samples]
+    lods = waveform_lods(signal, cache_key)
+
+    fig, ax = plt.subplots(figsize=(20, 4))
+    styles = [dict(label="Real", color='C0'), dict(label="Imaginary", color='C1')]
+    line_styles = ['-', 'dashed']
+    artists = []
+
+    def update_view(ax):
+        # Envelopes are drawn as filled bands (much faster to render than min/max zigzag lines)
+        while artists:
+            artists.pop().remove()
+        xmin, xmax = ax.get_xlim()
+        num_pixels = int(ax.bbox.width)
+        for style, line_style, lod in zip(styles, line_styles, lods):
+            positions, lower, upper = lod.view(np.floor(xmin * fs), np.ceil(xmax * fs) + 1, num_pixels)
+            if lower is upper:
+                artists.extend(ax.plot(positions / fs, lower, linestyle=line_style, **style))
+            else:
+                artists.append(ax.fill_between(positions / fs, lower, upper, alpha=0.5, linewidth=0, **style))
+        ax.figure.canvas.draw_idle()
+
+    low = min(lod.limits[0] for lod in lods)
+    high = max(lod.limits[1] for lod in lods)
+    margin = 0.05 * (high - low) or 1.0
+    ax.set_xlim(0, max(len(signal) - 1, 1) / fs)
+    ax.set_ylim(low - margin, high + margin)
+    update_view(ax)
+    ax.callbacks.connect('xlim_changed', update_view)
+
+    ax.set_xlabel("Time (s)")
+    ax.set_ylabel("Amplitude")
+    ax.set_title(title)
+    ax.legend()
+    ax.grid()
     plt.show()
 
-# Get constellation from OFDM waveform
-def extract_ofdm_constellation(waveform, fft_size=64, cp_length=16, num_symbols=10, dc_null=True, guard_bands=(6,5)):
-    ofdm_symbols = []
+def ofdm_subcarrier_indices(fft_size=64, dc_null=True, guard_bands=(6,5)):
+    """
+    FFT bins of the useful OFDM subcarriers (without guard bands and, if nulled, DC).
 
-    for i in range(num_symbols):
-        start_idx = i * (fft_size + cp_length) + cp_length  # Skip prefix length
-        end_idx = start_idx + fft_size
-        if end_idx > len(waveform):
-            break
+    Inputs:
+    - fft_size: FFT length.
+    - dc_null: Whether the DC subcarrier is nulled.
+    - guard_bands: Number of guard subcarriers at the start and at the end of the FFT.
 
-        ofdm_symbol = np.fft.fft(waveform[start_idx:end_idx], fft_size)
+    Returns:
+    - indices: Indices of the useful bins, in the same order as the per-symbol FFT output.
+    """
+    start_guard, end_guard = guard_bands
+    if dc_null:
+        return np.concatenate((np.arange(start_guard, fft_size//2), np.arange(fft_size//2 + 1, fft_size - end_guard)))
+    return np.arange(start_guard, fft_size - end_guard)
 
-        # Get only useful subcarriers
-        start_guard, end_guard = guard_bands
-        if dc_null:
-            ofdm_symbol = np.concatenate((ofdm_symbol[start_guard:fft_size//2],
-                                          ofdm_symbol[fft_size//2 + 1:fft_size-end_guard]))
-        else:
-            ofdm_symbol = (ofdm_symbol[start_guard:fft_size-end_guard])
+def extract_ofdm_constellation_batch(waveforms, fft_size=64, cp_length=16, num_symbols=10, dc_null=True, guard_bands=(6,5)):
+    """
+    Get OFDM constellations from a batch of waveforms with a single batched FFT.
+
+    The waveforms are reshaped into [N, symbols, fft_size + cp_length] blocks, the cyclic
+    prefix is dropped and every symbol of every signal is transformed at once.
+
+    Inputs:
+    - waveforms: Complex waveforms [N, L] (a single [L] waveform is treated as N = 1).
+    - fft_size, cp_length, num_symbols, dc_null, guard_bands: OFDM parameters (metadata).
+
+    Returns:
+    - symbols: [N, symbols * useful subcarriers] complex array, symbol after symbol.
+    """
+    waveforms = np.atleast_2d(waveforms)
+    symbol_length = fft_size + cp_length
+    num_symbols = min(num_symbols, waveforms.shape[1] // symbol_length)  # Only complete symbols
+
+    blocks = waveforms[:, :num_symbols * symbol_length].reshape(waveforms.shape[0], num_symbols, symbol_length)
+    spectra = np.fft.fft(blocks[:, :, cp_length:], fft_size, axis=-1)  # Skip prefix length
 
-        ofdm_symbols.append(ofdm_symbol)
+    # Get only useful subcarriers
+    spectra = spectra[:, :, ofdm_subcarrier_indices(fft_size, dc_null, guard_bands)]
+    return spectra.reshape(waveforms.shape[0], -1)
 
-    symbols = np.concatenate(ofdm_symbols)
+# Get constellation from OFDM waveform
+def extract_ofdm_constellation(waveform, fft_size=64, cp_length=16, num_symbols=10, dc_null=True, guard_bands=(6,5)):
+    symbols = extract_ofdm_constellation_batch(waveform[np.newaxis], fft_size, cp_length, num_symbols, dc_null, guard_bands)[0]
     return symbols[(np.abs(symbols.real) > 0.0000001) | (np.abs(symbols.imag) > 0.0000001)]
 
 # Get constellation from Bluetooth waveform
@@ -167,11 +347,23 @@ def extract_bluetooth_constellation(waveform, samples_per_symbol):
     - symbols: Bluetooth symbols.
     """
 
-    symbols = waveform[::samples_per_symbol]
+    return extract_bluetooth_constellation_batch(waveform[np.newaxis], samples_per_symbol)[0]
 
-    symbols /= np.max(np.abs(symbols))  # Normalize
+def extract_bluetooth_constellation_batch(waveforms, samples_per_symbol):
+    """
+    Get Bluetooth constellations from a batch of waveforms.
 
-    return symbols
+    Inputs:
+    - waveforms: Complex waveforms [N, L].
+    - samples_per_symbol: Samples per symbol (metadata)
+
+    Returns:
+    - symbols: [N, ceil(L / samples_per_symbol)] symbols, each signal normalized to a peak of 1.
+    """
+    symbols = np.atleast_2d(waveforms)[:, ::samples_per_symbol]
+
+    # Normalize (a new array, so the waveforms are left untouched)
+    return symbols / np.max(np.abs(symbols), axis=1, keepdims=True)
 
 def despread_dsss(waveform, spreading_code):
     """
@@ -184,16 +376,26 @@ def despread_dsss(waveform, spreading_code):
     Returns:
     - symbols: DSSS symbols.
     """
-    spreading_length = len(spreading_code)
-    num_symbols = len(waveform) // spreading_length
-    symbols = []
+    return despread_dsss_batch(waveform[np.newaxis], spreading_code)[0]
+
+def despread_dsss_batch(waveforms, spreading_code):
+    """
+    Despreads a batch of DSSS signals with a single matrix product.
 
-    for i in range(num_symbols):
-        symbol_chunk = waveform[i * spreading_length : (i + 1) * spreading_length]
-        despread_symbol = np.dot(symbol_chunk, spreading_code)
-        symbols.append(despread_symbol)
+    Inputs:
+    - waveforms: DSSS waveforms [N, L].
+    - spreading_code: Expansion code (NumPy array: 1s and -1s).
 
-    return np.array(symbols)
+    Returns:
+    - symbols: [N, L // len(spreading_code)] DSSS symbols.
+    """
+    waveforms = np.atleast_2d(waveforms)
+    spreading_length = len(spreading_code)
+    num_symbols = waveforms.shape[1] // spreading_length
+
+    # [N, symbols, chips] @ [chips] -> [N, symbols]
+    chips = waveforms[:, :num_symbols * spreading_length].reshape(waveforms.shape[0], num_symbols, spreading_length)
+    return chips @ np.asarray(spreading_code, dtype=chips.real.dtype)
 
 def extract_dsss_symbols(waveform, data_rate):
     """
@@ -206,17 +408,32 @@ def extract_dsss_symbols(waveform, data_rate):
     Returns:
     - symbols: DSSS symbols.
     """
+    return extract_dsss_symbols_batch(waveform[np.newaxis], data_rate)[0]
+
+def extract_dsss_symbols_batch(waveforms, data_rate):
+    """
+    Get DSSS symbols of a batch of waveforms according to datarate and documentation.
+
+    Inputs:
+    - waveforms: DSSS waveforms [N, L].
+    - data_rate: Data rate in Mbps ('1Mbps', '2Mbps', '5.5Mbps', '11Mbps') (Metadata).
+
+    Returns:
+    - symbols: [N, symbols] DSSS symbols.
+    """
+    waveforms = np.atleast_2d(waveforms)
+
     if data_rate == '1Mbps':  # DBPSK with 11 chip Barker code
         spreading_code = np.array([1, 1, 1, -1, -1, -1, 1, -1, -1, 1, -1])  # Barker Code for 11 chips
-        symbols = despread_dsss(waveform, spreading_code)
+        symbols = despread_dsss_batch(waveforms, spreading_code)
 
     elif data_rate == '2Mbps': # DQPSK with 11 chip Barker code
         spreading_code = np.array([1, 1, 1, -1, -1, -1, 1, -1, -1, 1, -1])
-        symbols = despread_dsss(waveform, spreading_code)
+        symbols = despread_dsss_batch(waveforms, spreading_code)
 
     elif data_rate in ['5.5Mbps', '11Mbps']:  # CCK (CCK-4 and CCK-8)
         # For CCK symbols are collected without direct despread
-        symbols = waveform[::11]  # Each symbol takes up 11 chips in CCK
+        symbols = waveforms[:, ::11]  # Each symbol takes up 11 chips in CCK
 
     else:
         raise ValueError(f"Data rate '{data_rate}' not recognized. Please use '1Mbps', '2Mbps', '5.5Mbps' or '11Mbps'.")
@@ -246,27 +463,66 @@ def plot_constellation(symbols, title="Constelation"):
     plt.grid()
     plt.show()
 
-def plot_spectrum_analyzer(waveform, fs, title="Spectrum Analyzer"):
+def plot_spectrum_analyzer(waveform, fs, title="Spectrum Analyzer", psd_summary=None, index=None):
     """
     Plots signals spectrum using power spectral density (PSD)
 
+    If the dataset's spectral summary is given (see psd_summary.load_psd_summary), the PSD of
+    signal `index` is read from it when available instead of being recomputed, and the
+    dataset's 5-95 percentile band and median PSD are drawn behind it.
+
     Inputs:
     - waveform: Waveform in time domain.
     - fs: Sample frequency in Hz.
     - title: Title.
+    - psd_summary: (Optional) Spectral summary of the dataset the waveform comes from.
+    - index: (Optional) Index of the waveform in that dataset.
     """
-    f, Pxx = signal.welch(waveform, fs=fs, nperseg=4096, noverlap=2048, nfft=8192, return_onesided=False)
+    cached = None
+    if psd_summary is not None and index is not None and "psd_db" in psd_summary:
+        position = np.searchsorted(psd_summary["indices"], index)
+        if position < len(psd_summary["indices"]) and psd_summary["indices"][position] == index:
+            cached = psd_summary["psd_db"][position].astype(float)
+
+    if cached is not None:
+        f, Pxx_dB = psd_summary["f"], cached
+    else:
+        f, Pxx = welch_psd_batch(np.asarray(waveform)[np.newaxis], fs, **WELCH_PARAMS)
+        Pxx_dB = 10 * np.log10(Pxx[0]) # to dB
 
-    Pxx_dB = 10 * np.log10(Pxx) # to dB
+    plt.figure(figsize=(20, 4))
+    if psd_summary is not None:
+        low, median, high = psd_summary["percentile_psd_db"]
+        plt.fill_between(psd_summary["f"] / 1e6, low, high, color='gray', alpha=0.3, label="Dataset 5-95 %")
+        plt.plot(psd_summary["f"] / 1e6, median, color='gray', linewidth=0.8,
+                 label=f"Dataset median (OBW {float(psd_summary['mean_occupied_bandwidth']) / 1e6:.2f} MHz)")
+    plt.plot(f / 1e6, Pxx_dB, color='blue', label="Signal")  # to MHz
+    plt.xlabel("Frequency (MHz)")
+    plt.ylabel("Power (dB/Hz)")
+    plt.title(title)
+    if psd_summary is not None:
+        plt.legend()
+    plt.grid()
+    plt.show()
 
-    center_idx = len(Pxx_dB) // 2  # Índice central del espectro
-    Pxx_dB[center_idx] = np.nan  # Insertar un NaN en el centro para romper la línea
+def plot_psd_summaries(summaries, title="Spectral occupancy"):
+    """
+    Compares the spectral occupancy of several datasets from their cached summaries.
 
-    plt.figure(figsize=(20, 4))
-    plt.plot(f / 1e6, Pxx_dB, color='blue')  # to MHz
+    Inputs:
+    - summaries: Dictionary {name: summary} (see psd_summary.summarize_folder).
+    - title: Title.
+    """
+    plt.figure(figsize=(20, 5))
+    for name, summary in summaries.items():
+        bandwidth = float(summary["mean_occupied_bandwidth"]) / 1e6
+        line, = plt.plot(summary["f"] / 1e6, 10 * np.log10(summary["mean_psd"]), label=f"{name} (OBW {bandwidth:.2f} MHz)")
+        low, _, high = summary["percentile_psd_db"]
+        plt.fill_between(summary["f"] / 1e6, low, high, color=line.get_color(), alpha=0.15)
     plt.xlabel("Frequency (MHz)")
     plt.ylabel("Power (dB/Hz)")
     plt.title(title)
+    plt.legend()
     plt.grid()
     plt.show()
 
@@ -311,47 +567,64 @@ def plot_5g_resource_grid(resource_grid, title="Resource Grid 5G NR"):
     plt.show()
 
 
-def visualize_signal(hdf5_file, json_file, batch_size=1, plot_time = True, plot_constel = True, plot_spec = True):
-    metadata = load_metadata(json_file)
-    fs = metadata.get("fs", 20e6)  # If not exists, 20MHz by default
+def plot_signal_constellation(complex_signal, metadata, title="Constelation"):
+    """
+    Plots the constellation matching the modulation of a signal (resource grid for 5G NR).
+
+    Inputs:
+    - complex_signal: Waveform in time domain.
+    - metadata: Metadata of the signal's dataset (see load_metadata).
+    - title: Title of the constellation.
+
+    Returns:
+    - plotted: False if the modulation has no constellation view.
+    """
+    if metadata.get('type') == 'OFDM':
+        plot_constellation(extract_ofdm_constellation(complex_signal,
+                                                      fft_size = metadata['FFTLength'],
+                                                      cp_length = metadata['cyclicPrefixLength'],
+                                                      num_symbols = metadata['numSymbols'],
+                                                      dc_null = metadata.get('DCnull', True)), title)
 
-    dataset = HDF5Dataset(hdf5_file)
-    dataloader = DataLoader(dataset, batch_size=batch_size, shuffle=True)
+    elif metadata.get('type') == 'Bluetooth':
+        plot_constellation(extract_bluetooth_constellation(complex_signal,
+                                                           samples_per_symbol = metadata['oversamplingFactor']), title)
 
-    signal_tensor = next(iter(dataloader))
+    elif metadata.get('type') == 'WiFi' and metadata.get('WiFi') == 'NonHT':
+        plot_constellation(extract_dsss_symbols(complex_signal,
+                                                data_rate = metadata['dataRate']), title)
 
-    for i in range(batch_size):
-        sig_tensor = signal_tensor[i].unsqueeze(0)
-        sig_tensor = torch.transpose(sig_tensor.resize_(2, sig_tensor.shape[2]), 0, 1)
+    elif metadata.get('type') == '5G - New Radio':
+        plot_5g_resource_grid(generate_5g_resource_grid(metadata), title="Resource Grid 5G NR")
 
-        complex_signal = to_complex_signal(sig_tensor.squeeze(0))
+    else:
+        return False
+    return True
 
-        if plot_time:
-            plot_time_domain(complex_signal, fs, title="Time domain waveform")
+def visualize_signal(hdf5_file, json_file, batch_size=1, plot_time = True, plot_constel = True, plot_spec = True):
+    metadata = load_metadata(json_file)
+    fs = metadata.get("fs", 20e6)  # If not exists, 20MHz by default
 
-        if plot_constel:
-            if metadata['type'] == 'OFDM':
-                plot_constellation(extract_ofdm_constellation(complex_signal,
-                                                              fft_size = metadata['FFTLength'],
-                                                              cp_length = metadata['cyclicPrefixLength'],
-                                                              num_symbols = metadata['numSymbols'],
-                                                              dc_null = metadata.get('DCnull', True)))
+    # Random indices first, then only those rows are read
+    indices = random_indices(num_signals(hdf5_file), batch_size)
+    complex_signals = to_complex_batch(read_signals(hdf5_file, indices))
+    psd_summary = load_psd_summary(hdf5_file, fs, compute_missing=False) if plot_spec else None
 
-            if metadata['type'] == 'Bluetooth':
-                plot_constellation(extract_bluetooth_constellation(complex_signal,
-                                                                   samples_per_symbol = metadata['oversamplingFactor']))
+    for i, index in enumerate(indices):
+        complex_signal = complex_signals[i]
 
-            if metadata['type'] == 'WiFi' and metadata['WiFi'] == 'NonHT':
-                plot_constellation(extract_dsss_symbols(complex_signal,
-                                                        data_rate = metadata['dataRate']))
+        if plot_time:
+            plot_time_domain(complex_signal, fs, title="Time domain waveform",
+                             cache_key=signal_key(hdf5_file, index))
 
-            if metadata['type'] == '5G - New Radio':
-                plot_5g_resource_grid(generate_5g_resource_grid(metadata), title="Resource Grid 5G NR")
+        if plot_constel:
+            plot_signal_constellation(complex_signal, metadata)
 
 
         if plot_spec:
             # Graficar el espectrograma
-            plot_spectrum_analyzer(complex_signal, fs, title="Singal's Spectogram")
+            plot_spectrum_analyzer(complex_signal, fs, title="Singal's Spectogram",
+                                   psd_summary=psd_summary, index=index)
 
 
 def visualize_signal_mixed(hdf5_file1, json_file1, hdf5_file2=None, json_file2=None, batch_size=1, plot_time=True, plot_constel=True, plot_spec=True, mix_factor=0.5):
@@ -370,44 +643,32 @@ def visualize_signal_mixed(hdf5_file1, json_file1, hdf5_file2=None, json_file2=N
     metadata1 = load_metadata(json_file1)
     fs = metadata1.get("fs", 20e6)  # If not exist, 20MHz by default
 
-    if hdf5_file2 and json_file2:
-        dataset = HDF5Dataset_mixed(hdf5_file1, hdf5_file2, mix_factor)
-        dataloader = DataLoader(dataset, batch_size=batch_size, shuffle=True)
-        mixed_mode = True
-    else:
-        dataset = HDF5Dataset(hdf5_file1)
-        dataloader = DataLoader(dataset, batch_size=batch_size, shuffle=True)
-        mixed_mode = False
+    mixed_mode = bool(hdf5_file2 and json_file2)
 
-    # Sample from dataloader
-    signal_batch = next(iter(dataloader))
+    # Random indices first, then only those rows are read (same rows of the interference file)
+    indices = random_indices(num_signals(hdf5_file1), batch_size)
+    soi_signals = read_signals(hdf5_file1, indices)
+    soi_batch = to_complex_batch(soi_signals)
+    if mixed_mode:
+        interf_signals = read_signals(hdf5_file2, indices % num_signals(hdf5_file2))
+        mixed_batch = to_complex_batch(mix_signals(soi_signals, interf_signals, mix_factor))
+    psd_summary = load_psd_summary(hdf5_file1, fs, compute_missing=False) if plot_spec else None
 
-    for i in range(batch_size):
+    for i, index in enumerate(indices):
+        soi_complex = soi_batch[i]
         if mixed_mode:
-            mixed_signal, soi_signal = signal_batch
-
-            # To complex form
-            mixed_signal = torch.transpose(mixed_signal.resize_(2, mixed_signal.shape[2]), 0, 1)
-            soi_signal = torch.transpose(soi_signal.resize_(2, soi_signal.shape[2]), 0, 1)
-
-            print(f"SOI shape: {soi_signal.shape}, Interference shape: {mixed_signal.shape}")
-
-            mixed_complex = to_complex_signal(mixed_signal.squeeze(0))
-            soi_complex = to_complex_signal(soi_signal.squeeze(0))
+            mixed_complex = mixed_batch[i]
             print(f"SOI shape: {soi_complex.shape}, Interference shape: {mixed_complex.shape}")
 
-        else:
-            soi_signal = signal_batch[i].unsqueeze(0)
-            soi_signal = torch.transpose(soi_signal.resize_(2, soi_signal.shape[2]), 0, 1)
-
-            soi_complex = to_complex_signal(soi_signal.squeeze(0))
-
         # Plots
         if plot_time:
             if mixed_mode:
-                plot_time_domain(mixed_complex, fs, title="Interference Signal (SOI + Interference)")
+                plot_time_domain(mixed_complex, fs, title="Interference Signal (SOI + Interference)",
+                                 cache_key=(signal_key(hdf5_file1, index),
+                                            signal_key(hdf5_file2, index % num_signals(hdf5_file2)), mix_factor))
 
-            plot_time_domain(soi_complex, fs, title="Signal of Interest (SOI)")
+            plot_time_domain(soi_complex, fs, title="Signal of Interest (SOI)",
+                             cache_key=signal_key(hdf5_file1, index))
 
         if plot_constel:
             if metadata1['type'] == 'OFDM':
@@ -450,11 +711,14 @@ def visualize_signal_mixed(hdf5_file1, json_file1, hdf5_file2=None, json_file2=N
             if mixed_mode:
                 plot_spectrum_analyzer(mixed_complex, fs, title="Interference Spectogram")
 
-            plot_spectrum_analyzer(soi_complex, fs, title="SoI Spectogram")
+            plot_spectrum_analyzer(soi_complex, fs, title="SoI Spectogram",
+                                   psd_summary=psd_summary, index=index)
 
 
 
 def execute_visualization(b):
+    from IPython.display import clear_output
+
     with output:
         clear_output(wait=True)
 
@@ -0,0 +1,91 @@
+import sys
+import time
+import h5py
+import numpy as np
+from aux_funcs_vis import (to_complex_batch, extract_ofdm_constellation_batch, despread_dsss_batch,
+                           extract_bluetooth_constellation_batch)
+
+# Per-signal loop implementations (the previous versions of the extraction functions), kept as reference
+
+def loop_ofdm_constellation(waveform, fft_size=64, cp_length=16, num_symbols=10, dc_null=True, guard_bands=(6,5)):
+    ofdm_symbols = []
+    for i in range(num_symbols):
+        start_idx = i * (fft_size + cp_length) + cp_length
+        end_idx = start_idx + fft_size
+        if end_idx > len(waveform):
+            break
+        ofdm_symbol = np.fft.fft(waveform[start_idx:end_idx], fft_size)
+        start_guard, end_guard = guard_bands
+        if dc_null:
+            ofdm_symbol = np.concatenate((ofdm_symbol[start_guard:fft_size//2],
+                                          ofdm_symbol[fft_size//2 + 1:fft_size-end_guard]))
+        else:
+            ofdm_symbol = (ofdm_symbol[start_guard:fft_size-end_guard])
+        ofdm_symbols.append(ofdm_symbol)
+    return np.concatenate(ofdm_symbols)
+
+def loop_despread_dsss(waveform, spreading_code):
+    spreading_length = len(spreading_code)
+    num_symbols = len(waveform) // spreading_length
+    symbols = []
+    for i in range(num_symbols):
+        symbol_chunk = waveform[i * spreading_length : (i + 1) * spreading_length]
+        symbols.append(np.dot(symbol_chunk, spreading_code))
+    return np.array(symbols)
+
+def loop_bluetooth_constellation(waveform, samples_per_symbol):
+    symbols = waveform[::samples_per_symbol].copy()
+    symbols /= np.max(np.abs(symbols))
+    return symbols
+
+def time_call(function, *args, repeats=3):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+def benchmark(waveforms):
+    """
+    Time the per-signal loops against the batched versions on the same waveforms and check
+    that both give the same symbols.
+
+    Inputs:
+    - waveforms: Complex waveforms [N, L].
+
+    Returns:
+    - results: Dictionary with loop time, batched time and speedup per extractor.
+    """
+    barker = np.array([1, 1, 1, -1, -1, -1, 1, -1, -1, 1, -1])
+    ofdm_symbols = waveforms.shape[1] // 80  # 64-point FFT + 16-sample prefix
+    cases = {
+        "ofdm": (lambda w: loop_ofdm_constellation(w, 64, 16, ofdm_symbols),
+                 lambda W: extract_ofdm_constellation_batch(W, 64, 16, ofdm_symbols)),
+        "dsss": (lambda w: loop_despread_dsss(w, barker),
+                 lambda W: despread_dsss_batch(W, barker)),
+        "bluetooth": (lambda w: loop_bluetooth_constellation(w, 8),
+                      lambda W: extract_bluetooth_constellation_batch(W, 8))
+    }
+
+    results = {}
+    for name, (loop_function, batch_function) in cases.items():
+        loop_time, loop_symbols = time_call(lambda: np.stack([loop_function(w) for w in waveforms]))
+        batch_time, batch_symbols = time_call(batch_function, waveforms)
+        assert np.allclose(loop_symbols, batch_symbols, rtol=1e-9, atol=1e-9), f"{name}: batched symbols differ"
+        results[name] = {"loop_s": loop_time, "batch_s": batch_time, "speedup": loop_time / batch_time}
+    return results
+
+if __name__ == "__main__":
+    # Usage: python benchmark_constellations.py [dataset.h5] [num_signals]
+    num_signals = int(sys.argv[2]) if len(sys.argv) > 2 else 256
+    if len(sys.argv) > 1:
+        with h5py.File(sys.argv[1], 'r') as f:
+            waveforms = to_complex_batch(f['dataset'][:num_signals])
+    else:
+        rng = np.random.default_rng(0)
+        waveforms = to_complex_batch(rng.standard_normal((num_signals, 2, 8000)))
+
+    print(f"Waveforms: {waveforms.shape[0]} x {waveforms.shape[1]} samples")
+    for name, result in benchmark(waveforms).items():
+        print(f"  {name:<10} loop {result['loop_s'] * 1e3:8.1f} ms | batched {result['batch_s'] * 1e3:7.1f} ms | x{result['speedup']:.1f}")
@@ -0,0 +1,240 @@
+import os
+import sys
+import html
+import argparse
+import multiprocessing
+import matplotlib
+matplotlib.use('Agg')  # Headless: figures are only saved, never shown
+import matplotlib.pyplot as plt
+import numpy as np
+from aux_funcs_vis import (load_metadata, num_signals, random_indices, read_signals, to_complex_batch,
+                           plot_time_domain, plot_spectrum_analyzer, plot_signal_constellation)
+from psd_summary import load_psd_summary
+
+# Plots rendered for every signal, in the order of the report rows
+PLOT_KINDS = ("time", "spectrum", "constellation")
+
+# Suffix of the folders written by unet_inference_pytorch.py
+INFERENCE_SUFFIX = "_inference"
+
+def _dataset_files(folder):
+    # Relative paths of the dataset files of a folder tree (bits_* files hold the transmitted bits)
+    files = []
+    for root, _, names in os.walk(folder):
+        for name in sorted(names):
+            if name.endswith('.h5') and not name.startswith('bits_') and name != 'metrics_per_signal.h5':
+                files.append(os.path.relpath(os.path.join(root, name), folder))
+    return sorted(files)
+
+def collect_report_tasks(folder, reference_dir=None, interfered_dir=None, output_dir=None, signals_per_file=2, seed=0):
+    """
+    Lists the files of a dataset or inference folder and the plots to render for each of them.
+
+    A folder ending in '_inference' (or any folder given with a reference or interfered folder)
+    is read as inference outputs: each file is shown next to the interfered input with the same
+    relative path (by default the folder without '_inference') and, if given, the clean reference
+    with the same name. Otherwise every file is shown on its own.
+
+    Inputs:
+    - folder: Dataset folder or inference output folder.
+    - reference_dir: (Optional) Folder with the clean references.
+    - interfered_dir: (Optional) Folder with the interfered inputs of an inference folder.
+    - output_dir: Report folder (images go to 'images/').
+    - signals_per_file: Number of random signals shown per file.
+    - seed: Seed of the random signals.
+
+    Returns:
+    - tasks: One dictionary per file.
+    """
+    folder = os.path.normpath(folder)
+    inference = bool(reference_dir or interfered_dir or folder.endswith(INFERENCE_SUFFIX))
+    if inference and interfered_dir is None and folder.endswith(INFERENCE_SUFFIX):
+        interfered_dir = folder[:-len(INFERENCE_SUFFIX)]
+
+    tasks = []
+    for i, rel_path in enumerate(_dataset_files(folder)):
+        name = os.path.splitext(rel_path)[0]
+        if inference:
+            paths = {"clean": os.path.join(reference_dir, os.path.basename(rel_path)) if reference_dir else None,
+                     "interfered": os.path.join(interfered_dir, rel_path) if interfered_dir else None,
+                     "denoised": os.path.join(folder, rel_path)}
+        else:
+            paths = {"signal": os.path.join(folder, rel_path)}
+        paths = {role: path for role, path in paths.items() if path and os.path.exists(path)}
+
+        # Metadata next to the file, or next to the interfered input
+        json_files = [os.path.splitext(path)[0] + '.json' for path in paths.values()]
+        json_file = next((f for f in json_files if os.path.exists(f)), None)
+
+        tasks.append({"name": name, "paths": paths, "json_file": json_file,
+                      "image_dir": os.path.join(output_dir, 'images', name),
+                      "signals_per_file": signals_per_file, "seed": seed + i})
+    return tasks
+
+def save_plot(plot_function, image_path, dpi, *args, **kwargs):
+    """
+    Runs one of the plotting functions of aux_funcs_vis and saves its figure instead of showing it.
+
+    Returns:
+    - saved: False if the function drew nothing.
+    """
+    plt.close('all')
+    if plot_function(*args, **kwargs) is False or not plt.get_fignums():
+        return False
+    plt.gcf().savefig(image_path, dpi=dpi, bbox_inches='tight')
+    plt.close('all')
+    return True
+
+def render_file(task, dpi=80):
+    """
+    Renders the plots of one file (all roles side by side for the same random signals).
+
+    Inputs:
+    - task: Entry of collect_report_tasks.
+    - dpi: Resolution of the images.
+
+    Returns:
+    - entry: Name, metadata, signal indices and image paths {index: {kind: {role: path}}}.
+    """
+    metadata = load_metadata(task["json_file"]) if task["json_file"] else {}
+    fs = metadata.get("fs", 20e6)
+    entry = {"name": task["name"], "metadata": metadata, "roles": list(task["paths"]), "images": {}, "error": None}
+    try:
+        total = min(num_signals(path) for path in task["paths"].values())
+        indices = np.sort(random_indices(total, task["signals_per_file"], np.random.default_rng(task["seed"])))
+        os.makedirs(task["image_dir"], exist_ok=True)
+
+        waveforms = {role: to_complex_batch(read_signals(path, indices)) for role, path in task["paths"].items()}
+        summaries = {role: load_psd_summary(path, fs, compute_missing=False) for role, path in task["paths"].items()}
+
+        for i, index in enumerate(indices):
+            images = {kind: {} for kind in PLOT_KINDS}
+            for role, waveform in waveforms.items():
+                title = f"{task['name']} [{index}] {role}"
+                plots = {"time": (plot_time_domain, (waveform[i], fs), {"title": title}),
+                         "spectrum": (plot_spectrum_analyzer, (waveform[i], fs),
+                                      {"title": title, "psd_summary": summaries[role], "index": index}),
+                         "constellation": (plot_signal_constellation, (waveform[i], metadata), {"title": title})}
+                for kind, (plot_function, args, kwargs) in plots.items():
+                    image_path = os.path.join(task["image_dir"], f"{index}_{role}_{kind}.png")
+                    if save_plot(plot_function, image_path, dpi, *args, **kwargs):
+                        images[kind][role] = image_path
+            entry["images"][int(index)] = images
+    except Exception as error:  # One broken file must not stop the report
+        entry["error"] = f"{type(error).__name__}: {error}"
+    finally:
+        plt.close('all')
+    return entry
+
+def _render_task(arguments):
+    return render_file(*arguments)
+
+def write_html_index(entries, output_dir, title="Signal report"):
+    """
+    Writes index.html: one section per file, one table per signal (roles as columns, plots as rows).
+
+    Returns:
+    - index_path: Path of index.html.
+    """
+    def image(path):
+        rel_path = html.escape(os.path.relpath(path, output_dir))
+        return f'<a href="{rel_path}"><img src="{rel_path}" loading="lazy"></a>'
+
+    parts = [f"<!DOCTYPE html><html><head><meta charset='utf-8'><title>{html.escape(title)}</title>",
+             "<style>body{font-family:sans-serif} table{border-collapse:collapse;width:100%} "
+             "td,th{border:1px solid #ccc;padding:4px;vertical-align:top} img{width:100%} "
+             ".error{color:#b00}</style></head><body>",
+             f"<h1>{html.escape(title)}</h1><ul>"]
+    parts += [f'<li><a href="#f{i}">{html.escape(entry["name"])}</a>'
+              f'{" (error)" if entry["error"] else ""}</li>' for i, entry in enumerate(entries)]
+    parts.append("</ul>")
+
+    for i, entry in enumerate(entries):
+        description = ", ".join(f"{key}: {entry['metadata'][key]}" for key in ("type", "fs", "snr")
+                                if key in entry["metadata"])
+        parts.append(f'<h2 id="f{i}">{html.escape(entry["name"])}</h2><p>{html.escape(description)}</p>')
+        if entry["error"]:
+            parts.append(f'<p class="error">{html.escape(entry["error"])}</p>')
+        for index, images in entry["images"].items():
+            parts.append(f"<h3>Signal {index}</h3><table><tr><th></th>")
+            parts += [f"<th>{html.escape(role)}</th>" for role in entry["roles"]]
+            parts.append("</tr>")
+            for kind in PLOT_KINDS:
+                if not images[kind]:
+                    continue
+                parts.append(f"<tr><th>{kind}</th>")
+                parts += [f"<td>{image(images[kind][role]) if role in images[kind] else ''}</td>" for role in entry["roles"]]
+                parts.append("</tr>")
+            parts.append("</table>")
+    parts.append("</body></html>")
+
+    index_path = os.path.join(output_dir, 'index.html')
+    with open(index_path, 'w') as f:
+        f.write("\n".join(parts))
+    return index_path
+
+def generate_report(folder, output_dir=None, reference_dir=None, interfered_dir=None, signals_per_file=2,
+                    workers=None, seed=0, dpi=80):
+    """
+    Renders the time domain, spectrum and constellation plots of a dataset or inference folder to
+    PNG files across a process pool, and writes an HTML index.
+
+    Inputs:
+    - folder: Dataset folder or inference output folder (see collect_report_tasks).
+    - output_dir: Report folder (default: '<folder>_report').
+    - reference_dir, interfered_dir: (Optional) Clean references and interfered inputs of an inference folder.
+    - signals_per_file: Number of random signals shown per file.
+    - workers: Number of processes (default: number of CPUs).
+    - seed: Seed of the random signals.
+    - dpi: Resolution of the images.
+
+    Returns:
+    - index_path: Path of index.html.
+    """
+    output_dir = output_dir or os.path.normpath(folder) + '_report'
+    tasks = collect_report_tasks(folder, reference_dir, interfered_dir, output_dir, signals_per_file, seed)
+    workers = min(workers or os.cpu_count() or 1, max(len(tasks), 1))
+    print(f"Rendering {len(tasks)} files with {workers} processes...")
+
+    arguments = [(task, dpi) for task in tasks]
+    if workers == 1:
+        entries = [_render_task(args) for args in arguments]
+    else:
+        with multiprocessing.get_context("spawn").Pool(workers) as pool:
+            entries = list(pool.imap(_render_task, arguments))
+
+    for entry in entries:
+        if entry["error"]:
+            print(f"  [!] {entry['name']}: {entry['error']}")
+
+    index_path = write_html_index(entries, output_dir, title=f"Report: {os.path.basename(os.path.normpath(folder))}")
+    print(f"Report saved in: {index_path}")
+    return index_path
+
+def cli(argv=None):
+    """
+    Command-line entry point: render the report of a folder.
+
+    Inputs:
+    - argv: Arguments without the program name (default: sys.argv[1:]).
+    """
+    parser = argparse.ArgumentParser(description="Render dataset or inference plots to PNG with an HTML index.")
+    parser.add_argument("folder", help="Dataset folder or '<datasets>_inference' folder")
+    parser.add_argument("--output", help="Report folder (default: <folder>_report)")
+    parser.add_argument("--reference", help="Folder with the clean references (inference reports)")
+    parser.add_argument("--interfered", help="Folder with the interfered inputs (default: <folder> without '_inference')")
+    parser.add_argument("--signals", type=int, default=2, help="Random signals per file")
+    parser.add_argument("--workers", type=int, help="Number of processes (default: number of CPUs)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--dpi", type=int, default=80)
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.folder):
+        print(f"Folder not found: {args.folder}")
+        sys.exit(1)
+
+    generate_report(args.folder, args.output, args.reference, args.interfered, args.signals,
+                    args.workers, args.seed, args.dpi)
+
+if __name__ == "__main__":
+    cli()
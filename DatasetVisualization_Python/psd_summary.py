@@ -0,0 +1,253 @@
+import os
+import sys
+import json
+import h5py
+import numpy as np
+import scipy.signal as signal
+
+# Welch parameters used by plot_spectrum_analyzer
+WELCH_PARAMS = {"nperseg": 4096, "noverlap": 2048, "nfft": 8192}
+
+# Percentiles of the PSD (in dB) stored for each frequency bin
+PSD_PERCENTILES = (5, 50, 95)
+
+# Per-frequency histograms of the PSD (dB) the percentiles are estimated from, so that memory
+# does not grow with the number of signals (values outside the range go to the edge bins)
+PSD_HIST_RANGE_DB = (-200.0, 60.0)
+PSD_HIST_STEP_DB = 0.5
+
+def psd_sidecar_path(hdf5_file):
+    """
+    Path of the spectral summary of a dataset file: '<name>_psd.npz' next to '<name>.h5'.
+    """
+    return os.path.splitext(hdf5_file)[0] + '_psd.npz'
+
+def welch_psd_batch(waveforms, fs, nperseg=4096, noverlap=2048, nfft=8192):
+    """
+    Welch PSDs of a batch of complex waveforms in a single call (batch axis first).
+
+    Inputs:
+    - waveforms: Complex waveforms [N, L].
+    - fs: Sample frequency in Hz.
+    - nperseg, noverlap, nfft: Welch parameters (segments are shortened to L for short signals).
+
+    Returns:
+    - f: Frequencies in Hz, from -fs/2 to fs/2 (centered, nfft bins).
+    - Pxx: PSDs [N, nfft] in the same (centered) order.
+    """
+    nperseg = min(nperseg, waveforms.shape[-1])
+    noverlap = min(noverlap, nperseg // 2)
+    f, Pxx = signal.welch(waveforms, fs=fs, nperseg=nperseg, noverlap=noverlap, nfft=max(nfft, nperseg),
+                          return_onesided=False, axis=-1)
+    return np.fft.fftshift(f), np.fft.fftshift(Pxx, axes=-1)
+
+def occupied_bandwidth(f, Pxx, power_fraction=0.99):
+    """
+    Occupied bandwidth of each PSD: width of the band holding `power_fraction` of the power,
+    leaving (1 - power_fraction) / 2 of it on each side.
+
+    Inputs:
+    - f: Centered frequencies in Hz.
+    - Pxx: Centered PSDs [..., nfft].
+    - power_fraction: Fraction of the power inside the band.
+
+    Returns:
+    - bandwidth: Occupied bandwidth in Hz [...].
+    - center: Center frequency of the band in Hz [...].
+    """
+    cumulative = np.cumsum(Pxx, axis=-1)
+    cumulative /= cumulative[..., -1:]
+    tail = (1 - power_fraction) / 2
+    low = f[np.argmax(cumulative >= tail, axis=-1)]
+    high = f[np.argmax(cumulative >= 1 - tail, axis=-1)]
+    bin_width = f[1] - f[0]
+    return high - low + bin_width, (high + low) / 2
+
+def histogram_percentiles(counts, percentiles, low=PSD_HIST_RANGE_DB[0], step=PSD_HIST_STEP_DB):
+    """
+    Percentiles of each row of a histogram, interpolated linearly inside the bins.
+
+    Inputs:
+    - counts: Histograms [nfft, num_bins] (bin k covers [low + k * step, low + (k + 1) * step)).
+    - percentiles: Percentiles in [0, 100].
+    - low, step: Lower edge and width of the bins.
+
+    Returns:
+    - values: Percentile values [len(percentiles), nfft].
+    """
+    cumulative = np.cumsum(counts, axis=1)
+    total = cumulative[:, -1:]
+    values = []
+    for percentile in percentiles:
+        target = percentile / 100 * total
+        k = np.minimum(np.argmax(cumulative >= np.maximum(target, 1e-12), axis=1), counts.shape[1] - 1)
+        rows = np.arange(counts.shape[0])
+        before = np.where(k > 0, cumulative[rows, k - 1], 0)
+        inside = (target[:, 0] - before) / np.maximum(counts[rows, k], 1)
+        values.append(low + (k + np.clip(inside, 0, 1)) * step)
+    return np.array(values)
+
+def compute_psd_summary(hdf5_file, fs, num_signals=None, batch_size=64, seed=0, store_per_signal=False):
+    """
+    Welch PSDs of every signal (or a random subset) of a dataset file, computed batch by batch.
+
+    Memory does not depend on the number of signals: the mean PSD is a running sum and the
+    PSD percentiles are estimated from per-frequency histograms (PSD_HIST_STEP_DB resolution),
+    unless the per-signal PSDs are requested.
+
+    Inputs:
+    - hdf5_file: Dataset file ('dataset' key, [N, 2, L]).
+    - fs: Sample frequency in Hz.
+    - num_signals: Number of randomly chosen signals (None: all of them).
+    - batch_size: Number of signals read and transformed at a time.
+    - seed: Seed of the random subset.
+    - store_per_signal: Also keep every PSD (in dB, float16) for per-signal plots (memory and
+      sidecar size grow with the number of signals).
+
+    Returns:
+    - summary: Dictionary with the frequencies, the mean PSD, the PSD percentiles (dB), the
+      occupied bandwidth of every signal and of the mean PSD, and the signal indices.
+    """
+    with h5py.File(hdf5_file, 'r') as f:
+        dataset = f['dataset']
+        total = dataset.shape[0]
+        if num_signals is None or num_signals >= total:
+            indices = np.arange(total)
+        else:
+            indices = np.sort(np.random.default_rng(seed).choice(total, size=num_signals, replace=False))
+
+        num_bins = int(round((PSD_HIST_RANGE_DB[1] - PSD_HIST_RANGE_DB[0]) / PSD_HIST_STEP_DB))
+        psd_db = []
+        histogram = None
+        power_sum = None
+        bandwidths = []
+        for start in range(0, len(indices), batch_size):
+            batch = dataset[indices[start:start + batch_size]]  # Only the selected rows are read
+            freqs, Pxx = welch_psd_batch(batch[:, 0] + 1j * batch[:, 1], fs, **WELCH_PARAMS)
+            power_sum = Pxx.sum(axis=0) if power_sum is None else power_sum + Pxx.sum(axis=0)
+            bandwidths.append(occupied_bandwidth(freqs, Pxx)[0])
+            batch_db = (10 * np.log10(np.maximum(Pxx, 1e-30))).astype(np.float32)
+
+            # One bincount per batch over (frequency, dB bin) pairs
+            bins = np.clip(((batch_db - PSD_HIST_RANGE_DB[0]) / PSD_HIST_STEP_DB).astype(np.int64), 0, num_bins - 1)
+            flat = (np.arange(len(freqs)) * num_bins + bins).ravel()
+            counts = np.bincount(flat, minlength=len(freqs) * num_bins).reshape(len(freqs), num_bins)
+            histogram = counts if histogram is None else histogram + counts
+            if store_per_signal:
+                psd_db.append(batch_db.astype(np.float16))
+
+    mean_psd = power_sum / len(indices)
+    mean_bandwidth, mean_center = occupied_bandwidth(freqs, mean_psd)
+
+    summary = {
+        "f": freqs,
+        "mean_psd": mean_psd,
+        "percentiles": np.array(PSD_PERCENTILES),
+        "percentile_psd_db": histogram_percentiles(histogram, PSD_PERCENTILES).astype(np.float32),
+        "occupied_bandwidth": np.concatenate(bandwidths),
+        "mean_occupied_bandwidth": mean_bandwidth,
+        "mean_center_frequency": mean_center,
+        "indices": indices,
+        "fs": fs,
+        "total_signals": total,
+        "welch_params": json.dumps(WELCH_PARAMS)
+    }
+    if store_per_signal:
+        summary["psd_db"] = np.concatenate(psd_db)
+    return summary
+
+def count_signals(hdf5_file):
+    """
+    Number of signals of a dataset file (reads only the metadata).
+    """
+    with h5py.File(hdf5_file, 'r') as f:
+        return f['dataset'].shape[0]
+
+def _source_fingerprint(hdf5_file):
+    stat = os.stat(hdf5_file)
+    return np.array([stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+
+def load_psd_summary(hdf5_file, fs, num_signals=None, recompute=False, compute_missing=True, **kwargs):
+    """
+    Spectral summary of a dataset file, read from its sidecar when it is up to date.
+
+    The sidecar is recomputed (and rewritten) if it is missing, if the dataset file changed,
+    if it was computed with another sample frequency, Welch parameters or subset size, or
+    if `recompute` is True. With `compute_missing=False` nothing is computed: an outdated or
+    missing sidecar gives None (for interactive plots).
+
+    Inputs:
+    - hdf5_file: Dataset file.
+    - fs: Sample frequency in Hz.
+    - num_signals: Number of randomly chosen signals (None: all of them).
+    - recompute: Ignore the sidecar.
+    - compute_missing: Compute the summary when the sidecar is not usable.
+    - kwargs: Other arguments of compute_psd_summary.
+
+    Returns:
+    - summary: Dictionary (see compute_psd_summary), or None.
+    """
+    sidecar = psd_sidecar_path(hdf5_file)
+    fingerprint = _source_fingerprint(hdf5_file)
+    if not recompute and os.path.exists(sidecar):
+        total = count_signals(hdf5_file)
+        expected_signals = min(num_signals, total) if num_signals else total
+        with np.load(sidecar) as cached:
+            summary = {key: cached[key] for key in cached.files}
+        up_to_date = (np.array_equal(summary["source"], fingerprint)
+                      and float(summary["fs"]) == float(fs)
+                      and str(summary["welch_params"]) == json.dumps(WELCH_PARAMS)
+                      and len(summary["indices"]) == expected_signals
+                      and (not kwargs.get("store_per_signal") or "psd_db" in summary))
+        if up_to_date:
+            return summary
+
+    if not compute_missing:
+        return None
+    summary = compute_psd_summary(hdf5_file, fs, num_signals, **kwargs)
+    summary["source"] = fingerprint
+    np.savez(sidecar, **summary)
+    return summary
+
+def summarize_folder(folder, num_signals=None, recompute=False):
+    """
+    Build (or refresh) the spectral summary of every dataset file of a folder.
+
+    The sample frequency of each file is read from its JSON metadata ('fs', 20 MHz by default).
+
+    Inputs:
+    - folder: Folder with '<name>.h5' / '<name>.json' pairs.
+    - num_signals: Number of randomly chosen signals per file (None: all of them).
+    - recompute: Ignore existing sidecars.
+
+    Returns:
+    - summaries: Dictionary {name: summary}.
+    """
+    summaries = {}
+    for file in sorted(os.listdir(folder)):
+        if not file.endswith('.h5') or file.startswith('bits_'):
+            continue
+        name = os.path.splitext(file)[0]
+        json_file = os.path.join(folder, name + '.json')
+        fs = 20e6
+        if os.path.exists(json_file):
+            with open(json_file, 'r') as f:
+                fs = json.load(f).get("fs", 20e6)
+        summaries[name] = load_psd_summary(os.path.join(folder, file), fs, num_signals, recompute)
+    return summaries
+
+if __name__ == "__main__":
+    # Usage: python psd_summary.py <dataset_folder> [num_signals] [recompute]
+    if len(sys.argv) < 2:
+        print("Usage: python psd_summary.py <dataset_folder> [num_signals] [recompute]")
+        sys.exit(1)
+
+    folder = sys.argv[1]
+    num_signals = int(sys.argv[2]) if len(sys.argv) > 2 and sys.argv[2] != 'all' else None
+    recompute = len(sys.argv) > 3 and sys.argv[3].lower() in ('true', 'recompute')
+
+    for name, summary in summarize_folder(folder, num_signals, recompute).items():
+        print(f"{name}: {len(summary['indices'])}/{int(summary['total_signals'])} signals | "
+              f"occupied bandwidth (99%) {float(summary['mean_occupied_bandwidth']) / 1e6:.2f} MHz "
+              f"around {float(summary['mean_center_frequency']) / 1e6:+.2f} MHz | "
+              f"per signal median {np.median(summary['occupied_bandwidth']) / 1e6:.2f} MHz")
@@ -0,0 +1,126 @@
+import numpy as np
+from collections import OrderedDict
+
+# Samples per bin of the finest envelope level (views with fewer samples per pixel plot raw samples)
+BASE_BIN = 4
+
+# Coarsest level: the pyramid stops halving below this number of bins
+MIN_BINS = 1024
+
+# Number of signals whose envelopes are kept between plots
+MAX_CACHED_SIGNALS = 16
+
+# Envelope pyramids of recently plotted signals: {key: (real LOD, imaginary LOD)}
+_lod_cache = OrderedDict()
+
+def minmax_envelope(x, bin_size):
+    """
+    Minimum and maximum of every `bin_size` consecutive samples, in a single vectorized pass.
+
+    Inputs:
+    - x: Real waveform [L].
+    - bin_size: Samples per bin (the last bin may be shorter).
+
+    Returns:
+    - mins, maxs: Envelope [ceil(L / bin_size)].
+    """
+    full_bins = len(x) // bin_size
+    bins = x[:full_bins * bin_size].reshape(full_bins, bin_size)  # A view, no copy
+    mins, maxs = bins.min(axis=1), bins.max(axis=1)
+    if len(x) % bin_size:
+        tail = x[full_bins * bin_size:]
+        mins, maxs = np.append(mins, tail.min()), np.append(maxs, tail.max())
+    return mins, maxs
+
+def _halve(mins, maxs):
+    # Next pyramid level: min/max of pairs of bins
+    if len(mins) % 2:
+        mins, maxs = np.append(mins, mins[-1]), np.append(maxs, maxs[-1])
+    return np.minimum(mins[0::2], mins[1::2]), np.maximum(maxs[0::2], maxs[1::2])
+
+class WaveformLOD:
+    """
+    Level-of-detail pyramid of a real waveform for plotting.
+
+    Level 0 holds the min/max envelope of every BASE_BIN samples and each next level merges
+    pairs of bins, down to MIN_BINS bins. Building it costs O(L); a view of any range then
+    touches about one bin per pixel, whatever the length of the waveform.
+    """
+    def __init__(self, x, base_bin=BASE_BIN, min_bins=MIN_BINS):
+        self.x = np.asarray(x)
+        self.levels = []  # (bin_size, mins, maxs), finest first
+
+        bin_size = base_bin
+        mins, maxs = minmax_envelope(self.x, bin_size)
+        self.levels.append((bin_size, mins, maxs))
+        while len(mins) > min_bins:
+            mins, maxs = _halve(mins, maxs)
+            bin_size *= 2
+            self.levels.append((bin_size, mins, maxs))
+
+    def __len__(self):
+        return len(self.x)
+
+    @property
+    def limits(self):
+        """
+        Minimum and maximum of the whole waveform.
+        """
+        _, mins, maxs = self.levels[-1]
+        return float(mins.min()), float(maxs.max())
+
+    def view(self, start, stop, num_pixels):
+        """
+        Points to plot for samples [start, stop) on `num_pixels` horizontal pixels.
+
+        Uses the coarsest level with at most one bin per pixel, and the raw samples when
+        there are fewer than BASE_BIN samples per pixel (then `lower` and `upper` are the
+        same array).
+
+        Inputs:
+        - start, stop: Sample range (clipped to the waveform).
+        - num_pixels: Width of the plot in pixels.
+
+        Returns:
+        - positions: Sample positions (float) of the points (bin centers for envelopes).
+        - lower, upper: Envelope (or samples) at those positions.
+        """
+        start, stop = max(int(start), 0), min(int(stop), len(self.x))
+        if stop <= start:
+            return np.empty(0), np.empty(0), np.empty(0)
+
+        samples_per_pixel = (stop - start) / max(num_pixels, 1)
+        if samples_per_pixel < self.levels[0][0]:
+            samples = self.x[start:stop]
+            return np.arange(start, stop, dtype=float), samples, samples
+
+        bin_size, mins, maxs = next(level for level in reversed(self.levels) if level[0] <= samples_per_pixel)
+        first, last = start // bin_size, -(-stop // bin_size)
+        centers = (np.arange(first, last) + 0.5) * bin_size
+        return centers, mins[first:last], maxs[first:last]
+
+def waveform_lods(signal, cache_key=None):
+    """
+    LOD pyramids of the real and imaginary parts of a complex waveform.
+
+    With a `cache_key` (e.g. file, modification time and signal index) the pyramids are kept
+    in a small LRU cache, so plotting the same signal again or zooming does not rebuild them.
+
+    Inputs:
+    - signal: Complex waveform [L].
+    - cache_key: (Optional) Hashable identifier of the signal.
+
+    Returns:
+    - lods: (WaveformLOD of the real part, WaveformLOD of the imaginary part).
+    """
+    key = (cache_key, len(signal))
+    if cache_key is not None and key in _lod_cache:
+        _lod_cache.move_to_end(key)
+        return _lod_cache[key]
+
+    lods = (WaveformLOD(np.real(signal)), WaveformLOD(np.imag(signal)))
+    if cache_key is not None:
+        _lod_cache[key] = lods
+        while len(_lod_cache) > MAX_CACHED_SIGNALS:
+            _lod_cache.popitem(last=False)
+    return lods
@@ -1,7 +1,6 @@
 import os
 import glob
-import shutil
-from utils import *
+from utils import create_interference_dataset, io_accounting
 
 def copy_related_files(source_dir, base_name, destination_dir):
     """
@@ -25,14 +24,14 @@ def copy_related_files(source_dir, base_name, destination_dir):
                 src = os.path.join(source_dir, filename)
                 dst = os.path.join(destination_dir, filename)
                 if os.path.exists(src):
-                    shutil.copy(src, dst)
+                    io_accounting.copy_file(src, dst)
         else:
             # Copy .json and .mat files directly if they exist
             filename = f"{base_name}{ext}"
             src = os.path.join(source_dir, filename)
             dst = os.path.join(destination_dir, filename)
             if os.path.exists(src):
-                shutil.copy(src, dst)
+                io_accounting.copy_file(src, dst)
 
 def main():
     """
@@ -85,9 +84,16 @@ def main():
                 output_file = os.path.join(output_subdir, f"{clean_base}")
                 
                 # Apply interference and save result
-                create_interference_dataset(clean_file, interf_file, att, new_name=output_file)
+                with io_accounting.stage("interference_generation"):
+                    create_interference_dataset(clean_file, interf_file, att, new_name=output_file)
 
                 # Copy auxiliary files related to the clean signal
-                copy_related_files(clean_dir, clean_base, output_subdir)
+                with io_accounting.stage("metadata_copy"):
+                    copy_related_files(clean_dir, clean_base, output_subdir)
 
     print(f"\nInterference datasets successfully generated and saved in '{base_output_dir}'")
+    io_accounting.print_summary()
+
+
+if __name__ == "__main__":
+    main()
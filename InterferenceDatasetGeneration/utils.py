@@ -1,6 +1,6 @@
-import h5py
 import numpy as np
 import os
+from wireless_signals import io_accounting  # Shared with the other script folders (pip install -e .)
 
 def adjust_signal_length(interf_signal, target_length):
     """
@@ -53,13 +53,13 @@ def create_interference_dataset(clean_h5_path, interf_h5_path, attenuation_facto
     """
     
     # Load clean signals from HDF5 file
-    with h5py.File(clean_h5_path, 'r') as f_clean:
-        clean_data = f_clean['dataset'][:]  # Load the actual dataset
+    with io_accounting.open_h5(clean_h5_path, 'r') as f_clean:
+        clean_data = io_accounting.read(f_clean['dataset'])  # Load the actual dataset
         attrs = dict(f_clean['dataset'].attrs)  # Copy metadata attributes
 
     # Load interference signals from HDF5 file
-    with h5py.File(interf_h5_path, 'r') as f_interf:
-        interf_data = f_interf['dataset'][:]  # Load the actual dataset
+    with io_accounting.open_h5(interf_h5_path, 'r') as f_interf:
+        interf_data = io_accounting.read(f_interf['dataset'])  # Load the actual dataset
 
     # Determine number of channels (if multidimensional)
     clean_channels = clean_data.shape[1] if clean_data.ndim > 1 else 1
@@ -89,8 +89,8 @@ def create_interference_dataset(clean_h5_path, interf_h5_path, attenuation_facto
     output_path = base_name + '.h5'
 
     # Save the resulting dataset to a new HDF5 file, preserving metadata
-    with h5py.File(output_path, 'w') as f_out:
-        dset = f_out.create_dataset('dataset', data=result_data.astype('float32'))  # Store as float32
+    with io_accounting.open_h5(output_path, 'w') as f_out:
+        dset = io_accounting.create_dataset(f_out, 'dataset', data=result_data.astype('float32'))  # Store as float32
         for key, val in attrs.items():
             dset.attrs[key] = val  # Copy over original metadata
 
@@ -0,0 +1,370 @@
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import tempfile
+import contextlib
+import importlib.util
+import h5py
+import numpy as np
+import torch
+import torch.nn as nn
+from torch.utils.data import DataLoader, ConcatDataset
+from unet_model_pytorch import UNet1D  # Custom 1D U-Net model
+from unet_inference_pytorch import process_dataset
+from utils import HDF5Dataset, HDF5DenoisingDataset, get_matching_pairs, parse_cli_options
+
+# InterferenceDatasetGeneration has its own 'utils' module, loaded under another name
+_interference_utils_spec = importlib.util.spec_from_file_location(
+    "interference_utils", os.path.join(os.path.dirname(os.path.abspath(__file__)), '..',
+                                       'InterferenceDatasetGeneration', 'utils.py'))
+interference_utils = importlib.util.module_from_spec(_interference_utils_spec)
+_interference_utils_spec.loader.exec_module(interference_utils)
+
+# ==============================
+# Benchmark Scales
+# ==============================
+
+# Fixture sizes and model grids of each scale
+SCALES = {
+    "small": {"num_files": 3, "num_signals": 64, "signal_length": 2048, "batch_size": 8,
+              "lengths": [1024, 4096], "widths": [8, 16]},
+    "medium": {"num_files": 4, "num_signals": 256, "signal_length": 8192, "batch_size": 16,
+               "lengths": [2048, 8192, 32768], "widths": [16, 32]}
+}
+
+# Attenuation of the interference folder built by the mixing stage
+ATTENUATION = 0.5
+
+# ==============================
+# Synthetic Fixtures
+# ==============================
+
+def _write_signals(path, signals, frame_size=(50, 50)):
+    # Same layout as the MATLAB generator: 'dataset' [N, 2, L] float32 with a FrameSize attribute
+    with h5py.File(path, 'w') as f:
+        dataset = f.create_dataset('dataset', data=signals.astype(np.float32))
+        dataset.attrs['FrameSize'] = np.array(frame_size, dtype=np.float64)
+
+
+def make_fixtures(root, num_files=3, num_signals=64, signal_length=2048, seed=0):
+    """
+    Write synthetic datasets in the layout of the MATLAB generator.
+
+    `clean/` holds `num_files` QPSK-like datasets (`<name>.h5`, `<name>.json`, `bits_<name>.h5`)
+    and `interfering/` one wideband interferer with half the signal length, so that the mixing
+    stage has to repeat it.
+
+    Parameters:
+    -----------
+    root : str
+        Fixture directory (created).
+    num_files : int
+        Number of clean datasets.
+    num_signals : int
+        Signals per dataset.
+    signal_length : int
+        Samples per signal.
+    seed : int
+        Seed of the random signals.
+
+    Returns:
+    --------
+    dict
+        'clean_dir', 'interf_dir' and the list of 'clean_files'.
+    """
+    rng = np.random.default_rng(seed)
+    clean_dir = os.path.join(root, 'clean')
+    interf_dir = os.path.join(root, 'interfering')
+    os.makedirs(clean_dir, exist_ok=True)
+    os.makedirs(interf_dir, exist_ok=True)
+
+    clean_files = []
+    for i in range(num_files):
+        name = f"PSK_{i}"
+        bits = rng.integers(0, 2, (num_signals, 2 * signal_length), dtype=np.int8)
+        symbols = ((2 * bits[:, 0::2] - 1) + 1j * (2 * bits[:, 1::2] - 1)) / np.sqrt(2)
+        noisy = symbols + 0.05 * (rng.standard_normal(symbols.shape) + 1j * rng.standard_normal(symbols.shape))
+        path = os.path.join(clean_dir, name + '.h5')
+        _write_signals(path, np.stack([noisy.real, noisy.imag], axis=1))
+        with h5py.File(os.path.join(clean_dir, f"bits_{name}.h5"), 'w') as f:
+            f.create_dataset('dataset', data=bits)
+        with open(os.path.join(clean_dir, name + '.json'), 'w') as f:
+            json.dump({"type": "PSK", "modulation": "4-PSK", "fs": 1e6 * (i + 1), "oversamplingFactor": 1,
+                       "lengthBits": 2 * signal_length, "waveformLength": signal_length, "snr": 20}, f)
+        clean_files.append(path)
+
+    interference = rng.standard_normal((num_signals, 2, signal_length // 2))
+    _write_signals(os.path.join(interf_dir, 'wideband.h5'), interference)
+    with open(os.path.join(interf_dir, 'wideband.json'), 'w') as f:
+        json.dump({"type": "Noise", "fs": 1e6, "snr": 0}, f)
+
+    return {"clean_dir": clean_dir, "interf_dir": interf_dir, "clean_files": clean_files}
+
+# ==============================
+# Timing Helpers
+# ==============================
+
+def time_runs(function, runs=3, warmup=1):
+    """
+    Wall-clock times of `runs` calls of `function` after `warmup` untimed calls
+    (its printed output is discarded).
+
+    Returns:
+    --------
+    list of float
+        Seconds per call.
+    """
+    timings = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for run in range(warmup + runs):
+            start = time.perf_counter()
+            function()
+            if run >= warmup:
+                timings.append(time.perf_counter() - start)
+    return timings
+
+
+def stage_result(timings, items, unit):
+    """
+    Summary of a stage: median and minimum time, and throughput in `unit` per second.
+    """
+    median = float(np.median(timings))
+    return {"median_s": median, "min_s": float(np.min(timings)), "runs": len(timings),
+            "items": items, "unit": unit, "items_per_s": items / median if median > 0 else None}
+
+# ==============================
+# Benchmark Stages
+# ==============================
+
+def bench_mixing(fixtures, interference_dir, runs):
+    # create_interference_dataset on every clean file (one interference folder)
+    interf_file = os.path.join(fixtures["interf_dir"], 'wideband.h5')
+    os.makedirs(interference_dir, exist_ok=True)
+
+    def mix():
+        for clean_file in fixtures["clean_files"]:
+            base = os.path.splitext(os.path.basename(clean_file))[0]
+            interference_utils.create_interference_dataset(clean_file, interf_file, ATTENUATION,
+                                                           new_name=os.path.join(interference_dir, base))
+
+    timings = time_runs(mix, runs)
+    # Metadata next to the mixed files, as generate_interferences.py does (snr changed: matching must ignore it)
+    for clean_file in fixtures["clean_files"]:
+        with open(os.path.splitext(clean_file)[0] + '.json', 'r') as f:
+            metadata = json.load(f)
+        with open(os.path.join(interference_dir, os.path.basename(clean_file)[:-3] + '.json'), 'w') as f:
+            json.dump(dict(metadata, snr=5), f)
+    with h5py.File(fixtures["clean_files"][0], 'r') as f:
+        num_signals = f['dataset'].shape[0]
+    return stage_result(timings, num_signals * len(fixtures["clean_files"]), "signals")
+
+
+def bench_pair_matching(fixtures, interference_dir, runs):
+    timings = time_runs(lambda: get_matching_pairs(fixtures["clean_dir"], interference_dir), runs)
+    return stage_result(timings, len(fixtures["clean_files"]), "files")
+
+
+def bench_dataset_construction(pairs, runs):
+    timings = time_runs(lambda: [HDF5DenoisingDataset(interf, clean) for clean, interf in pairs], runs)
+    signal_timings = time_runs(lambda: [HDF5Dataset(clean) for clean, _ in pairs], runs)
+    num_signals = sum(len(HDF5Dataset(clean)) for clean, _ in pairs)
+    return {"denoising": stage_result(timings, num_signals, "signals"),
+            "autoencoder": stage_result(signal_timings, num_signals, "signals")}
+
+
+def bench_dataloader(pairs, batch_size, runs):
+    # One shuffled epoch over every pair, as in training
+    dataset = ConcatDataset([HDF5DenoisingDataset(interf, clean) for clean, interf in pairs])
+    loader = DataLoader(dataset, batch_size=batch_size, shuffle=True)
+
+    def epoch():
+        for interfered, clean in loader:
+            pass
+
+    return stage_result(time_runs(epoch, runs), len(dataset), "signals")
+
+
+def bench_unet(lengths, widths, batch_size, runs):
+    """
+    Forward (inference) and forward + backward (training step without optimizer) times of
+    UNet1D for every signal length and width (`k_neurons`).
+
+    Returns:
+    --------
+    dict
+        'forward.L<length>.w<width>' and 'backward.L<length>.w<width>' results.
+    """
+    results = {}
+    criterion = nn.MSELoss()
+    for width in widths:
+        torch.manual_seed(0)
+        model = UNet1D.from_config({"k_neurons": width})
+        for length in lengths:
+            x = torch.randn(batch_size, 2, length)
+
+            def forward():
+                with torch.no_grad():
+                    model(x)
+
+            def forward_backward():
+                model.zero_grad()
+                criterion(model(x), x).backward()
+
+            model.eval()
+            results[f"forward.L{length}.w{width}"] = stage_result(time_runs(forward, runs), batch_size, "signals")
+            model.train()
+            results[f"backward.L{length}.w{width}"] = stage_result(time_runs(forward_backward, runs),
+                                                                   batch_size, "signals")
+    return results
+
+
+def bench_file_inference(pairs, output_dir, width, batch_size, runs):
+    # process_dataset on every interfered file, with its reference (MSE and metrics on)
+    torch.manual_seed(0)
+    model = UNet1D.from_config({"k_neurons": width}).eval()
+    os.makedirs(output_dir, exist_ok=True)
+
+    def infer():
+        for clean, interf in pairs:
+            process_dataset(model, interf, os.path.join(output_dir, os.path.basename(interf)), clean,
+                            batch_size=batch_size)
+
+    num_signals = sum(len(HDF5Dataset(clean)) for clean, _ in pairs)
+    return stage_result(time_runs(infer, runs), num_signals, "signals")
+
+
+STAGES = ("mixing", "pair_matching", "dataset_construction", "dataloader", "unet", "file_inference")
+
+
+def run_benchmarks(scale="small", runs=3, stages=STAGES, work_dir=None, seed=0):
+    """
+    Build fixtures and time every stage of the generation, loading, model and inference paths.
+
+    Parameters:
+    -----------
+    scale : str
+        Key of `SCALES` (fixture size and model grid).
+    runs : int
+        Timed runs per stage (after one warm-up run).
+    stages : iterable of str
+        Stages to time (see `STAGES`). The mixing stage is always run because the later
+        stages read its output.
+    work_dir : str or None
+        Where the fixtures go (a temporary folder, removed at the end, by default).
+    seed : int
+        Seed of the fixtures.
+
+    Returns:
+    --------
+    dict
+        'environment', 'config' and 'results' (flat 'stage[.case]' keys, see `stage_result`).
+    """
+    config = dict(SCALES[scale], scale=scale, runs=runs, seed=seed)
+    root = work_dir or tempfile.mkdtemp(prefix='unet_bench_')
+    results = {}
+    try:
+        fixtures = make_fixtures(root, config["num_files"], config["num_signals"], config["signal_length"], seed)
+        interference_dir = os.path.join(root, 'interference', f"interference_wideband_{int(ATTENUATION * 100):03d}")
+
+        results["mixing"] = bench_mixing(fixtures, interference_dir, runs)
+        pairs = get_matching_pairs(fixtures["clean_dir"], interference_dir)
+        if "pair_matching" in stages:
+            results["pair_matching"] = bench_pair_matching(fixtures, interference_dir, runs)
+        if "dataset_construction" in stages:
+            for case, result in bench_dataset_construction(pairs, runs).items():
+                results[f"dataset_construction.{case}"] = result
+        if "dataloader" in stages:
+            results["dataloader"] = bench_dataloader(pairs, config["batch_size"], runs)
+        if "unet" in stages:
+            for case, result in bench_unet(config["lengths"], config["widths"], config["batch_size"], runs).items():
+                results[f"unet.{case}"] = result
+        if "file_inference" in stages:
+            results["file_inference"] = bench_file_inference(pairs, os.path.join(root, 'inference'),
+                                                             config["widths"][0], config["batch_size"], runs)
+    finally:
+        if work_dir is None:
+            shutil.rmtree(root, ignore_errors=True)
+
+    environment = {"python": platform.python_version(), "numpy": np.__version__, "torch": torch.__version__,
+                   "h5py": h5py.__version__, "platform": platform.platform(), "cpu_count": os.cpu_count(),
+                   "torch_threads": torch.get_num_threads(), "time": time.strftime("%Y-%m-%dT%H:%M:%S")}
+    return {"environment": environment, "config": config, "results": results}
+
+# ==============================
+# Comparing Runs
+# ==============================
+
+def compare_results(baseline, candidate, threshold=0.05):
+    """
+    Compare the median times of two benchmark runs, stage by stage.
+
+    Parameters:
+    -----------
+    baseline, candidate : dict
+        Outputs of `run_benchmarks` (or their JSON files, loaded).
+    threshold : float
+        Relative change below which a stage counts as unchanged.
+
+    Returns:
+    --------
+    list of dict
+        One row per stage present in both runs: times, ratio (candidate / baseline) and
+        'slower', 'faster' or 'same'.
+    """
+    rows = []
+    for stage, base in baseline["results"].items():
+        if stage not in candidate["results"]:
+            continue
+        new = candidate["results"][stage]
+        ratio = new["median_s"] / base["median_s"] if base["median_s"] > 0 else float('inf')
+        verdict = "slower" if ratio > 1 + threshold else "faster" if ratio < 1 - threshold else "same"
+        rows.append({"stage": stage, "baseline_s": base["median_s"], "candidate_s": new["median_s"],
+                     "ratio": ratio, "verdict": verdict})
+    return rows
+
+# ==============================
+# Script Entry Point
+# ==============================
+
+if __name__ == "__main__":
+    args, options = parse_cli_options(sys.argv[1:])
+    if not args or args[0] not in ("run", "compare") or (args[0] == "compare" and len(args) < 3):
+        print("Usage: python benchmark_suite.py run [--scale=small|medium] [--runs=3] [--stages=a,b,...] "
+              "[--work-dir=DIR] [--output=benchmark.json]\n"
+              "       python benchmark_suite.py compare <baseline.json> <candidate.json> [--threshold=0.05] "
+              "[--fail-on-regression]")
+        sys.exit(1)
+
+    if args[0] == "run":
+        stages = options['stages'].split(',') if 'stages' in options else STAGES
+        report = run_benchmarks(options.get('scale', 'small'), int(options.get('runs', 3)), stages,
+                                options.get('work_dir'))
+        for stage, result in report["results"].items():
+            print(f"  → {stage:<36} {result['median_s'] * 1e3:10.2f} ms "
+                  f"({result['items_per_s']:.1f} {result['unit']}/s)")
+        output = options.get('output', 'benchmark.json')
+        with open(output, 'w') as f:
+            json.dump(report, f, indent=4)
+        print(f"\n Results saved in: {output}")
+
+    else:
+        with open(args[1], 'r') as f:
+            baseline = json.load(f)
+        with open(args[2], 'r') as f:
+            candidate = json.load(f)
+        if baseline["config"] != candidate["config"]:
+            print(f"[!] The runs used different configurations: {baseline['config']} vs {candidate['config']}")
+
+        rows = compare_results(baseline, candidate, float(options.get('threshold', 0.05)))
+        for row in rows:
+            print(f"  {row['stage']:<36} {row['baseline_s'] * 1e3:10.2f} ms → {row['candidate_s'] * 1e3:10.2f} ms "
+                  f"(x{row['ratio']:.2f}) {row['verdict']}")
+        slower = [row["stage"] for row in rows if row["verdict"] == "slower"]
+        print(f"\n {len(slower)} slower, {sum(row['verdict'] == 'faster' for row in rows)} faster, "
+              f"{sum(row['verdict'] == 'same' for row in rows)} unchanged")
+        if slower and options.get('fail_on_regression') == 'true':
+            sys.exit(1)
@@ -0,0 +1,393 @@
+import os
+import sys
+import json
+import h5py
+import numpy as np
+from signal_metrics import parse_interference_folder
+from file_utils import parse_cli_options
+
+# ==============================
+# Symbol Demappers
+# ==============================
+
+# Chips of the 11-chip Barker code used by the 1 and 2 Mbps DSSS modes (DSSS_mod.m)
+BARKER_11 = np.array([1, 1, 1, -1, 1, 1, -1, 1, 1, -1, -1], dtype=np.float32)
+
+# Order and phase offset of the OFDM subcarrier modulations (OFDM_mod.m); the others are QAM
+OFDM_PSK = {"BPSK": (2, 0.0), "QPSK": (4, np.pi / 4)}
+
+
+def gray_code(values):
+    """
+    Binary-reflected Gray code of non-negative integers (vectorized).
+    """
+    return values ^ (values >> 1)
+
+
+def int_to_bits(values, bits_per_symbol):
+    """
+    Split integers [..., S] into their bits, most significant first (MATLAB `int2bit`).
+
+    Returns:
+    --------
+    np.ndarray
+        int8 bits of shape [..., S * bits_per_symbol].
+    """
+    shifts = np.arange(bits_per_symbol - 1, -1, -1)
+    bits = (values[..., np.newaxis] >> shifts) & 1
+    return bits.reshape(*values.shape[:-1], -1).astype(np.int8)
+
+
+def psk_demap(symbols, order, phase_offset):
+    """
+    Hard-decision Gray PSK demapping (MATLAB `pskdemod(..., 'gray')` followed by `int2bit`).
+
+    Parameters:
+    -----------
+    symbols : np.ndarray
+        Complex symbols [N, S].
+    order : int
+        Modulation order M.
+    phase_offset : float
+        Phase of the first constellation point, in radians.
+
+    Returns:
+    --------
+    np.ndarray
+        Bits [N, S * log2(M)].
+    """
+    positions = np.round((np.angle(symbols) - phase_offset) * order / (2 * np.pi)).astype(np.int64) % order
+    return int_to_bits(gray_code(positions), int(np.log2(order)))
+
+
+def qam_demap(symbols, order):
+    """
+    Hard-decision Gray square-QAM demapping with unit average power
+    (MATLAB `qamdemod(..., 'gray', 'OutputType', 'bit', 'UnitAveragePower', true)`).
+
+    Points are numbered column by column from the top-left corner: the in-phase level
+    gives the most significant half of the bits and the quadrature level the other half,
+    each Gray coded.
+
+    Parameters:
+    -----------
+    symbols : np.ndarray
+        Complex symbols [N, S].
+    order : int
+        Modulation order M (a power of 4).
+
+    Returns:
+    --------
+    np.ndarray
+        Bits [N, S * log2(M)].
+    """
+    bits_per_symbol = int(np.log2(order))
+    side = int(round(np.sqrt(order)))
+    if side * side != order:
+        raise ValueError(f"Only square QAM constellations are supported (M = {order})")
+
+    scaled = symbols * np.sqrt(2 * (order - 1) / 3)  # Back to the odd-integer grid
+    column = np.clip(np.round((scaled.real + side - 1) / 2), 0, side - 1).astype(np.int64)
+    row = np.clip(np.round((side - 1 - scaled.imag) / 2), 0, side - 1).astype(np.int64)
+    values = (gray_code(column) << (bits_per_symbol // 2)) | gray_code(row)
+    return int_to_bits(values, bits_per_symbol)
+
+# ==============================
+# Batched Demodulation
+# ==============================
+
+def ofdm_data_symbols(waveforms, fft_length, cp_length, num_symbols, guard_bands=(6, 5), dc_null=True):
+    """
+    Data subcarriers of every OFDM symbol of a batch, with a single batched FFT
+    (MATLAB `comm.OFDMDemodulator`).
+
+    The waveforms are cut into [N, OFDM symbols, fft_length + cp_length] blocks, the
+    cyclic prefix is dropped and the spectra are centered (subcarrier -fft_length / 2 first),
+    as the modulator maps its input.
+
+    Parameters:
+    -----------
+    waveforms : np.ndarray
+        Complex waveforms [N, L].
+    fft_length, cp_length, num_symbols : int
+        OFDM parameters of the metadata (`num_symbols` is per block; L may hold several blocks).
+    guard_bands : tuple
+        Guard subcarriers at the lower and upper edge.
+    dc_null : bool
+        Whether the DC subcarrier is nulled.
+
+    Returns:
+    --------
+    np.ndarray
+        Data symbols [N, OFDM symbols * data subcarriers], subcarrier after subcarrier,
+        symbol after symbol (the order of the modulator's input).
+    """
+    symbol_length = fft_length + cp_length
+    total_symbols = (waveforms.shape[1] // (symbol_length * num_symbols)) * num_symbols  # Whole blocks only
+    blocks = waveforms[:, :total_symbols * symbol_length].reshape(waveforms.shape[0], total_symbols, symbol_length)
+    spectra = np.fft.fftshift(np.fft.fft(blocks[:, :, cp_length:], axis=-1), axes=-1)
+
+    carriers = np.arange(guard_bands[0], fft_length - guard_bands[1])
+    if dc_null:
+        carriers = carriers[carriers != fft_length // 2]
+    return spectra[:, :, carriers].reshape(waveforms.shape[0], -1)
+
+
+def dsss_barker_bits(waveforms, data_rate):
+    """
+    Despread 1 Mbps (BPSK) or 2 Mbps (QPSK) DSSS waveforms with the Barker code, one matrix
+    product for the whole batch, and take hard decisions.
+
+    DSSS_mod.m spreads the conjugate of the symbols (MATLAB `'`), so at 2 Mbps the
+    quadrature bit is 1 when the despread symbol has a negative imaginary part.
+
+    Returns:
+    --------
+    np.ndarray
+        Bits [N, symbols] (1 Mbps) or [N, 2 * symbols] (2 Mbps, I bit then Q bit).
+    """
+    chips = len(BARKER_11)
+    num_symbols = waveforms.shape[1] // chips
+    symbols = waveforms[:, :num_symbols * chips].reshape(waveforms.shape[0], num_symbols, chips) @ BARKER_11 / chips
+    if data_rate == '1Mbps':
+        return (symbols.real > 0).astype(np.int8)
+    return np.stack([symbols.real > 0, symbols.imag < 0], axis=-1).reshape(waveforms.shape[0], -1).astype(np.int8)
+
+
+def demodulation_scheme(metadata):
+    """
+    Describe how to demodulate a dataset from its JSON metadata.
+
+    Parameters:
+    -----------
+    metadata : dict
+        Contents of `<name>.json` (see the MATLAB `*_mod.m` functions).
+
+    Returns:
+    --------
+    str
+        'PSK', 'QAM', 'OFDM' or 'DSSS'.
+
+    Raises:
+    -------
+    ValueError
+        If the modulation has no Python demodulator (Bluetooth, WiFi, 5G NR and CCK use
+        MATLAB toolbox waveforms and are only demodulated in MATLAB).
+    """
+    scheme = metadata.get("type")
+    if scheme in ("PSK", "QAM", "OFDM"):
+        return scheme
+    if scheme == "DSSS" and metadata.get("DSSS") in ("1Mbps", "2Mbps"):
+        return scheme
+    raise ValueError(f"No Python demodulator for {scheme} ({metadata.get('modulation')})")
+
+
+def demodulate(waveforms, metadata):
+    """
+    Hard-decision bits of a batch of waveforms, for the modulations the metadata describes.
+
+    Parameters:
+    -----------
+    waveforms : np.ndarray
+        Complex waveforms [N, L].
+    metadata : dict
+        Contents of `<name>.json`.
+
+    Returns:
+    --------
+    np.ndarray
+        int8 bits [N, B], in the order of the transmitted bits.
+    """
+    scheme = demodulation_scheme(metadata)
+    if scheme == "PSK":
+        order = int(metadata["modulation"].split('-')[0])  # e.g. '8-PSK'
+        return psk_demap(waveforms, order, np.pi / order)
+    if scheme == "QAM":
+        return qam_demap(waveforms, int(metadata["modulation"].split('-')[0]))  # e.g. '16-QAM'
+    if scheme == "DSSS":
+        return dsss_barker_bits(waveforms, metadata["DSSS"])
+
+    symbols = ofdm_data_symbols(waveforms, metadata["FFTLength"], metadata["cyclicPrefixLength"],
+                                metadata["numSymbols"], tuple(metadata.get("guardBandCarriers", (6, 5))),
+                                bool(metadata.get("DCnull", True)))
+    modulation = metadata["modulation"]
+    if modulation in OFDM_PSK:
+        return psk_demap(symbols, *OFDM_PSK[modulation])
+    return qam_demap(symbols, int(modulation.split('QAM')[0]))  # e.g. '16QAM'
+
+# ==============================
+# Bit Error Rate
+# ==============================
+
+class BitErrorCounter:
+    """
+    Batch-incremental per-signal bit error counts for one file.
+
+    Each `update` demodulates a batch of I/Q signals and compares it with the transmitted
+    bits of the same rows, up to the shorter of the two bit streams.
+    """
+    def __init__(self, metadata):
+        self.metadata = metadata
+        self.errors = []
+        self.bits = []
+
+    def update(self, signals, bits):
+        demodulated = demodulate(signals[:, 0] + 1j * signals[:, 1], self.metadata)
+        length = min(demodulated.shape[1], bits.shape[1], int(self.metadata.get("lengthBits", bits.shape[1])))
+        self.errors.append(np.count_nonzero(demodulated[:, :length] != bits[:, :length], axis=1))
+        self.bits.append(np.full(len(bits), length))
+
+    def table(self):
+        """
+        Per-signal table: 'bit_errors', 'bits' and 'ber'.
+        """
+        errors = np.concatenate(self.errors) if self.errors else np.empty(0, dtype=np.int64)
+        bits = np.concatenate(self.bits) if self.bits else np.empty(0, dtype=np.int64)
+        return {"bit_errors": errors, "bits": bits, "ber": errors / np.maximum(bits, 1)}
+
+    @property
+    def ber(self):
+        """
+        Bit error rate over every bit of every signal seen so far (None before the first update).
+        """
+        table = self.table()
+        return float(table["bit_errors"].sum() / table["bits"].sum()) if table["bits"].sum() else None
+
+
+def file_bit_errors(signals_path, bits_path, metadata, batch_size=64):
+    """
+    Per-signal bit errors of one signals file against its `bits_<name>.h5`, batch by batch.
+
+    Parameters:
+    -----------
+    signals_path : str
+        Signals file ('dataset' key, [N, 2, L]).
+    bits_path : str
+        Transmitted bits file ('dataset' key, [N, B]).
+    metadata : dict
+        Contents of `<name>.json`.
+    batch_size : int
+        Number of signals demodulated at a time.
+
+    Returns:
+    --------
+    dict
+        Per-signal table (see `BitErrorCounter.table`).
+    """
+    counter = BitErrorCounter(metadata)
+    with h5py.File(signals_path, 'r') as f_signals, h5py.File(bits_path, 'r') as f_bits:
+        signals, bits = f_signals['dataset'], f_bits['dataset']
+        num_signals = min(signals.shape[0], bits.shape[0])
+        for start in range(0, num_signals, batch_size):
+            stop = min(start + batch_size, num_signals)
+            counter.update(signals[start:stop], bits[start:stop])
+    return counter.table()
+
+
+def _find_metadata_files(job):
+    # The .json and bits_*.h5 copied next to the output, or the ones next to the input
+    base_name = os.path.splitext(job["file"])[0]
+    for folder in (job["target_dir"], job["source_dir"]):
+        json_path = os.path.join(folder, base_name + '.json')
+        bits_path = os.path.join(folder, f"bits_{base_name}.h5")
+        if os.path.exists(json_path) and os.path.exists(bits_path):
+            return json_path, bits_path
+    return None, None
+
+
+def evaluate_ber(jobs, batch_size=64, include_input=True):
+    """
+    BER of the output (and input) of every inference job whose metadata and transmitted
+    bits are available and whose modulation has a Python demodulator.
+
+    Parameters:
+    -----------
+    jobs : list of dict
+        Entries of `collect_inference_jobs` (outputs already written).
+    batch_size : int
+        Number of signals demodulated at a time.
+    include_input : bool
+        Also measure the BER of the interfered input, as a baseline.
+
+    Returns:
+    --------
+    dict
+        {folder: {file: {'ber', 'input_ber', 'bit_errors', 'input_bit_errors', 'bits', 'signals'}}}.
+    """
+    results = {}
+    for job in jobs:
+        json_path, bits_path = _find_metadata_files(job)
+        if json_path is None:
+            continue
+        with open(json_path, 'r') as f:
+            metadata = json.load(f)
+        try:
+            demodulation_scheme(metadata)
+        except ValueError as error:
+            print(f"  [!] BER skipped for {job['file']}: {error}")
+            continue
+
+        output = file_bit_errors(job["output_path"], bits_path, metadata, batch_size)
+        result = {"ber": float(output["bit_errors"].sum() / max(output["bits"].sum(), 1)),
+                  "bit_errors": int(output["bit_errors"].sum()),
+                  "bits": int(output["bits"].sum()),
+                  "signals": int(len(output["bits"]))}
+        if include_input and job["input_path"] != job["output_path"]:
+            interfered = file_bit_errors(job["input_path"], bits_path, metadata, batch_size)
+            result["input_ber"] = float(interfered["bit_errors"].sum() / max(interfered["bits"].sum(), 1))
+            result["input_bit_errors"] = int(interfered["bit_errors"].sum())
+
+        results.setdefault(job["group"], {})[job["file"]] = result
+        print(f"  → BER ({os.path.join(job['group'], job['file'])}): {result['ber']:.2e}"
+              + (f" (input {result['input_ber']:.2e})" if "input_ber" in result else ""))
+    return results
+
+
+def save_ber_results(results, output_dir):
+    """
+    Write `ber_results.json`: per-file BER and the BER of every folder (all its bits pooled),
+    with the interferer and attenuation parsed from the folder name.
+
+    Returns:
+    --------
+    dict
+        The summary written to the file.
+    """
+    summary = {}
+    for group, files in results.items():
+        bits = sum(result["bits"] for result in files.values())
+        folder = dict(parse_interference_folder(group), per_file=files,
+                      ber=sum(result["bit_errors"] for result in files.values()) / max(bits, 1))
+        if all("input_bit_errors" in result for result in files.values()):
+            folder["input_ber"] = sum(result["input_bit_errors"] for result in files.values()) / max(bits, 1)
+        summary[group] = folder
+
+    with open(os.path.join(output_dir, 'ber_results.json'), 'w') as f:
+        json.dump(summary, f, indent=4)
+    return summary
+
+# ==============================
+# Script Entry Point
+# ==============================
+
+if __name__ == "__main__":
+    args, options = parse_cli_options(sys.argv[1:])
+    if len(args) < 1:
+        print("Usage: python ber_metrics.py <signals_dir> [--output=DIR] [--batch-size=64]")
+        sys.exit(1)
+
+    from unet_inference_pytorch import collect_inference_jobs
+
+    # Score the files of a folder (a dataset or an '_inference' output folder). The results go
+    # to a '<signals_dir>_ber' sibling: any extra .json inside a dataset folder would be taken
+    # for signal metadata by get_matching_pairs
+    signals_dir = args[0].rstrip('/')
+    output_dir = options.get('output') or signals_dir + '_ber'
+    jobs = collect_inference_jobs(signals_dir, signals_dir, create_dirs=False)  # Scores the files themselves
+    results = evaluate_ber(jobs, batch_size=int(options.get('batch_size', 64)), include_input=False)
+    if results:
+        os.makedirs(output_dir, exist_ok=True)
+        summary = save_ber_results(results, output_dir)
+        for group, folder in summary.items():
+            print(f"{group}: BER {folder['ber']:.2e}")
+        print(f"\n BER results saved in: {os.path.join(output_dir, 'ber_results.json')}")
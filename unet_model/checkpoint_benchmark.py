@@ -0,0 +1,225 @@
+import sys
+import json
+import time
+import resource
+import multiprocessing
+import numpy as np
+import torch
+import torch.nn as nn
+from unet_model_pytorch import UNet1D  # Custom 1D U-Net model
+from model_profiler import build_model
+from utils import parse_cli_options
+
+# ==============================
+# Checkpointing Settings
+# ==============================
+
+def checkpoint_settings(depth):
+    """
+    Activation checkpointing settings compared by the benchmark, from none to every block.
+
+    Parameters:
+    -----------
+    depth : int
+        Number of encoder (and decoder) blocks of the model.
+
+    Returns:
+    --------
+    dict
+        Setting name -> {'checkpoint_encoders': [...], 'checkpoint_decoders': [...]}.
+    """
+    blocks = list(range(depth))
+    return {
+        "none": {"checkpoint_encoders": [], "checkpoint_decoders": []},
+        "first_encoder": {"checkpoint_encoders": [0], "checkpoint_decoders": []},
+        "full_resolution": {"checkpoint_encoders": [0], "checkpoint_decoders": [depth - 1]},
+        "outer_two": {"checkpoint_encoders": blocks[:2], "checkpoint_decoders": blocks[-2:]},
+        "all": {"checkpoint_encoders": blocks, "checkpoint_decoders": blocks}
+    }
+
+# ==============================
+# Training Step Measurements
+# ==============================
+
+def _train_step(model, optimizer, x, target):
+    optimizer.zero_grad()
+    loss = nn.functional.mse_loss(model(x), target)
+    loss.backward()
+    optimizer.step()
+
+
+def measure_training_step(config, setting, signal_length, batch_size, device, n_runs=5, warmup=1):
+    """
+    Median time and peak memory of one training step (forward, backward and Adam update).
+
+    On CUDA the peak is the allocator high-water mark of the step. On CPU it is the growth
+    of the process peak resident memory, so this function should run in a fresh process
+    (see `benchmark_checkpointing`).
+
+    Parameters:
+    -----------
+    config : dict
+        Architecture configuration of the model.
+    setting : dict
+        'checkpoint_encoders' and 'checkpoint_decoders' block indices.
+    signal_length : int
+        Signal length L of the training batch (a multiple of 2 ** depth).
+    batch_size : int
+        Number of signals per training step.
+    device : str
+        'cpu' or 'cuda'.
+    n_runs : int
+        Number of timed training steps.
+    warmup : int
+        Number of untimed steps run first.
+
+    Returns:
+    --------
+    dict
+        'step_time_ms' and 'peak_memory_mb'.
+    """
+    torch.manual_seed(0)
+    model = UNet1D.from_config(dict(config, **setting)).to(device).train()
+    optimizer = torch.optim.Adam(model.parameters(), lr=1e-3)
+    x = torch.randn(batch_size, config["input_channels"], signal_length, device=device)
+    target = torch.randn(batch_size, config["output_channels"], signal_length, device=device)
+
+    if device == "cuda":
+        torch.cuda.synchronize()
+        torch.cuda.reset_peak_memory_stats()
+        baseline = torch.cuda.memory_allocated()
+    else:
+        baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024  # Linux reports KiB
+
+    timings = []
+    for run in range(warmup + n_runs):
+        if device == "cuda":
+            torch.cuda.synchronize()
+        start = time.perf_counter()
+        _train_step(model, optimizer, x, target)
+        if device == "cuda":
+            torch.cuda.synchronize()
+        if run >= warmup:
+            timings.append(time.perf_counter() - start)
+
+    if device == "cuda":
+        peak = torch.cuda.max_memory_allocated() - baseline
+    else:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024 - baseline
+
+    return {"step_time_ms": float(np.median(timings)) * 1e3, "peak_memory_mb": peak / 2**20}
+
+
+def _measure_in_child(arguments):
+    return measure_training_step(*arguments)
+
+
+def check_gradients(config, setting, signal_length=1024, batch_size=2, seed=0):
+    """
+    Maximum absolute difference between the gradients with and without checkpointing.
+
+    Parameters:
+    -----------
+    config : dict
+        Architecture configuration of the model.
+    setting : dict
+        Checkpointing setting to compare with the plain model.
+    signal_length : int
+        Signal length of the random batch.
+    batch_size : int
+        Number of signals of the random batch.
+    seed : int
+        Seed of the weights, the batch and the dropout masks.
+
+    Returns:
+    --------
+    float
+        Largest gradient difference over all parameters.
+    """
+    torch.manual_seed(seed)
+    model = UNet1D.from_config(config).train()
+    x = torch.randn(batch_size, config["input_channels"], signal_length)
+
+    gradients = []
+    for blocks in ({"encoders": [], "decoders": []},
+                   {"encoders": setting["checkpoint_encoders"], "decoders": setting["checkpoint_decoders"]}):
+        model.set_checkpointing(**blocks)
+        model.zero_grad()
+        torch.manual_seed(seed + 1)  # Same dropout masks in both passes
+        model(x).square().mean().backward()
+        gradients.append([p.grad.clone() for p in model.parameters()])
+
+    return max(float((a - b).abs().max()) for a, b in zip(*gradients))
+
+
+def benchmark_checkpointing(config, signal_length, batch_size, device="cpu", n_runs=5):
+    """
+    Compare peak memory and step time of every checkpointing setting.
+
+    On CPU each setting is measured in its own process so that the peak resident memory
+    of one setting does not hide the next one.
+
+    Parameters:
+    -----------
+    config : dict
+        Architecture configuration of the model.
+    signal_length : int
+        Signal length L of the training batch.
+    batch_size : int
+        Number of signals per training step.
+    device : str
+        'cpu' or 'cuda'.
+    n_runs : int
+        Number of timed training steps per setting.
+
+    Returns:
+    --------
+    dict
+        Setting name -> blocks, 'step_time_ms' and 'peak_memory_mb'.
+    """
+    results = {}
+    for name, setting in checkpoint_settings(len(config["k_list"])).items():
+        arguments = (config, setting, signal_length, batch_size, device, n_runs)
+        if device == "cuda":
+            measured = measure_training_step(*arguments)
+        else:
+            with multiprocessing.get_context("spawn").Pool(1) as pool:
+                measured = pool.apply(_measure_in_child, (arguments,))
+        results[name] = dict(setting, **measured)
+    return results
+
+# ==============================
+# Script Entry Point
+# ==============================
+
+if __name__ == "__main__":
+    args, options = parse_cli_options(sys.argv[1:])
+    if len(args) < 2:
+        print("Usage: python checkpoint_benchmark.py <default | arch_config.json | model.pth> <signal_length> "
+              "[--batch-size=8] [--runs=5] [--device=cpu|cuda] [--output=results.json]")
+        sys.exit(1)
+
+    config = build_model(args[0]).config
+    config.update(checkpoint_encoders=[], checkpoint_decoders=[])
+    signal_length = int(args[1])
+    batch_size = int(options.get('batch_size', 8))
+    device = options.get('device', 'cuda' if torch.cuda.is_available() else 'cpu')
+
+    # Checkpointing must not change the gradients
+    for name, setting in checkpoint_settings(len(config["k_list"])).items():
+        difference = check_gradients(config, setting)
+        assert difference <= 1e-5, f"Gradients differ with checkpointing setting '{name}' ({difference:.2e})"
+
+    results = benchmark_checkpointing(config, signal_length, batch_size, device, int(options.get('runs', 5)))
+    reference = results["none"]
+
+    print(f"Training step [{batch_size}, {config['input_channels']}, {signal_length}] on {device}")
+    for name, result in results.items():
+        print(f"  → {name:<16} peak {result['peak_memory_mb']:8.1f} MB "
+              f"(x{result['peak_memory_mb'] / max(reference['peak_memory_mb'], 1e-9):.2f}) | "
+              f"step {result['step_time_ms']:8.1f} ms (x{result['step_time_ms'] / reference['step_time_ms']:.2f})")
+
+    if 'output' in options:
+        with open(options['output'], 'w') as f:
+            json.dump(results, f, indent=4)
+        print(f"\n Results saved in: {options['output']}")
@@ -0,0 +1,85 @@
+import io
+import sys
+import json
+import time
+import urllib.request
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from file_utils import parse_cli_options
+
+# ==============================
+# Load-Test Client
+# ==============================
+
+def denoise_request(url, signal):
+    """
+    Send one signal of shape [2, L] to the denoising service and return the cleaned signal.
+    """
+    body = io.BytesIO()
+    np.save(body, signal.astype(np.float32))
+    request = urllib.request.Request(url + "/denoise", data=body.getvalue(), method="POST",
+                                     headers={"Content-Type": "application/octet-stream"})
+    with urllib.request.urlopen(request) as response:
+        return np.load(io.BytesIO(response.read()))
+
+
+def run_load_test(url, num_requests=200, concurrency=16, signal_length=1024, seed=0):
+    """
+    Fire concurrent single-signal requests at the service and measure client-side latency.
+
+    Parameters:
+    -----------
+    url : str
+        Base URL of the service (e.g. 'http://127.0.0.1:8765').
+    num_requests : int
+        Total number of requests.
+    concurrency : int
+        Number of requests in flight at the same time.
+    signal_length : int
+        Length L of the random [2, L] signals.
+    seed : int
+        Seed of the random signals.
+
+    Returns:
+    --------
+    dict
+        Client-side throughput and latency percentiles, plus the server's own statistics.
+    """
+    rng = np.random.default_rng(seed)
+    signals = rng.standard_normal((num_requests, 2, signal_length)).astype(np.float32)
+
+    def timed_request(signal):
+        start = time.perf_counter()
+        cleaned = denoise_request(url, signal)
+        assert cleaned.shape == signal.shape, "Unexpected response shape"
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = np.array(list(pool.map(timed_request, signals))) * 1e3
+    elapsed = time.perf_counter() - start
+
+    with urllib.request.urlopen(url + "/stats") as response:
+        server_stats = json.loads(response.read())
+
+    return {
+        "requests": num_requests,
+        "concurrency": concurrency,
+        "signal_length": signal_length,
+        "requests_per_second": num_requests / elapsed,
+        "latency_ms": {f"p{p}": float(np.percentile(latencies, p)) for p in (50, 90, 95, 99)},
+        "server": server_stats
+    }
+
+# ==============================
+# Script Entry Point
+# ==============================
+
+if __name__ == "__main__":
+    # Usage: python denoise_load_test.py [--url=http://127.0.0.1:8765] [--requests=200] [--concurrency=16] [--length=1024]
+    _, options = parse_cli_options(sys.argv[1:])
+    report = run_load_test(options.get('url', 'http://127.0.0.1:8765'),
+                           num_requests=int(options.get('requests', 200)),
+                           concurrency=int(options.get('concurrency', 16)),
+                           signal_length=int(options.get('length', 1024)))
+    print(json.dumps(report, indent=4))
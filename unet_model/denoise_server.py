@@ -0,0 +1,225 @@
+import io
+import sys
+import json
+import time
+import queue
+import threading
+import numpy as np
+import torch
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unet_inference_pytorch import load_model, run_model, model_device
+from utils import parse_cli_options
+
+# ==============================
+# Dynamic Request Batching
+# ==============================
+
+class DynamicBatcher:
+    """
+    Coalesce concurrent single-signal requests into batched model calls.
+
+    A worker thread takes the first pending request, then keeps collecting requests until
+    `max_batch_size` is reached or `max_delay` seconds have passed since that first request.
+    The collected requests are grouped by signal shape (so every signal gets exactly the
+    output it would get alone, and a malformed signal never fails the requests of others)
+    and each group runs as one forward pass.
+
+    Parameters:
+    -----------
+    model : torch.nn.Module
+        Loaded model (see `unet_inference_pytorch.load_model`).
+    max_batch_size : int
+        Maximum number of signals per batch.
+    max_delay : float
+        Maximum time, in seconds, that the first request of a batch waits for others.
+    history : int
+        Number of recent requests kept for the latency statistics.
+    """
+    def __init__(self, model, max_batch_size=16, max_delay=0.005, history=10000):
+        self.model = model
+        self.input_channels = getattr(model, 'config', {}).get('input_channels', 2)
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self.requests = queue.Queue()
+        self.latencies = deque(maxlen=history)  # End-to-end seconds per request
+        self.batch_sizes = deque(maxlen=history)
+        self.completed = 0
+        self.lock = threading.Lock()
+        self.worker = threading.Thread(target=self._run, daemon=True)
+        self.worker.start()
+
+    def submit(self, signal):
+        """
+        Queue one signal of shape [2, L] and return a Future with the cleaned signal.
+        """
+        future = Future()
+        self.requests.put((np.asarray(signal, dtype=np.float32), future, time.perf_counter()))
+        return future
+
+    def _collect(self):
+        batch = [self.requests.get()]
+        deadline = time.perf_counter() + self.max_delay
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.requests.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            by_shape = {}
+            for item in batch:
+                by_shape.setdefault(item[0].shape, []).append(item)
+
+            for items in by_shape.values():
+                try:
+                    signals = torch.from_numpy(np.stack([signal for signal, _, _ in items]))
+                    cleaned = run_model(self.model, signals.to(model_device(self.model))).cpu().numpy()
+                    results = list(cleaned)
+                except Exception as error:  # Report the failure to every waiting request
+                    results = [error] * len(items)
+
+                done = time.perf_counter()
+                with self.lock:
+                    self.batch_sizes.append(len(items))
+                    for (_, future, queued_at), result in zip(items, results):
+                        self.latencies.append(done - queued_at)
+                        self.completed += 1
+                for (_, future, _), result in zip(items, results):
+                    if isinstance(result, Exception):
+                        future.set_exception(result)
+                    else:
+                        future.set_result(result)
+
+    def stats(self):
+        """
+        Current queue depth, batch sizes and latency percentiles (milliseconds).
+        """
+        with self.lock:
+            latencies = np.array(self.latencies) * 1e3
+            batch_sizes = np.array(self.batch_sizes)
+            completed = self.completed
+        stats = {
+            "queue_depth": self.requests.qsize(),
+            "completed_requests": completed,
+            "max_batch_size": self.max_batch_size,
+            "max_delay_ms": self.max_delay * 1e3
+        }
+        if latencies.size:
+            stats.update({
+                "latency_ms": {f"p{p}": float(np.percentile(latencies, p)) for p in (50, 90, 95, 99)},
+                "mean_batch_size": float(batch_sizes.mean())
+            })
+        return stats
+
+# ==============================
+# Local HTTP Service
+# ==============================
+
+def make_handler(batcher):
+    """
+    Build the HTTP request handler bound to a batcher.
+
+    Endpoints:
+    - POST /denoise: body is a .npy array of shape [2, L] or [N, 2, L] (float32);
+      the response is the cleaned array in the same format.
+    - GET /stats: JSON with queue depth, batch sizes and latency percentiles.
+    - GET /health: 'ok'.
+    """
+    class DenoiseHandler(BaseHTTPRequestHandler):
+        def _reply(self, code, body, content_type):
+            self.send_response(code)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/stats":
+                self._reply(200, json.dumps(batcher.stats()).encode(), "application/json")
+            elif self.path == "/health":
+                self._reply(200, b"ok", "text/plain")
+            else:
+                self._reply(404, b"not found", "text/plain")
+
+        def do_POST(self):
+            if self.path != "/denoise":
+                self._reply(404, b"not found", "text/plain")
+                return
+            try:
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                signals = np.load(io.BytesIO(body), allow_pickle=False)
+                single = signals.ndim == 2
+                if single:
+                    signals = signals[None]
+                if signals.ndim != 3 or signals.shape[1] != batcher.input_channels:
+                    raise ValueError(f"expected an array of shape [{batcher.input_channels}, L] "
+                                     f"or [N, {batcher.input_channels}, L], got {list(signals.shape)}")
+
+                # Each signal is an independent request for the batcher
+                futures = [batcher.submit(signal) for signal in signals]
+                cleaned = np.stack([future.result() for future in futures])
+                output = io.BytesIO()
+                np.save(output, cleaned[0] if single else cleaned)
+                self._reply(200, output.getvalue(), "application/octet-stream")
+            except Exception as error:
+                self._reply(400, str(error).encode(), "text/plain")
+
+        def log_message(self, format, *args):
+            pass  # One line per request would flood the console under load
+
+    return DenoiseHandler
+
+
+def serve(model_path, port=8765, max_batch_size=16, max_delay=0.005, backend='torch'):
+    """
+    Load a model once and serve denoising requests on localhost until interrupted.
+
+    Parameters:
+    -----------
+    model_path : str
+        Path to the model checkpoint (.pth) or exported model (.onnx with the 'onnx' backend).
+    port : int
+        Localhost TCP port.
+    max_batch_size : int
+        Maximum number of signals per batch.
+    max_delay : float
+        Maximum queueing delay, in seconds, before a partial batch is run.
+    backend : str
+        'torch' or 'onnx' (see `unet_inference_pytorch.load_model`).
+    """
+    model = load_model(model_path, backend=backend)
+    batcher = DynamicBatcher(model, max_batch_size, max_delay)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(batcher))
+    print(f"Denoising service listening on http://127.0.0.1:{port} "
+          f"(max batch {max_batch_size}, max delay {max_delay * 1e3:.1f} ms)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down.")
+        print(json.dumps(batcher.stats(), indent=4))
+    finally:
+        server.server_close()
+
+# ==============================
+# Script Entry Point
+# ==============================
+
+if __name__ == "__main__":
+    args, options = parse_cli_options(sys.argv[1:])
+    if len(args) < 1:
+        print("Usage: python denoise_server.py <model_path> [--port=8765] [--max-batch=16] [--max-delay-ms=5] [--backend=torch|onnx]")
+        sys.exit(1)
+
+    serve(args[0],
+          port=int(options.get('port', 8765)),
+          max_batch_size=int(options.get('max_batch', 16)),
+          max_delay=float(options.get('max_delay_ms', 5)) / 1e3,
+          backend=options.get('backend', 'torch'))
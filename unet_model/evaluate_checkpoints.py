@@ -0,0 +1,224 @@
+import os
+import sys
+import json
+import h5py
+import numpy as np
+from contextlib import ExitStack
+from concurrent.futures import ThreadPoolExecutor
+from unet_inference_pytorch import load_model, infer_batch, collect_inference_jobs, read_batch
+from unet_inference_pytorch import torch  # None when only the ONNX backend is available
+from signal_metrics import SignalMetrics, METRIC_COLUMNS, parse_interference_folder, summarize_table, save_metric_tables
+from utils import parse_cli_options, copy_metadata_files
+
+# ==============================
+# Multi-Checkpoint Evaluation
+# ==============================
+
+def model_names(model_paths):
+    """
+    Short unique names for a list of checkpoints (file name without extension, suffixed if repeated).
+    """
+    names = []
+    for path in model_paths:
+        base = os.path.splitext(os.path.basename(path))[0]
+        name, i = base, 2
+        while name in names:
+            name, i = f"{base}_{i}", i + 1
+        names.append(name)
+    return names
+
+
+def _evaluate_model_on_batch(model, noisy, clean, start, output, metrics, inference_options):
+    # One model on one batch: inference, optional output write and metrics update
+    cleaned = infer_batch(model, noisy, **inference_options)
+    if output is not None:
+        output[start:start + cleaned.shape[0]] = cleaned
+    if clean is not None:
+        metrics.update(noisy, cleaned, clean)
+
+
+def evaluate_file(models, job, output_paths=None, batch_size=64, inference_options=None, pool=None):
+    """
+    Run every model on one file, reading each input (and reference) batch only once.
+
+    Parameters:
+    -----------
+    models : dict
+        Loaded models by name.
+    job : dict
+        Entry of `collect_inference_jobs`.
+    output_paths : dict or None
+        Output .h5 path per model name; None to keep no outputs.
+    batch_size : int
+        Number of signals read at a time and pushed through every model.
+    inference_options : dict or None
+        Tiling options of `infer_batch`.
+    pool : ThreadPoolExecutor or None
+        Runs the models concurrently on each batch; None runs them one after another.
+
+    Returns:
+    --------
+    dict
+        Per-signal metrics table per model name (empty if there is no valid reference).
+    """
+    inference_options = inference_options or {}
+    metrics = {name: SignalMetrics() for name in models}
+
+    with ExitStack() as stack:
+        dataset = stack.enter_context(h5py.File(job["input_path"], 'r'))['dataset']
+        num_signals = dataset.shape[0]
+        print(f"  → Evaluating {len(models)} models on {job['file']} | Signals: {num_signals}")
+
+        reference = None
+        if job["reference_path"] and os.path.exists(job["reference_path"]):
+            ref_f = stack.enter_context(h5py.File(job["reference_path"], 'r'))
+            if 'dataset' in ref_f and ref_f['dataset'].shape == dataset.shape:
+                reference = ref_f['dataset']
+            else:
+                print("  [!] Reference missing or shapes don't match, no metrics for this file.")
+
+        outputs = {name: None for name in models}
+        for name, path in (output_paths or {}).items():
+            out_f = stack.enter_context(h5py.File(path, 'w'))
+            outputs[name] = out_f.create_dataset('dataset', shape=dataset.shape, dtype='float32')
+            if 'FrameSize' in dataset.attrs:
+                outputs[name].attrs['FrameSize'] = dataset.attrs['FrameSize']
+
+        reader = stack.enter_context(ThreadPoolExecutor(max_workers=1))
+        pending_read = reader.submit(read_batch, dataset, reference, 0, batch_size) if num_signals else None
+        for start in range(0, num_signals, batch_size):
+            noisy, clean = pending_read.result()
+            if start + batch_size < num_signals:  # Prefetch while the models run
+                pending_read = reader.submit(read_batch, dataset, reference, start + batch_size, start + 2 * batch_size)
+
+            arguments = [(models[name], noisy, clean, start, outputs[name], metrics[name], inference_options)
+                         for name in models]
+            if pool is not None:
+                for future in [pool.submit(_evaluate_model_on_batch, *args) for args in arguments]:
+                    future.result()
+            else:
+                for args in arguments:
+                    _evaluate_model_on_batch(*args)
+
+    if reference is None:
+        return {}
+    return {name: metrics[name].table() for name in models}
+
+
+def evaluate_checkpoints(model_paths, datasets_dir, reference_dir, output_dir=None, save_outputs=False, batch_size=64,
+                         parallel_models=False, first_conv=None, backend='torch', tile_length=None, overlap=0,
+                         tile_batch_size=16):
+    """
+    Compare several checkpoints on the same datasets in a single pass over the data.
+
+    Parameters:
+    -----------
+    model_paths : list of str
+        Checkpoints to compare (any format accepted by `load_model`).
+    datasets_dir : str
+        Directory containing noisy .h5 files or subfolders of .h5 files.
+    reference_dir : str
+        Directory containing the clean reference .h5 files (same names).
+    output_dir : str or None
+        Where the results go. Defaults to `<datasets_dir>_evaluation` next to `datasets_dir`.
+    save_outputs : bool
+        Also write the cleaned signals of every model, under `<output_dir>/<model name>/`
+        with the layout of `datasets_dir`.
+    batch_size : int
+        Number of signals read at a time and pushed through every model.
+    parallel_models : bool
+        Run the models concurrently on each batch (one thread per model). The CPU cores are
+        divided between the models (intra-op threads of torch and of ONNX Runtime), so that
+        K concurrent models do not each start a full-size thread pool.
+    first_conv, backend : str or None
+        Model loading options (see `load_model`).
+    tile_length, overlap, tile_batch_size : int
+        Tiled inference options (see `tiled_inference`).
+
+    Returns:
+    --------
+    dict
+        Combined results: per-model overall means and one row per (model, file).
+    """
+    if output_dir is None:
+        parent_dir = os.path.dirname(os.path.abspath(datasets_dir))
+        output_dir = os.path.join(parent_dir, os.path.basename(datasets_dir.rstrip('/')) + '_evaluation')
+    os.makedirs(output_dir, exist_ok=True)
+
+    names = model_names(model_paths)
+    threads_per_model = max(1, (os.cpu_count() or 1) // len(model_paths)) if parallel_models else None
+    models = {name: load_model(path, first_conv, backend, threads_per_model) for name, path in zip(names, model_paths)}
+    inference_options = {"tile_length": tile_length, "overlap": overlap, "tile_batch_size": tile_batch_size}
+
+    jobs = collect_inference_jobs(datasets_dir, output_dir, reference_dir, create_dirs=False)
+    tables = {name: {} for name in names}  # {model: {folder: {file: table}}}
+
+    with ExitStack() as stack:
+        pool = stack.enter_context(ThreadPoolExecutor(max_workers=len(models))) if parallel_models else None
+        if pool is not None and torch is not None:
+            stack.callback(torch.set_num_threads, torch.get_num_threads())  # Restored after the pass
+            torch.set_num_threads(threads_per_model)
+        for job in jobs:
+            print(f"Processing: {os.path.join(job['group'], job['file']) if job['group'] != '.' else job['file']}")
+            output_paths = None
+            if save_outputs:
+                output_paths = {}
+                for name in names:
+                    target_dir = os.path.join(output_dir, name, job["group"])
+                    os.makedirs(target_dir, exist_ok=True)
+                    output_paths[name] = os.path.join(target_dir, job["file"])
+                    copy_metadata_files(job["source_dir"], target_dir, os.path.splitext(job["file"])[0])
+
+            file_tables = evaluate_file(models, job, output_paths, batch_size, inference_options, pool)
+            for name, table in file_tables.items():
+                tables[name].setdefault(job["group"], {})[job["file"]] = table
+
+    # Combined table: one row per model and file, plus overall means per model
+    results = {"models": dict(zip(names, model_paths)), "overall": {}, "rows": []}
+    for name in names:
+        if not tables[name]:
+            continue
+        model_dir = os.path.join(output_dir, name)  # Per-signal tables next to the model's outputs
+        os.makedirs(model_dir, exist_ok=True)
+        save_metric_tables(tables[name], model_dir)
+        all_signals = [table for files in tables[name].values() for table in files.values()]
+        results["overall"][name] = summarize_table({column: np.concatenate([t[column] for t in all_signals])
+                                                    for column in METRIC_COLUMNS})
+        for group, files in tables[name].items():
+            for file, table in files.items():
+                results["rows"].append(dict(model=name, folder=group, file=file,
+                                            **parse_interference_folder(group), **summarize_table(table)))
+
+    results_path = os.path.join(output_dir, 'evaluation_results.json')
+    with open(results_path, 'w') as f:
+        json.dump(results, f, indent=4)
+    print(f"\n Evaluation results saved in: {results_path}")
+    return results
+
+# ==============================
+# Script Entry Point
+# ==============================
+
+if __name__ == "__main__":
+    args, options = parse_cli_options(sys.argv[1:])
+    if len(args) < 3:
+        print("Usage: python evaluate_checkpoints.py <datasets_dir> <reference_dir> <model1.pth> [model2.pth ...] "
+              "[--output-dir=DIR] [--save-outputs] [--batch-size=64] [--parallel-models] [--backend=torch|onnx] "
+              "[--first-conv=direct|fft|auto] [--tile-length=N] [--overlap=N] [--tile-batch=N]")
+        sys.exit(1)
+
+    results = evaluate_checkpoints(
+        args[2:], args[0], args[1],
+        output_dir=options.get('output_dir'),
+        save_outputs=options.get('save_outputs') == 'true',
+        batch_size=int(options.get('batch_size', 64)),
+        parallel_models=options.get('parallel_models') == 'true',
+        first_conv=options.get('first_conv'),
+        backend=options.get('backend', 'torch'),
+        tile_length=int(options['tile_length']) if 'tile_length' in options else None,
+        overlap=int(options.get('overlap', 0)),
+        tile_batch_size=int(options.get('tile_batch', 16)))
+
+    for name, overall in results["overall"].items():
+        print(f"  → {name}: MSE {overall['mse']:.6f} | SNR gain {overall['snr_improvement_db']:.2f} dB | "
+              f"SIR gain {overall['sir_improvement_db']:.2f} dB | EVM {overall['evm_percent']:.1f} %")
@@ -0,0 +1,209 @@
+import sys
+import time
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+
+# ==============================
+# Frequency-Domain Convolution
+# ==============================
+
+FIRST_CONV_MODES = ("direct", "fft", "auto")
+
+# Faster path per (layer shape, device, length bucket), measured once per process
+_PATH_CACHE = {}
+
+
+def _next_pow2(n):
+    return 1 << (int(n) - 1).bit_length()
+
+
+def fft_conv1d(x, weight, bias=None, padding=0, block_size=None):
+    """
+    1D convolution (PyTorch cross-correlation semantics, stride 1) computed with FFTs.
+
+    Short inputs use a single FFT of the whole padded signal. Inputs longer than
+    `block_size` are processed by overlap-save: the signal is cut into blocks of
+    `block_size` samples overlapping by K - 1, each block is convolved in the frequency
+    domain and only its K - 1 aliased outputs are discarded.
+
+    Parameters:
+    -----------
+    x : torch.Tensor
+        Input of shape [B, C_in, L].
+    weight : torch.Tensor
+        Kernel of shape [C_out, C_in, K] (same layout as nn.Conv1d.weight).
+    bias : torch.Tensor or None
+        Bias of shape [C_out].
+    padding : int
+        Zero padding added on both sides of the input.
+    block_size : int or None
+        FFT size of the overlap-save blocks (power of two, > K). Defaults to
+        8 * K rounded up to a power of two.
+
+    Returns:
+    --------
+    torch.Tensor
+        Output of shape [B, C_out, L + 2 * padding - K + 1].
+    """
+    kernel_size = weight.shape[-1]
+    x = F.pad(x, (padding, padding))
+    padded_length = x.shape[-1]
+    out_length = padded_length - kernel_size + 1
+
+    if block_size is None:
+        block_size = _next_pow2(8 * kernel_size)
+    if block_size <= kernel_size:
+        raise ValueError("block_size must be larger than the kernel size")
+
+    if padded_length <= block_size:
+        # Single block: a circular convolution of size >= padded length has no aliasing in the valid part
+        block_size = _next_pow2(padded_length)
+
+    # Overlap-save: each block of `block_size` samples yields `step` valid outputs
+    step = block_size - kernel_size + 1
+    n_blocks = -(-out_length // step)
+    x = F.pad(x, (0, n_blocks * step + kernel_size - 1 - padded_length))
+    blocks = x.unfold(-1, block_size, step)  # [B, C_in, n_blocks, block_size]
+
+    # Convolving with the flipped kernel gives PyTorch's cross-correlation
+    x_f = torch.fft.rfft(blocks, n=block_size)
+    k_f = torch.fft.rfft(weight.flip(-1), n=block_size)
+
+    # Channel mixing as one batched matmul per frequency bin: [F, C_out, C_in] @ [F, C_in, B * n_blocks]
+    batch, in_channels, _, n_freqs = x_f.shape
+    x_f = x_f.permute(3, 1, 0, 2).reshape(n_freqs, in_channels, batch * n_blocks)
+    y_f = torch.bmm(k_f.permute(2, 0, 1), x_f)
+    y_f = y_f.reshape(n_freqs, -1, batch, n_blocks).permute(2, 1, 3, 0)  # [B, C_out, n_blocks, F]
+
+    y = torch.fft.irfft(y_f, n=block_size)[..., kernel_size - 1:]  # Drop the K - 1 aliased samples
+    y = y.reshape(batch, y.shape[1], -1)[..., :out_length]
+
+    if bias is not None:
+        y = y + bias[None, :, None]
+    return y
+
+
+class FFTConv1d(nn.Conv1d):
+    """
+    Drop-in replacement of a stride-1 nn.Conv1d that can run in the frequency domain.
+
+    It keeps the `weight` and `bias` parameters of nn.Conv1d, so it loads the same
+    state dict as the direct layer.
+
+    Parameters:
+    -----------
+    in_channels : int
+        Number of input channels.
+    out_channels : int
+        Number of output channels.
+    kernel_size : int
+        Kernel size (long kernels are where the FFT pays off).
+    padding : int
+        Zero padding on both sides.
+    mode : str
+        'direct' (nn.Conv1d path), 'fft' (always FFT) or 'auto' (the faster path for the
+        current signal length, measured once per length bucket and cached).
+    block_size : int or None
+        FFT block size for overlap-save (see `fft_conv1d`).
+    """
+    def __init__(self, in_channels, out_channels, kernel_size, padding=0, mode="auto", block_size=None):
+        super(FFTConv1d, self).__init__(in_channels, out_channels, kernel_size, padding=padding)
+        if mode not in FIRST_CONV_MODES:
+            raise ValueError(f"Unknown mode '{mode}'. Use one of {FIRST_CONV_MODES}")
+        self.mode = mode
+        self.block_size = block_size
+
+    def _fft_forward(self, x):
+        return fft_conv1d(x, self.weight, self.bias, self.padding[0], self.block_size)
+
+    def _use_fft(self, x):
+        if self.mode != "auto":
+            return self.mode == "fft"
+
+        key = (self.in_channels, self.out_channels, self.kernel_size[0], x.device.type, _next_pow2(x.shape[-1]))
+        if key not in _PATH_CACHE:
+            with torch.no_grad():
+                probe = x[:1].detach()
+                direct_time = _time_call(lambda: super(FFTConv1d, self).forward(probe), x.is_cuda)
+                fft_time = _time_call(lambda: self._fft_forward(probe), x.is_cuda)
+            _PATH_CACHE[key] = fft_time < direct_time
+        return _PATH_CACHE[key]
+
+    def forward(self, x):
+        if self._use_fft(x):
+            return self._fft_forward(x)
+        return super(FFTConv1d, self).forward(x)
+
+    def extra_repr(self):
+        return super(FFTConv1d, self).extra_repr() + f", mode={self.mode}"
+
+
+def _time_call(fn, cuda=False, n_runs=3):
+    """
+    Median wall time of `fn()` over `n_runs` calls, after one warm-up call.
+    """
+    fn()
+    timings = []
+    for _ in range(n_runs):
+        if cuda:
+            torch.cuda.synchronize()
+        start = time.perf_counter()
+        fn()
+        if cuda:
+            torch.cuda.synchronize()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return timings[len(timings) // 2]
+
+
+def benchmark_first_conv(lengths, in_channels=2, out_channels=256, kernel_size=101, batch_size=1):
+    """
+    Time the direct and FFT paths of the first UNet1D layer and check they agree.
+
+    Parameters:
+    -----------
+    lengths : list of int
+        Signal lengths to benchmark.
+    in_channels, out_channels, kernel_size : int
+        Shape of the layer (defaults: first layer of the production UNet1D).
+    batch_size : int
+        Batch size of the random inputs.
+
+    Returns:
+    --------
+    list of dict
+        Per-length timings, speedup of the FFT path and maximum absolute difference.
+    """
+    layer = FFTConv1d(in_channels, out_channels, kernel_size, padding=kernel_size // 2, mode="direct").eval()
+    results = []
+    with torch.no_grad():
+        for length in lengths:
+            x = torch.randn(batch_size, in_channels, length)
+            direct_out = nn.Conv1d.forward(layer, x)
+            fft_out = layer._fft_forward(x)
+            direct_time = _time_call(lambda: nn.Conv1d.forward(layer, x))
+            fft_time = _time_call(lambda: layer._fft_forward(x))
+            results.append({
+                "length": length,
+                "direct_ms": direct_time * 1e3,
+                "fft_ms": fft_time * 1e3,
+                "speedup": direct_time / fft_time,
+                "max_abs_error": (direct_out - fft_out).abs().max().item(),
+                "max_abs_output": direct_out.abs().max().item()
+            })
+    return results
+
+# ==============================
+# Script Entry Point
+# ==============================
+
+if __name__ == "__main__":
+    # Usage: python fft_conv.py [length1 length2 ...]
+    lengths = [int(a) for a in sys.argv[1:]] or [1024, 4096, 16384, 65536]
+
+    print("Length | Direct (ms) | FFT (ms) | Speedup | Max abs error")
+    for r in benchmark_first_conv(lengths):
+        print(f"{r['length']:>6} | {r['direct_ms']:>11.2f} | {r['fft_ms']:>8.2f} | {r['speedup']:>7.2f} | {r['max_abs_error']:.2e}")
+        # Both paths must agree to float32 accuracy relative to the output scale
+        assert r["max_abs_error"] <= 1e-4 * max(1.0, r["max_abs_output"]), "FFT and direct convolution disagree"
@@ -0,0 +1,204 @@
+import os
+import json
+import hashlib
+from wireless_signals import io_accounting  # Shared with the other script folders (pip install -e .)
+
+# ==============================
+# Command-Line Utilities
+# ==============================
+
+def parse_cli_options(argv):
+    """
+    Split command-line arguments into positional arguments and `--key=value` options.
+
+    Parameters:
+    -----------
+    argv : list of str
+        Arguments (without the script name).
+
+    Returns:
+    --------
+    positional : list of str
+        Arguments that are not options, in order.
+    options : dict
+        Option values by key, with dashes turned into underscores
+        (a bare `--flag` is stored as 'true').
+    """
+    positional, options = [], {}
+    for arg in argv:
+        if arg.startswith('--'):
+            key, _, value = arg[2:].partition('=')
+            options[key.replace('-', '_')] = value if value else 'true'
+        else:
+            positional.append(arg)
+    return positional, options
+
+# ==============================
+# File Fingerprint Utilities
+# ==============================
+
+def file_fingerprint(path):
+    """
+    Cheap fingerprint of a file (size and modification time), or None if it does not exist.
+
+    Parameters:
+    -----------
+    path : str or None
+        Path to the file.
+
+    Returns:
+    --------
+    list or None
+        [size in bytes, modification time in ns].
+    """
+    if not path or not os.path.exists(path):
+        return None
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    """
+    SHA-256 hex digest of a file's contents, read in chunks.
+
+    Parameters:
+    -----------
+    path : str
+        Path to the file.
+    chunk_size : int
+        Number of bytes read at a time.
+
+    Returns:
+    --------
+    str
+        Hex digest.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+# ==============================
+# JSON Metadata Utilities
+# ==============================
+
+def json_equal_except_snr(json1, json2):
+    """
+    Compare two JSON objects while ignoring the 'snr' field (case-insensitive).
+
+    Parameters:
+    -----------
+    json1 : dict
+    json2 : dict
+
+    Returns:
+    --------
+    bool
+        True if all keys/values match except for 'snr'; False otherwise.
+    """
+    dict1 = {k: v for k, v in json1.items() if k.lower() != 'snr'}
+    dict2 = {k: v for k, v in json2.items() if k.lower() != 'snr'}
+    return dict1 == dict2
+
+
+def load_json_metadata(json_path):
+    """
+    Load metadata from a JSON file.
+
+    Parameters:
+    -----------
+    json_path : str
+        Path to the JSON file.
+
+    Returns:
+    --------
+    dict
+        Parsed JSON content.
+    """
+    with open(json_path, 'r') as f:
+        return json.load(f)
+
+
+def get_matching_pairs(clean_dir, interf_dir):
+    """
+    Match clean and interference files based on their JSON metadata,
+    ignoring differences in the 'snr' field.
+
+    Parameters:
+    -----------
+    clean_dir : str
+        Directory containing clean .json and .h5 files.
+    interf_dir : str
+        Directory containing interfering .json and .h5 files.
+
+    Returns:
+    --------
+    list of tuple
+        List of matched pairs as (clean_file_path, interfered_file_path).
+    
+    Raises:
+    -------
+    ValueError
+        If no .json files are found or no match exists for a clean file.
+    """
+    clean_jsons = [f for f in os.listdir(clean_dir) if f.endswith('.json')]
+    interf_jsons = [f for f in os.listdir(interf_dir) if f.endswith('.json')]
+
+    if not clean_jsons or not interf_jsons:
+        raise ValueError("No .json files found in one or both directories")
+
+    matched_pairs = []
+
+    for clean_json_name in clean_jsons:
+        clean_json_path = os.path.join(clean_dir, clean_json_name)
+        clean_meta = load_json_metadata(clean_json_path)
+
+        found_match = False
+        for interf_json_name in interf_jsons:
+            interf_json_path = os.path.join(interf_dir, interf_json_name)
+            interf_meta = load_json_metadata(interf_json_path)
+
+            if json_equal_except_snr(clean_meta, interf_meta):
+                base_clean = clean_json_name.replace('.json', '.h5')
+                base_interf = interf_json_name.replace('.json', '.h5')
+
+                matched_pairs.append((
+                    os.path.join(clean_dir, base_clean),
+                    os.path.join(interf_dir, base_interf)
+                ))
+                found_match = True
+                break
+
+        if not found_match:
+            raise ValueError(f"No matching interf file found for {clean_json_name}")
+
+    return matched_pairs
+
+# ==============================
+# Metadata Copying Utility
+# ==============================
+
+def copy_metadata_files(src_dir, dst_dir, base_name):
+    """
+    Copy related metadata files (.json, .mat, bits_*.h5) based on base filename.
+
+    Parameters:
+    -----------
+    src_dir : str
+        Directory containing source metadata files.
+    dst_dir : str
+        Destination directory for copied files.
+    base_name : str
+        Base name of the dataset (without extension).
+    """
+    with io_accounting.stage("metadata_copy"):
+        for ext in ['.json', '.mat', '.h5']:
+            if ext == '.h5':
+                fname = f"bits_{base_name}{ext}"
+            else:
+                fname = f"{base_name}{ext}"
+            src_path = os.path.join(src_dir, fname)
+            dst_path = os.path.join(dst_dir, fname)
+            if os.path.exists(src_path):
+                io_accounting.copy_file(src_path, dst_path)
\ No newline at end of file
@@ -0,0 +1,138 @@
+import os
+import sys
+import json
+import torch
+import torch.nn as nn
+from unet_model_pytorch import UNet1D, load_checkpoint  # Custom 1D U-Net model
+from utils import measure_latency
+
+# ==============================
+# Cost Model
+# ==============================
+
+def _layer_macs(module, inputs, output):
+    """
+    Multiply-accumulate operations of one forward call of a leaf module.
+
+    Parameters:
+    -----------
+    module : torch.nn.Module
+        Leaf module that was called.
+    inputs : tuple of torch.Tensor
+        Positional inputs of the call.
+    output : torch.Tensor
+        Output of the call.
+
+    Returns:
+    --------
+    int
+        Number of MACs (0 for modules without a meaningful cost).
+    """
+    if isinstance(module, nn.Conv1d):
+        # Every output sample needs (C_in / groups) * K MACs
+        return output.numel() * (module.in_channels // module.groups) * module.kernel_size[0]
+    if isinstance(module, nn.ConvTranspose1d):
+        # Every input sample is scattered onto (C_out / groups) * K outputs
+        return inputs[0].numel() * (module.out_channels // module.groups) * module.kernel_size[0]
+    return 0
+
+
+def profile_model(model, signal_length, batch_size=1, n_runs=10):
+    """
+    Report the size and cost of a model at a given signal length.
+
+    FLOPs are counted as 2 * MACs of the convolutions (element-wise layers are ignored).
+    Activation memory is the float32 size of every leaf-module output of one forward pass,
+    i.e. roughly what training keeps alive for the backward pass; the largest single
+    activation is a lower bound of the inference working set.
+
+    Parameters:
+    -----------
+    model : torch.nn.Module
+        Model to profile. It is profiled on CPU.
+    signal_length : int
+        Length L of the [B, C, L] input (divisible by 2 ** depth for UNet1D).
+    batch_size : int
+        Batch size B of the input.
+    n_runs : int
+        Number of timed forward passes for the latency measurement.
+
+    Returns:
+    --------
+    dict
+        Parameters, FLOPs, activation memory and measured CPU latency.
+    """
+    model = model.cpu().eval()
+    input_channels = model.config["input_channels"] if hasattr(model, "config") else 2
+    example_input = torch.randn(batch_size, input_channels, signal_length)
+
+    stats = {"macs": 0, "activation_bytes": 0, "largest_activation_bytes": 0}
+
+    def hook(module, inputs, output):
+        stats["macs"] += _layer_macs(module, inputs, output)
+        output_bytes = output.numel() * output.element_size()
+        stats["activation_bytes"] += output_bytes
+        stats["largest_activation_bytes"] = max(stats["largest_activation_bytes"], output_bytes)
+
+    handles = [m.register_forward_hook(hook) for m in model.modules() if len(list(m.children())) == 0]
+    with torch.no_grad():
+        model(example_input)
+    for handle in handles:
+        handle.remove()
+
+    latency = measure_latency(model, example_input, n_runs)
+
+    return {
+        "signal_length": signal_length,
+        "batch_size": batch_size,
+        "params": sum(p.numel() for p in model.parameters()),
+        "gflops": 2 * stats["macs"] / 1e9,
+        "activation_mb": stats["activation_bytes"] / 1e6,
+        "largest_activation_mb": stats["largest_activation_bytes"] / 1e6,
+        "cpu_latency_ms": latency * 1e3,
+        "cpu_threads": torch.get_num_threads()
+    }
+
+
+def build_model(spec):
+    """
+    Build a model from a command-line specification.
+
+    Parameters:
+    -----------
+    spec : str
+        'default', an architecture config (.json) or a checkpoint (.pth).
+
+    Returns:
+    --------
+    torch.nn.Module
+        The model described by `spec`.
+    """
+    if spec == 'default':
+        return UNet1D.from_config()
+    if spec.endswith('.json'):
+        with open(spec, 'r') as f:
+            return UNet1D.from_config(json.load(f))
+    return load_checkpoint(spec, map_location='cpu')
+
+# ==============================
+# Script Entry Point
+# ==============================
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Usage: python model_profiler.py <default | arch_config.json | model.pth> <signal_length> [batch_size]")
+        sys.exit(1)
+
+    model_spec = sys.argv[1]
+    signal_length = int(sys.argv[2])
+    batch_size = int(sys.argv[3]) if len(sys.argv) > 3 else 1
+
+    model = build_model(model_spec)
+    report = profile_model(model, signal_length, batch_size)
+
+    print(f"Model: {os.path.basename(model_spec)} | Input: [{batch_size}, {model.config['input_channels']}, {signal_length}]")
+    print(f"  → Parameters:        {report['params']:,}")
+    print(f"  → GFLOPs:            {report['gflops']:.3f}")
+    print(f"  → Activations:       {report['activation_mb']:.1f} MB (largest {report['largest_activation_mb']:.1f} MB)")
+    print(f"  → CPU latency:       {report['cpu_latency_ms']:.2f} ms ({report['cpu_threads']} threads)")
@@ -0,0 +1,70 @@
+import json
+import numpy as np
+
+# ==============================
+# ONNX Runtime Backend
+# ==============================
+# Only NumPy and onnxruntime: inference with an exported model does not need PyTorch.
+
+class OnnxModel:
+    """
+    ONNX Runtime session that can stand in for a UNet1D during inference.
+
+    It is called like the PyTorch model, with a [B, C, L] array (or tensor, converted back
+    to a tensor on output), and `infer` runs a NumPy batch of any length. Inference always
+    runs on CPU.
+
+    Parameters:
+    -----------
+    onnx_path : str
+        Path to a model exported with `onnx_export.export_onnx`.
+    num_threads : int or None
+        Intra-op threads of the session (None lets ONNX Runtime decide).
+    """
+    cpu_only = True
+
+    def __init__(self, onnx_path, num_threads=None):
+        import onnxruntime as ort  # Optional dependency, only needed for this backend
+
+        options = ort.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(onnx_path, options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+        metadata = self.session.get_modelmeta().custom_metadata_map
+        self.config = json.loads(metadata.get("arch_config", "{}"))
+        self.depth = len(self.config.get("k_list", [8, 8, 8, 8, 8]))
+
+    def __call__(self, x):
+        is_tensor = hasattr(x, 'detach')  # torch.Tensor, without importing torch
+        array = x.detach().cpu().numpy() if is_tensor else x
+        output = self.session.run(None, {self.input_name: np.ascontiguousarray(array, dtype=np.float32)})[0]
+        if is_tensor:
+            import torch
+            return torch.from_numpy(output)
+        return output
+
+    def infer(self, signals):
+        """
+        Clean a batch of signals of any length: zero-pad at the end to the next multiple of
+        2 ** depth, run the session and crop back.
+
+        Parameters:
+        -----------
+        signals : np.ndarray
+            Signals of shape [B, C, L].
+
+        Returns:
+        --------
+        np.ndarray
+            Cleaned signals of shape [B, C, L] (float32).
+        """
+        length = signals.shape[-1]
+        pad = -length % (2 ** self.depth)
+        if pad:
+            signals = np.pad(signals, ((0, 0), (0, 0), (0, pad)))
+        return self(signals)[..., :length]
+
+    def eval(self):
+        return self
@@ -0,0 +1,334 @@
+import os
+import sys
+import json
+import time
+import copy
+import h5py
+import numpy as np
+import torch
+import torch.nn as nn
+from torch.ao.quantization import get_default_qconfig_mapping
+from torch.ao.quantization.quantize_fx import prepare_fx, convert_fx
+from unet_model_pytorch import UNet1D, load_checkpoint  # Custom 1D U-Net model
+from utils import parse_cli_options
+
+# ==============================
+# Quantization Configuration
+# ==============================
+
+QUANTIZED_FORMAT = "int8_static"
+
+# Module types without a static int8 kernel: they stay in fp32 between dequantize/quantize nodes
+FLOAT_FALLBACK_TYPES = (nn.Upsample,)
+
+
+def default_engine():
+    """
+    Quantized backend for this CPU ('x86' when available, otherwise 'fbgemm' or 'qnnpack').
+    """
+    engines = torch.backends.quantized.supported_engines
+    for engine in ('x86', 'fbgemm', 'qnnpack'):
+        if engine in engines:
+            return engine
+    raise RuntimeError("No quantized engine available in this PyTorch build")
+
+
+def _qconfig_mapping(engine):
+    qconfig_mapping = get_default_qconfig_mapping(engine)
+    for module_type in FLOAT_FALLBACK_TYPES:
+        qconfig_mapping = qconfig_mapping.set_object_type(module_type, None)
+    return qconfig_mapping
+
+
+def _prepare(float_model, engine, example_length=1024):
+    """
+    Trace a float UNet1D and insert observers for static int8 quantization.
+
+    The FFT path of the first convolution has data-dependent control flow, so the
+    model is switched to the direct convolution (same weights) before tracing.
+    """
+    torch.backends.quantized.engine = engine
+    model = copy.deepcopy(float_model).cpu().eval()
+    if model.config.get("first_conv", "direct") != "direct":
+        model.set_first_conv("direct")
+    example_input = torch.randn(1, model.config["input_channels"], example_length)
+    return prepare_fx(model, _qconfig_mapping(engine), (example_input,))
+
+
+def _finalize(quantized_model, float_model, engine):
+    # Keep what inference needs to know about the model on the traced module
+    quantized_model.config = dict(float_model.config, first_conv="direct")
+    quantized_model.depth = float_model.depth
+    quantized_model.is_quantized = True
+    quantized_model.cpu_only = True
+    quantized_model.engine = engine
+    return quantized_model
+
+# ==============================
+# Calibration and Conversion
+# ==============================
+
+def list_dataset_files(datasets_dir):
+    """
+    List the signal .h5 files (not bits_*.h5) of a dataset folder and its subfolders.
+
+    Parameters:
+    -----------
+    datasets_dir : str
+        Root directory of the datasets.
+
+    Returns:
+    --------
+    list of str
+        Sorted file paths.
+    """
+    paths = []
+    for root, _, files in os.walk(datasets_dir):
+        for file in files:
+            if file.endswith('.h5') and not file.startswith('bits_'):
+                paths.append(os.path.join(root, file))
+    return sorted(paths)
+
+
+def collect_calibration_signals(datasets_dir, num_signals=64, seed=0):
+    """
+    Draw a random sample of interfered signals spread over all datasets of a folder.
+
+    Parameters:
+    -----------
+    datasets_dir : str
+        Directory with interfered .h5 files (or subfolders of them).
+    num_signals : int
+        Approximate total number of signals to draw.
+    seed : int
+        Seed of the random selection.
+
+    Returns:
+    --------
+    list of np.ndarray
+        Signals of shape [2, L] (lengths may differ between files).
+    """
+    rng = np.random.default_rng(seed)
+    files = list_dataset_files(datasets_dir)
+    if not files:
+        raise ValueError(f"No .h5 files found in {datasets_dir}")
+
+    per_file = max(1, -(-num_signals // len(files)))
+    signals = []
+    for path in files:
+        with h5py.File(path, 'r') as f:
+            n = f['dataset'].shape[0]
+            indices = np.sort(rng.choice(n, size=min(per_file, n), replace=False))
+            signals.extend(f['dataset'][indices])  # Only the selected rows are read
+    return signals
+
+
+def quantize_model(float_model, calibration_signals, engine=None, batch_size=8):
+    """
+    Post-training static int8 quantization of a UNet1D.
+
+    Convolutions, transposed convolutions, ReLUs, pooling and concatenations run in int8
+    with per-channel weight scales. Layers without a static int8 kernel (see
+    `FLOAT_FALLBACK_TYPES`) are kept in fp32. Activation ranges are calibrated on
+    `calibration_signals`.
+
+    Parameters:
+    -----------
+    float_model : UNet1D
+        Trained fp32 model.
+    calibration_signals : list of np.ndarray
+        Representative interfered signals of shape [2, L].
+    engine : str or None
+        Quantized backend ('x86', 'fbgemm' or 'qnnpack'). Defaults to the best available one.
+    batch_size : int
+        Number of calibration signals per forward pass (signals of equal length are batched).
+
+    Returns:
+    --------
+    torch.fx.GraphModule
+        Quantized model (CPU only) with `config`, `depth` and `is_quantized` attributes.
+    """
+    engine = engine or default_engine()
+    prepared = _prepare(float_model, engine)
+    multiple = 2 ** float_model.depth
+
+    # Group calibration signals by length so they can be batched
+    by_length = {}
+    for signal in calibration_signals:
+        by_length.setdefault(signal.shape[-1], []).append(signal)
+
+    with torch.no_grad():
+        for length, group in by_length.items():
+            for start in range(0, len(group), batch_size):
+                batch = torch.tensor(np.stack(group[start:start + batch_size]), dtype=torch.float32)
+                batch = nn.functional.pad(batch, (0, -length % multiple))
+                prepared(batch)
+
+    return _finalize(convert_fx(prepared), float_model, engine)
+
+
+def save_quantized_checkpoint(quantized_model, path):
+    """
+    Save a quantized UNet1D so that `load_checkpoint` (and therefore `load_model`) can rebuild it.
+
+    Parameters:
+    -----------
+    quantized_model : torch.fx.GraphModule
+        Output of `quantize_model`.
+    path : str
+        Destination path (.pth).
+    """
+    torch.save({
+        "format": QUANTIZED_FORMAT,
+        "engine": quantized_model.engine,
+        "arch_config": quantized_model.config,
+        "state_dict": quantized_model.state_dict()
+    }, path)
+
+
+def load_quantized_checkpoint(checkpoint):
+    """
+    Rebuild a quantized UNet1D from a loaded checkpoint dictionary.
+
+    The float architecture is traced and converted again (without calibration) and the
+    int8 weights, scales and zero points are then loaded from the checkpoint.
+
+    Parameters:
+    -----------
+    checkpoint : dict
+        Checkpoint written by `save_quantized_checkpoint`.
+
+    Returns:
+    --------
+    torch.fx.GraphModule
+        Quantized model on CPU.
+    """
+    engine = checkpoint.get("engine") or default_engine()
+    float_model = UNet1D.from_config(checkpoint["arch_config"])
+    quantized_model = convert_fx(_prepare(float_model, engine))
+    quantized_model.load_state_dict(checkpoint["state_dict"])
+    return _finalize(quantized_model, float_model, engine)
+
+# ==============================
+# Accuracy and Throughput Report
+# ==============================
+
+def _snr_db(signal_power, error_power):
+    return float(10 * np.log10(signal_power / max(error_power, 1e-20)))
+
+
+def evaluate_models(models, datasets_dir, reference_dir, batch_size=8):
+    """
+    Compare models on a reference directory: throughput, MSE and SNR gain per file.
+
+    Parameters:
+    -----------
+    models : dict
+        Models by name (e.g. {'fp32': ..., 'int8': ...}), all run on CPU.
+    datasets_dir : str
+        Directory with interfered .h5 files (or subfolders of them).
+    reference_dir : str
+        Directory with the clean reference .h5 files (same file names).
+    batch_size : int
+        Number of signals per forward pass.
+
+    Returns:
+    --------
+    dict
+        Per-file and overall figures for every model.
+    """
+    report = {name: {"per_file": {}} for name in models}
+    totals = {name: {"signals": 0, "seconds": 0.0, "squared_error": 0.0, "samples": 0} for name in models}
+
+    for path in list_dataset_files(datasets_dir):
+        file = os.path.basename(path)
+        reference_path = os.path.join(reference_dir, file)
+        if not os.path.exists(reference_path):
+            print(f"  [!] No reference for {file}, skipping.")
+            continue
+
+        with h5py.File(path, 'r') as f:
+            noisy = f['dataset'][:].astype(np.float32)
+        with h5py.File(reference_path, 'r') as f:
+            reference = f['dataset'][:].astype(np.float32)
+        if noisy.shape != reference.shape:
+            print(f"  [!] Shapes don't match for {file}, skipping.")
+            continue
+
+        length = noisy.shape[-1]
+        reference_power = float(np.mean(reference.astype(np.float64) ** 2))
+        input_snr = _snr_db(reference_power, float(np.mean((noisy - reference).astype(np.float64) ** 2)))
+
+        for name, model in models.items():
+            multiple = 2 ** model.depth
+            cleaned = np.empty_like(noisy)
+            start_time = time.perf_counter()
+            with torch.no_grad():
+                for start in range(0, noisy.shape[0], batch_size):
+                    batch = torch.from_numpy(noisy[start:start + batch_size])
+                    batch = nn.functional.pad(batch, (0, -length % multiple))
+                    cleaned[start:start + batch_size] = model(batch)[..., :length].numpy()
+            seconds = time.perf_counter() - start_time
+
+            squared_error = float(np.sum((cleaned - reference).astype(np.float64) ** 2))
+            mse = squared_error / reference.size
+            report[name]["per_file"][file] = {
+                "mse": mse,
+                "input_snr_db": input_snr,
+                "output_snr_db": _snr_db(reference_power, mse),
+                "snr_gain_db": _snr_db(reference_power, mse) - input_snr,
+                "signals_per_second": noisy.shape[0] / seconds
+            }
+            totals[name]["signals"] += noisy.shape[0]
+            totals[name]["seconds"] += seconds
+            totals[name]["squared_error"] += squared_error
+            totals[name]["samples"] += reference.size
+
+    for name in models:
+        per_file = report[name]["per_file"]
+        if per_file:
+            report[name]["mse"] = totals[name]["squared_error"] / totals[name]["samples"]
+            report[name]["mean_snr_gain_db"] = float(np.mean([v["snr_gain_db"] for v in per_file.values()]))
+            report[name]["signals_per_second"] = totals[name]["signals"] / totals[name]["seconds"]
+    return report
+
+# ==============================
+# Script Entry Point
+# ==============================
+
+if __name__ == "__main__":
+    args, options = parse_cli_options(sys.argv[1:])
+    if len(args) < 3:
+        print("Usage: python quantize_unet.py <model_path> <calib_datasets_dir> <output_model_path> "
+              "[eval_datasets_dir reference_dir] [--calib-signals=64] [--engine=x86|fbgemm|qnnpack]")
+        sys.exit(1)
+
+    model_path, calib_dir, output_path = args[:3]
+    num_calib = int(options.get('calib_signals', 64))
+
+    float_model = load_checkpoint(model_path, map_location='cpu').eval()
+
+    print(f"Calibrating on {num_calib} signals from {calib_dir}")
+    calibration_signals = collect_calibration_signals(calib_dir, num_calib)
+    quantized_model = quantize_model(float_model, calibration_signals, options.get('engine'))
+    save_quantized_checkpoint(quantized_model, output_path)
+    print(f"Quantized model ({quantized_model.engine}) saved at {output_path}")
+
+    if len(args) >= 5:
+        eval_dir, reference_dir = args[3], args[4]
+        report = evaluate_models({"fp32": float_model, "int8": quantized_model}, eval_dir, reference_dir)
+        if report["int8"]["per_file"]:
+            report["delta"] = {
+                "mse": report["int8"]["mse"] - report["fp32"]["mse"],
+                "mean_snr_gain_db": report["int8"]["mean_snr_gain_db"] - report["fp32"]["mean_snr_gain_db"],
+                "speedup": report["int8"]["signals_per_second"] / report["fp32"]["signals_per_second"]
+            }
+            print(f"  → MSE fp32 {report['fp32']['mse']:.6f} | int8 {report['int8']['mse']:.6f}")
+            print(f"  → SNR gain fp32 {report['fp32']['mean_snr_gain_db']:.2f} dB | int8 {report['int8']['mean_snr_gain_db']:.2f} dB")
+            print(f"  → Throughput fp32 {report['fp32']['signals_per_second']:.1f} | int8 {report['int8']['signals_per_second']:.1f} signals/s "
+                  f"(x{report['delta']['speedup']:.2f})")
+
+        report_path = os.path.splitext(output_path)[0] + '_report.json'
+        with open(report_path, 'w') as f:
+            json.dump(report, f, indent=4)
+        print(f"\n Quantization report saved in: {report_path}")
@@ -0,0 +1,282 @@
+import os
+import sys
+import json
+import time
+import errno
+import hashlib
+import weakref
+import glob
+import tempfile
+from contextlib import contextmanager
+import numpy as np
+from file_utils import parse_cli_options, io_accounting
+
+# ==============================
+# Shared-Memory Dataset Cache
+# ==============================
+#
+# Opt-in cache of the HDF5 'dataset' arrays in shared memory, so that concurrent training jobs on
+# one node map a single read-only copy of each file instead of each loading their own.
+#
+# Every entry is a float32 .npy file in a tmpfs folder (/dev/shm), memory-mapped read-only by the
+# processes using it. An index (index.json, guarded by an exclusive file lock) records the source
+# file and mtime of each entry, its size, when it was last used and the processes attached to it
+# (reference counts by pid; dead processes are dropped). When a new entry does not fit under the
+# memory cap, unreferenced entries are evicted least recently used first; if there is still no
+# room, the caller loads the file privately.
+#
+# Enable it by setting SHM_CACHE_MB to the cap in MB (SHM_CACHE_DIR overrides the folder).
+
+INDEX_NAME = 'index.json'
+LOCK_NAME = '.lock'
+
+
+def default_cache_dir():
+    """
+    Default cache folder: /dev/shm (RAM-backed) when available, else the temporary folder.
+    """
+    root = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+    return os.path.join(root, 'wireless_signals_cache')
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except OSError as e:
+        return e.errno == errno.EPERM  # Exists, but belongs to another user
+    return True
+
+
+class SharedDatasetCache:
+    """
+    Cache of HDF5 datasets in shared memory, shared by all the processes using the same folder.
+
+    Parameters:
+    -----------
+    cache_dir : str or None
+        Folder of the entries and the index (default: `default_cache_dir()`).
+    capacity_mb : float
+        Memory cap of all the entries together, in MB.
+    """
+    def __init__(self, cache_dir=None, capacity_mb=4096):
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.capacity = int(capacity_mb * 1e6)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+
+    @contextmanager
+    def _locked(self):
+        # One process at a time reads, changes and writes the index (and fills a missing entry,
+        # so that concurrent jobs asking for the same file load it once)
+        import fcntl  # POSIX only, imported when the cache is used
+        with open(os.path.join(self.cache_dir, LOCK_NAME), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _load_index(self):
+        index_path = os.path.join(self.cache_dir, INDEX_NAME)
+        if not os.path.exists(index_path):
+            return {}
+        with open(index_path, 'r') as f:
+            index = json.load(f)
+        # Forget the processes that ended without releasing, and the entries whose file is gone
+        for key in list(index):
+            entry = index[key]
+            entry["refs"] = {pid: count for pid, count in entry["refs"].items() if _pid_alive(int(pid))}
+            if not os.path.exists(self.entry_path(key)):
+                del index[key]
+        return index
+
+    def _save_index(self, index):
+        index_path = os.path.join(self.cache_dir, INDEX_NAME)
+        with open(index_path + '.tmp', 'w') as f:
+            json.dump(index, f, indent=4)
+        os.replace(index_path + '.tmp', index_path)
+
+    def entry_path(self, key):
+        return os.path.join(self.cache_dir, key + '.npy')
+
+    @staticmethod
+    def entry_key(path):
+        """
+        Key of the current version of a file: its real path, mtime and size.
+        """
+        stat = os.stat(path)
+        source = f"{os.path.realpath(path)}:{stat.st_mtime_ns}:{stat.st_size}"
+        return hashlib.sha1(source.encode()).hexdigest()[:20]
+
+    def _evict(self, index, key):
+        try:
+            os.remove(self.entry_path(key))
+        except FileNotFoundError:
+            pass
+        del index[key]
+
+    def _make_room(self, index, nbytes):
+        # Evict unreferenced entries, least recently used first, until `nbytes` more fit.
+        # Nothing is evicted if they would not fit even with every unreferenced entry gone.
+        used = sum(entry["nbytes"] for entry in index.values())
+        idle = sorted((key for key, entry in index.items() if not entry["refs"]),
+                      key=lambda key: index[key]["last_used"])
+        if used - sum(index[key]["nbytes"] for key in idle) + nbytes > self.capacity:
+            return False
+        for key in idle:
+            if used + nbytes <= self.capacity:
+                break
+            used -= index[key]["nbytes"]
+            self._evict(index, key)
+        return used + nbytes <= self.capacity
+
+    def _remove_stale_temp(self):
+        # Entries are only filled under the lock, so with the lock held every temporary file
+        # is left over from a process that died mid-fill
+        for temp_path in glob.glob(os.path.join(self.cache_dir, '*.tmp')):
+            os.remove(temp_path)
+
+    def _fill(self, key, hdf5_file):
+        # Read the dataset straight into the shared file, then publish it under its final name
+        temp_path = f"{self.entry_path(key)}.{os.getpid()}.tmp"
+        try:
+            with io_accounting.open_h5(hdf5_file, 'r') as f:
+                dataset = f['dataset']
+                shared = np.lib.format.open_memmap(temp_path, mode='w+', dtype=np.float32, shape=dataset.shape)
+                if shared.size:
+                    io_accounting.read_direct(dataset, shared)
+                shared.flush()
+                del shared
+            os.replace(temp_path, self.entry_path(key))
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def attach(self, hdf5_file):
+        """
+        Read-only shared copy of the 'dataset' array of an HDF5 file (float32), loaded into the
+        cache first if needed. The reference taken here is released when the returned array is
+        garbage-collected (or when the process ends).
+
+        Parameters:
+        -----------
+        hdf5_file : str
+            Path to the HDF5 file.
+
+        Returns:
+        --------
+        np.memmap or None
+            The shared array, or None if it does not fit under the cap (load it privately).
+        """
+        key = self.entry_key(hdf5_file)
+        pid = str(os.getpid())
+        with self._locked():
+            index = self._load_index()
+            entry = index.get(key)
+            if entry is None:
+                import h5py
+                with h5py.File(hdf5_file, 'r') as f:
+                    shape = f['dataset'].shape
+                nbytes = int(np.prod(shape)) * 4
+                if not self._make_room(index, nbytes):
+                    self._save_index(index)
+                    print(f"  [!] {os.path.basename(hdf5_file)} ({nbytes / 1e6:.1f} MB) does not fit in the "
+                          f"shared cache ({self.capacity / 1e6:.1f} MB cap), loading it privately.")
+                    return None
+                self._remove_stale_temp()
+                self._fill(key, hdf5_file)
+                entry = index[key] = {"source": os.path.realpath(hdf5_file), "mtime_ns": os.stat(hdf5_file).st_mtime_ns,
+                                      "nbytes": nbytes, "shape": list(shape), "refs": {}}
+                self.misses += 1
+            else:
+                self.hits += 1
+            entry["refs"][pid] = entry["refs"].get(pid, 0) + 1
+            entry["last_used"] = time.time()
+            self._save_index(index)
+
+        # Referenced, so no other process evicts it between the unlock and the mapping
+        array = np.load(self.entry_path(key), mmap_mode='r')
+        weakref.finalize(array, self.release, key, os.getpid())
+        return array
+
+    def release(self, key, pid=None):
+        """
+        Drop one reference of this process to an entry (it stays cached until evicted).
+        """
+        if pid is not None and pid != os.getpid():
+            return  # Finalizer inherited by a forked child (e.g. a DataLoader worker)
+        pid = str(os.getpid())
+        with self._locked():
+            index = self._load_index()
+            entry = index.get(key)
+            if entry is not None and pid in entry["refs"]:
+                entry["refs"][pid] -= 1
+                if entry["refs"][pid] <= 0:
+                    del entry["refs"][pid]
+                self._save_index(index)
+
+    def entries(self):
+        """
+        Index of the cache, {key: {'source', 'mtime_ns', 'nbytes', 'shape', 'refs', 'last_used'}}.
+        """
+        with self._locked():
+            return self._load_index()
+
+    def clear(self):
+        """
+        Evict every unreferenced entry, and remove the files left over by processes that died
+        while filling an entry (temporary files and entries missing from the index).
+
+        Returns:
+        --------
+        int
+            Number of entries evicted.
+        """
+        with self._locked():
+            index = self._load_index()
+            idle = [key for key, entry in index.items() if not entry["refs"]]
+            for key in idle:
+                self._evict(index, key)
+            self._remove_stale_temp()
+            for entry_path in glob.glob(os.path.join(self.cache_dir, '*.npy')):
+                if os.path.splitext(os.path.basename(entry_path))[0] not in index:
+                    os.remove(entry_path)
+            self._save_index(index)
+        return len(idle)
+
+
+_default_cache = None
+
+
+def default_cache():
+    """
+    Process-wide cache configured by the environment: None unless SHM_CACHE_MB (the cap in MB)
+    is set; SHM_CACHE_DIR overrides the folder.
+    """
+    global _default_cache
+    if _default_cache is None and os.environ.get('SHM_CACHE_MB'):
+        _default_cache = SharedDatasetCache(os.environ.get('SHM_CACHE_DIR'), float(os.environ['SHM_CACHE_MB']))
+    return _default_cache
+
+
+# ==============================
+# Script Entry Point
+# ==============================
+
+if __name__ == "__main__":
+    args, options = parse_cli_options(sys.argv[1:])
+    if not args or args[0] not in ('list', 'clear'):
+        print("Usage: python shm_cache.py list|clear [--dir=/dev/shm/wireless_signals_cache]")
+        sys.exit(1)
+
+    cache = SharedDatasetCache(options.get('dir') or os.environ.get('SHM_CACHE_DIR'))
+    if args[0] == 'clear':
+        print(f"Evicted {cache.clear()} unreferenced entries from {cache.cache_dir}")
+    else:
+        entries = cache.entries()
+        for key, entry in sorted(entries.items(), key=lambda item: item[1]["last_used"], reverse=True):
+            refs = sum(entry["refs"].values())
+            print(f"{key}  {entry['nbytes'] / 1e6:9.1f} MB  {refs} refs  {entry['source']}")
+        print(f"{len(entries)} entries, {sum(e['nbytes'] for e in entries.values()) / 1e6:.1f} MB in {cache.cache_dir}")
@@ -0,0 +1,220 @@
+import os
+import re
+import json
+import h5py
+import numpy as np
+
+# ==============================
+# Per-Signal Metrics
+# ==============================
+
+# Columns of the per-signal tables, in order
+METRIC_COLUMNS = (
+    "mse",                 # Mean squared error of the cleaned signal
+    "input_snr_db",        # Reference power over the power of (interfered - reference)
+    "output_snr_db",       # Reference power over the power of (cleaned - reference)
+    "snr_improvement_db",  # output_snr_db - input_snr_db
+    "output_sir_db",       # Reference power over the interference left in the output
+    "sir_improvement_db",  # output_sir_db - input SIR (equal to input_snr_db)
+    "input_evm_percent",   # RMS error vector magnitude of the interfered signal
+    "evm_percent"          # RMS error vector magnitude of the cleaned signal
+)
+
+# Interference folders are named interference_<interferer>_<attenuation x 100, 3 digits>
+INTERFERENCE_FOLDER = re.compile(r"interference_(?P<interferer>.+)_(?P<attenuation>\d{3})$")
+
+
+def _db(numerator, denominator):
+    return 10 * np.log10(np.maximum(numerator, 1e-20) / np.maximum(denominator, 1e-20))
+
+
+def signal_metrics(noisy, cleaned, reference):
+    """
+    Per-signal quality metrics of a batch, computed in one vectorized pass.
+
+    The input distortion is the interference (interfered - reference), so the input SNR
+    and SIR are the same figure. At the output, the SNR counts every error of the cleaned
+    signal, while the SIR only counts the interference left in it: the part of the output
+    error that is correlated with the input interference (complex projection of the I/Q
+    error onto the I/Q interference). EVM is measured on the I/Q samples against the
+    reference (no demodulation).
+
+    Parameters:
+    -----------
+    noisy : np.ndarray
+        Interfered input signals of shape [B, 2, L].
+    cleaned : np.ndarray
+        Model outputs of shape [B, 2, L].
+    reference : np.ndarray
+        Clean reference signals of shape [B, 2, L].
+
+    Returns:
+    --------
+    dict
+        One array of B values per column of `METRIC_COLUMNS`, plus the per-signal squared
+        error sum ('squared_error') used for exact file-level MSE accumulation.
+    """
+    reference = reference.astype(np.float64)
+    interference = noisy.astype(np.float64) - reference
+    error = cleaned.astype(np.float64) - reference
+
+    reference_power = np.sum(reference ** 2, axis=(1, 2))
+    interference_power = np.sum(interference ** 2, axis=(1, 2))
+    squared_error = np.sum(error ** 2, axis=(1, 2))
+
+    # Interference left in the output: projection of the complex error onto the complex interference
+    error_iq = error[:, 0] + 1j * error[:, 1]
+    interference_iq = interference[:, 0] + 1j * interference[:, 1]
+    correlation = np.sum(error_iq * np.conj(interference_iq), axis=-1)
+    residual_interference_power = np.abs(correlation) ** 2 / np.maximum(interference_power, 1e-20)
+
+    input_snr = _db(reference_power, interference_power)
+    output_snr = _db(reference_power, squared_error)
+    output_sir = _db(reference_power, residual_interference_power)
+
+    return {
+        "mse": squared_error / error[0].size,
+        "input_snr_db": input_snr,
+        "output_snr_db": output_snr,
+        "snr_improvement_db": output_snr - input_snr,
+        "output_sir_db": output_sir,
+        "sir_improvement_db": output_sir - input_snr,
+        "input_evm_percent": 100 * np.sqrt(interference_power / np.maximum(reference_power, 1e-20)),
+        "evm_percent": 100 * np.sqrt(squared_error / np.maximum(reference_power, 1e-20)),
+        "squared_error": squared_error
+    }
+
+
+class SignalMetrics:
+    """
+    Batch-incremental accumulator of per-signal metrics for one file.
+
+    Each `update` computes the metrics of a batch (see `signal_metrics`) and keeps only
+    the per-signal values, so the full reference and cleaned arrays are never needed at once.
+    """
+    def __init__(self):
+        self.batches = []
+        self.squared_error = 0.0
+        self.samples = 0
+
+    def update(self, noisy, cleaned, reference):
+        batch = signal_metrics(noisy, cleaned, reference)
+        self.squared_error += float(np.sum(batch.pop("squared_error")))
+        self.samples += cleaned.size
+        self.batches.append(batch)
+
+    @property
+    def mse(self):
+        """
+        MSE over every sample of every signal seen so far (None before the first update).
+        """
+        return self.squared_error / self.samples if self.samples else None
+
+    def table(self):
+        """
+        Per-signal table: one float64 array per column of `METRIC_COLUMNS`.
+        """
+        return {column: np.concatenate([batch[column] for batch in self.batches]) if self.batches else np.empty(0)
+                for column in METRIC_COLUMNS}
+
+# ==============================
+# Grouped Tables and Summaries
+# ==============================
+
+def parse_interference_folder(group):
+    """
+    Interferer name and attenuation factor encoded in an interference folder name.
+
+    Parameters:
+    -----------
+    group : str
+        Folder path relative to the datasets root (e.g. 'interference_wifi_050').
+
+    Returns:
+    --------
+    dict
+        {'interferer': str or None, 'attenuation': float or None}.
+    """
+    match = INTERFERENCE_FOLDER.match(os.path.basename(os.path.normpath(group)))
+    if not match:
+        return {"interferer": None, "attenuation": None}
+    return {"interferer": match["interferer"], "attenuation": int(match["attenuation"]) / 100}
+
+
+def summarize_table(table):
+    """
+    Mean of every column of a per-signal table (and its number of signals).
+    """
+    summary = {column: float(np.mean(values)) for column, values in table.items()}
+    summary["signals"] = int(len(next(iter(table.values()))))
+    return summary
+
+
+def save_metric_tables(tables, output_dir):
+    """
+    Write the per-signal tables and their summary next to `mse_results.json`.
+
+    `metrics_per_signal.h5` holds one HDF5 group per interference folder and file, with one
+    1D dataset per metric column (row i is signal i of the file); the folder groups carry
+    the interferer and attenuation as attributes. `metrics_summary.json` has the per-file
+    and per-folder means.
+
+    Parameters:
+    -----------
+    tables : dict
+        {folder: {file: table}} with tables as returned by `SignalMetrics.table`.
+    output_dir : str
+        Inference output directory.
+
+    Returns:
+    --------
+    dict
+        The summary written to `metrics_summary.json`.
+    """
+    summary = {}
+    with h5py.File(os.path.join(output_dir, 'metrics_per_signal.h5'), 'w') as f:
+        for group, files in tables.items():
+            labels = parse_interference_folder(group)
+            h5_group = f.require_group(group)
+            for key, value in labels.items():
+                if value is not None:
+                    h5_group.attrs[key] = value
+
+            per_file = {}
+            for file, table in files.items():
+                file_group = h5_group.create_group(file)
+                for column in METRIC_COLUMNS:
+                    file_group.create_dataset(column, data=table[column])
+                per_file[file] = summarize_table(table)
+
+            summary[group] = dict(labels, per_file=per_file,
+                                  mean=summarize_table({column: np.concatenate([t[column] for t in files.values()])
+                                                        for column in METRIC_COLUMNS}))
+
+    with open(os.path.join(output_dir, 'metrics_summary.json'), 'w') as f:
+        json.dump(summary, f, indent=4)
+    return summary
+
+
+def load_metric_tables(output_dir):
+    """
+    Read back the per-signal tables written by `save_metric_tables`.
+
+    Returns:
+    --------
+    dict
+        {folder: {file: table}}, empty if there is no metrics file.
+    """
+    path = os.path.join(output_dir, 'metrics_per_signal.h5')
+    tables = {}
+    if not os.path.exists(path):
+        return tables
+
+    def visit(name, item):
+        if isinstance(item, h5py.Group) and all(column in item for column in METRIC_COLUMNS):
+            group, file = os.path.split(name)
+            tables.setdefault(group or '.', {})[file] = {column: item[column][:] for column in METRIC_COLUMNS}
+
+    with h5py.File(path, 'r') as f:
+        f.visititems(visit)
+    return tables
@@ -1,16 +1,17 @@
 import os
 import glob
 import sys
+import copy
 import json
 import torch
+import numpy as np
 from torch.amp import autocast, GradScaler
-import h5py
-import shutil
 from torch.utils.data import DataLoader
 from torch import nn, optim
-from unet_model_pytorch import UNet1D  # Custom 1D U-Net model
+from unet_model_pytorch import UNet1D, save_checkpoint, load_checkpoint  # Custom 1D U-Net model
 from torch.utils.data.dataset import random_split
-from utils import *
+from utils import (HDF5Dataset, HDF5DenoisingDataset, plot_training_history, save_training_metrics,
+                   measure_latency, load_json_metadata, get_matching_pairs, io_accounting)
 
 # ==============================
 # Device Configuration
@@ -27,10 +28,13 @@ scaler = GradScaler("cuda")
 # Training, Validation, and Inference Functions
 # ==============================
 
-def train_model(model, dataloader, optimizer, criterion, device):
+def train_model(model, dataloader, optimizer, criterion, device, teacher=None, alpha=0.5):
     """
     Train the model for one epoch using mixed precision (if CUDA is available).
 
+    When a `teacher` is given the model is trained by knowledge distillation: the loss
+    blends the error against the teacher's output with the error against the clean target.
+
     Parameters:
     -----------
     model : torch.nn.Module
@@ -43,6 +47,11 @@ def train_model(model, dataloader, optimizer, criterion, device):
         Loss function to be minimized.
     device : torch.device
         The device to run training on (CPU or GPU).
+    teacher : torch.nn.Module or None
+        Frozen teacher model (in eval mode) used for distillation.
+    alpha : float
+        Weight of the teacher term in the distillation loss
+        (`alpha * loss(teacher) + (1 - alpha) * loss(target)`).
 
     Returns:
     --------
@@ -64,6 +73,11 @@ def train_model(model, dataloader, optimizer, criterion, device):
             outputs = model(inputs)
             loss = criterion(outputs, targets)
 
+            if teacher is not None:
+                with torch.no_grad():
+                    teacher_outputs = teacher(inputs)
+                loss = alpha * criterion(outputs, teacher_outputs) + (1 - alpha) * loss
+
         # Backward pass and optimizer step using gradient scaler
         scaler.scale(loss).backward()
         scaler.step(optimizer)
@@ -74,42 +88,70 @@ def train_model(model, dataloader, optimizer, criterion, device):
     return total_loss / len(dataloader)
 
 
-def infer_on_test(model, test_loader, output_dir):
+def infer_on_test(model, test_loader, output_dir, chunk_bytes=1 << 20):
     """
-    Run inference on a test set and save the outputs as .h5 files.
+    Run inference on a test set and save all outputs in one HDF5 file.
+
+    `test_inference.h5` holds pre-allocated, chunked datasets with one row per test signal:
+    - 'dataset': model outputs [N, C, L] (FrameSize attribute as in the input files)
+    - 'indices': index of each signal in the original dataset (from the `random_split` subset)
+    - 'interfered': model inputs [N, C, L]
+    - 'clean': references [N, C, L] (equal to the inputs for the classic autoencoder)
 
     Parameters:
     -----------
     model : torch.nn.Module
         Trained model to use for inference.
     test_loader : DataLoader
-        DataLoader containing test input signals.
+        DataLoader containing test input signals (not shuffled).
     output_dir : str
-        Directory where output .h5 files will be saved.
+        Directory where `test_inference.h5` will be saved.
+    chunk_bytes : int
+        Approximate size of an HDF5 chunk (a whole number of signals).
 
     Returns:
     --------
-    None
+    str or None
+        Path of the output file, or None if the test set is empty.
     """
+    subset = test_loader.dataset
+    num_signals = len(subset)
+    if num_signals == 0:
+        print("Empty test set, skipping inference.")
+        return None
+
     os.makedirs(output_dir, exist_ok=True)
+    output_file = os.path.join(output_dir, 'test_inference.h5')
+    indices = np.asarray(getattr(subset, 'indices', range(num_signals)), dtype=np.int64)
     model.eval()
 
-    for inputs, _ in test_loader:
-        inputs = inputs.to(device)
-
-        # Disable gradients and use mixed precision for inference
-        with torch.no_grad():
-            with autocast(device_type='cuda'):
-                outputs = model(inputs)
-
-        # Move outputs back to CPU and save each sample
-        outputs = outputs.cpu().numpy()
-        for i, output in enumerate(outputs):
-            output_file = os.path.join(output_dir, f'inference_{i}.h5')
-            with h5py.File(output_file, 'w') as f_out:
-                f_out.create_dataset('dataset', data=output)
-
-    print(f"Inference completed. Results saved in: {output_dir}")
+    with io_accounting.stage("training_output"), io_accounting.open_h5(output_file, 'w') as f_out:
+        io_accounting.create_dataset(f_out, 'indices', data=indices)
+        datasets = None
+        start = 0
+        for inputs, targets in test_loader:
+            # Disable gradients and use mixed precision for inference
+            with torch.no_grad():
+                with autocast(device_type='cuda'):
+                    outputs = model(inputs.to(device))
+
+            if datasets is None:
+                # One chunk holds a whole number of signals, so bulk and per-signal reads stay cheap
+                signal_shape = tuple(inputs.shape[1:])
+                rows = int(max(1, min(num_signals, chunk_bytes // (4 * np.prod(signal_shape)))))
+                datasets = {name: f_out.create_dataset(name, shape=(num_signals,) + signal_shape, dtype='float32',
+                                                       chunks=(rows,) + signal_shape)
+                            for name in ('dataset', 'interfered', 'clean')}
+                datasets['dataset'].attrs['FrameSize'] = signal_shape[-1]
+
+            stop = start + inputs.shape[0]
+            io_accounting.write(datasets['dataset'], slice(start, stop), outputs.float().cpu().numpy())
+            io_accounting.write(datasets['interfered'], slice(start, stop), inputs.numpy())
+            io_accounting.write(datasets['clean'], slice(start, stop), targets.numpy())
+            start = stop
+
+    print(f"Inference completed. Results saved in: {output_file}")
+    return output_file
 
 
 def validate_model(model, dataloader, criterion, device):
@@ -145,14 +187,82 @@ def validate_model(model, dataloader, criterion, device):
 
     return total_loss / len(dataloader)
 
+
+def evaluate_distillation(student, teacher, dataloader, device, n_runs=10):
+    """
+    Compare a distilled student against its teacher in accuracy and CPU speed.
+
+    Accuracy is measured on `dataloader` (MSE of each model against the clean targets and
+    MSE between both models' outputs). Latency is measured on CPU, the deployment target,
+    with the first batch of the dataloader.
+
+    Parameters:
+    -----------
+    student : torch.nn.Module
+        Distilled (compact) model.
+    teacher : torch.nn.Module
+        Reference model the student was distilled from.
+    dataloader : DataLoader
+        Dataloader providing (input, target) pairs.
+    device : torch.device
+        The device used for the accuracy pass.
+    n_runs : int
+        Number of timed forward passes per model.
+
+    Returns:
+    --------
+    dict
+        Accuracy, size and timing figures of both models.
+    """
+    student.eval()
+    teacher.eval()
+    criterion = nn.MSELoss()
+    student_mse, teacher_mse, student_teacher_mse = 0.0, 0.0, 0.0
+
+    with torch.no_grad():
+        for inputs, targets in dataloader:
+            inputs, targets = inputs.to(device), targets.to(device)
+            student_outputs = student(inputs)
+            teacher_outputs = teacher(inputs)
+
+            student_mse += criterion(student_outputs, targets).item()
+            teacher_mse += criterion(teacher_outputs, targets).item()
+            student_teacher_mse += criterion(student_outputs, teacher_outputs).item()
+
+    # Time both models on CPU with the same batch
+    example_inputs, _ = next(iter(dataloader))
+    example_inputs = example_inputs.cpu()
+    student_latency = measure_latency(copy.deepcopy(student).cpu(), example_inputs, n_runs)
+    teacher_latency = measure_latency(copy.deepcopy(teacher).cpu(), example_inputs, n_runs)
+    batch_size = example_inputs.shape[0]
+
+    return {
+        "student_mse": student_mse / len(dataloader),
+        "teacher_mse": teacher_mse / len(dataloader),
+        "student_teacher_mse": student_teacher_mse / len(dataloader),
+        "student_params": sum(p.numel() for p in student.parameters()),
+        "teacher_params": sum(p.numel() for p in teacher.parameters()),
+        "batch_size": batch_size,
+        "signal_length": example_inputs.shape[-1],
+        "student_latency_ms": student_latency * 1e3,
+        "teacher_latency_ms": teacher_latency * 1e3,
+        "student_throughput": batch_size / student_latency,  # signals per second
+        "teacher_throughput": batch_size / teacher_latency,
+        "speedup": teacher_latency / student_latency
+    }
+
 # ==============================
 # U-Net Training Function with Early Stopping
 # ==============================
 
-def train_unet_pytorch(dataset, output_dir, prev_model_path=None, batch_size=16, num_epochs=500, lr=0.0003, patience=10, inference=1):
+def train_unet_pytorch(dataset, output_dir, prev_model_path=None, batch_size=16, num_epochs=500, lr=0.0003, patience=10, inference=1,
+                       arch_config=None, teacher_model_path=None, alpha=0.5):
     """
     Train a 1D U-Net model on a given dataset with early stopping and optional inference.
 
+    If `teacher_model_path` is given, the model is trained as a distilled student of that
+    teacher and a comparison report (`distillation_report.json`) is written at the end.
+
     Parameters:
     -----------
     dataset : torch.utils.data.Dataset
@@ -161,6 +271,7 @@ def train_unet_pytorch(dataset, output_dir, prev_model_path=None, batch_size=16,
         Directory where model checkpoints and results will be saved.
     prev_model_path : str or None
         Optional path to a pretrained model checkpoint to resume training from.
+        The checkpoint's architecture takes precedence over `arch_config`.
     batch_size : int
         Batch size used for training and evaluation.
     num_epochs : int
@@ -171,6 +282,13 @@ def train_unet_pytorch(dataset, output_dir, prev_model_path=None, batch_size=16,
         Number of epochs to wait before early stopping if no improvement.
     inference : bool
         Whether to run inference on the test set after training.
+    arch_config : dict or None
+        Architecture configuration of a new model (see `UNet1D.from_config`),
+        e.g. a smaller student architecture. Defaults to the production UNet1D.
+    teacher_model_path : str or None
+        Path to a trained `UNet1D` checkpoint to distill from.
+    alpha : float
+        Weight of the teacher term in the distillation loss.
 
     Returns:
     --------
@@ -197,9 +315,18 @@ def train_unet_pytorch(dataset, output_dir, prev_model_path=None, batch_size=16,
     test_loader = DataLoader(test_dataset, batch_size=batch_size, num_workers=4)
 
     # Initialize or load model
-    model = UNet1D(input_channels=2, output_channels=2).to(device)
     if prev_model_path is not None:
-        model.load_state_dict(torch.load(prev_model_path, map_location=device))
+        model = load_checkpoint(prev_model_path, map_location=device)
+    else:
+        model = UNet1D.from_config(arch_config).to(device)
+
+    # Load and freeze the teacher for distillation
+    teacher = None
+    if teacher_model_path is not None:
+        teacher = load_checkpoint(teacher_model_path, map_location=device)
+        teacher.eval()
+        for param in teacher.parameters():
+            param.requires_grad = False
 
     # Define optimizer and loss function
     optimizer = optim.Adam(model.parameters(), lr=lr)
@@ -215,7 +342,7 @@ def train_unet_pytorch(dataset, output_dir, prev_model_path=None, batch_size=16,
 
     # Training loop with early stopping
     for epoch in range(num_epochs):
-        train_loss = train_model(model, train_loader, optimizer, criterion, device)
+        train_loss = train_model(model, train_loader, optimizer, criterion, device, teacher, alpha)
         val_loss = validate_model(model, val_loader, criterion, device)
 
         train_losses.append(train_loss)
@@ -224,7 +351,7 @@ def train_unet_pytorch(dataset, output_dir, prev_model_path=None, batch_size=16,
         # Save model if validation improves significantly (0.5%)
         if best_val_loss == float('inf') or (best_val_loss - val_loss) > (best_val_loss * 0.5e-2):
             best_val_loss = val_loss
-            torch.save(model.state_dict(), best_model_path)
+            save_checkpoint(model, best_model_path)  # Weights + architecture configuration
             print(f"Epoch {epoch+1}/{num_epochs}: Train Loss = {train_loss:.2e}, Val Loss = {val_loss:.2e}")
             print(f"Saved best model at epoch {epoch+1}")
             epochs_without_improvement = 0
@@ -239,6 +366,18 @@ def train_unet_pytorch(dataset, output_dir, prev_model_path=None, batch_size=16,
             print(f"Early stopping at epoch {epoch+1}. No improvement in {patience} epochs.")
             break
 
+    # Compare the best student against its teacher on the test set
+    if teacher is not None:
+        student = load_checkpoint(best_model_path, map_location=device)
+        eval_loader = test_loader if len(test_dataset) > 0 else val_loader
+        report = evaluate_distillation(student, teacher, eval_loader, device)
+        with open(os.path.join(output_dir, "distillation_report.json"), "w") as f:
+            json.dump(report, f, indent=4)
+        print(f"Student MSE = {report['student_mse']:.2e} | Teacher MSE = {report['teacher_mse']:.2e} | "
+              f"Student vs teacher MSE = {report['student_teacher_mse']:.2e}")
+        print(f"CPU latency: student {report['student_latency_ms']:.1f} ms, teacher {report['teacher_latency_ms']:.1f} ms "
+              f"(speedup x{report['speedup']:.2f})")
+
     # Optionally run inference on the test set
     if inference:
         test_inference_dir = os.path.join(output_dir, 'inference')
@@ -252,13 +391,73 @@ def train_unet_pytorch(dataset, output_dir, prev_model_path=None, batch_size=16,
 # Main Entry Point for Training Script
 # ==============================
 
-if __name__ == "__main__":
-    args = sys.argv
+def cli(argv):
+    """
+    Command-line entry point: classic autoencoder, denoising autoencoder or distillation
+    training, depending on the arguments.
+
+    Parameters:
+    -----------
+    argv : list of str
+        Arguments, without the program name.
+    """
+    args = [sys.argv[0]] + list(argv)  # Indexed as sys.argv: args[1] is the first argument
+    # ==========================
+    # Distillation Mode
+    # ==========================
+    if len(args) >= 6 and args[1] == 'distill':
+        # Usage: python train.py distill <clean_dataset_dir> <interf_dataset_dir> <output_dir> <teacher_model_path> [student_k_neurons | student_config.json] [student_depth] [alpha]
+        print("Training Distilled Student")
+
+        clean_dir = args[2]
+        interf_dir = args[3]
+        output_dir = args[4]
+        teacher_model_path = args[5]
+        student_spec = args[6] if len(args) > 6 else '8'
+        student_depth = int(args[7]) if len(args) > 7 else 4
+        alpha = float(args[8]) if len(args) > 8 else 0.5
+
+        if student_spec.endswith('.json'):
+            # Full architecture configuration of the student
+            student_config = load_json_metadata(student_spec)
+        else:
+            # Student keeps the teacher's channel profile, with fewer filters and/or levels
+            student_config = {
+                "k_neurons": int(student_spec),
+                "k_list": [8] * student_depth,
+                "k_decoder_list": ([8] * student_depth + [8, 8, 4, 2, 1])[-student_depth:]
+            }
+
+        matched_pairs = get_matching_pairs(clean_dir, interf_dir)
+        prev_model_path = None  # The student starts from scratch
+
+        for clean_file, interf_file in matched_pairs:
+            dataset_name = os.path.splitext(os.path.basename(interf_file))[0]
+            model_output_dir = os.path.join(output_dir, dataset_name)
+            os.makedirs(model_output_dir, exist_ok=True)
+
+            print(f"Distilling student for dataset: {dataset_name}")
+
+            dataset = HDF5DenoisingDataset(interf_file, clean_file)
+            best_model_path, best_val_loss = train_unet_pytorch(dataset, model_output_dir, prev_model_path,
+                                                                arch_config=student_config,
+                                                                teacher_model_path=teacher_model_path,
+                                                                alpha=alpha)
+
+            prev_model_path = best_model_path  # Continue distilling from the last student
+
+            print(f"Finished distillation for {dataset_name}\n")
+
+        # Save final student
+        final_model_path = os.path.join(output_dir, "student_best_model.pth")
+        with io_accounting.stage("training_output"):
+            io_accounting.copy_file(best_model_path, final_model_path)
+        print(f"Final student model saved at {final_model_path}")
 
     # ==========================
     # Classic Autoencoder Mode
     # ==========================
-    if len(args) == 3:
+    elif len(args) == 3:
         # Usage: python train.py <clean_dataset_dir> <output_dir>
         print("Training Classic Autoencoder")
 
@@ -301,7 +500,8 @@ if __name__ == "__main__":
 
         # Save final best model
         final_model_path = os.path.join(output_dir, "classical_best_model.pth")
-        shutil.copy(best_model_path, final_model_path)
+        with io_accounting.stage("training_output"):
+            io_accounting.copy_file(best_model_path, final_model_path)
         print(f"Final best model saved at {final_model_path}")
 
     # ==========================
@@ -317,6 +517,14 @@ if __name__ == "__main__":
         prev_model_path = args[4]
         final_version = (len(args) == 6 and args[5].lower() in ['true', 'yes', 'final'])
 
+        # <trained_model_path> may also be "None" or an architecture config (.json) to train from scratch
+        arch_config = None
+        if prev_model_path.lower() == 'none':
+            prev_model_path = None
+        elif prev_model_path.endswith('.json'):
+            arch_config = load_json_metadata(prev_model_path)
+            prev_model_path = None
+
         matched_pairs = get_matching_pairs(clean_dir, interf_dir)
 
         for clean_file, interf_file in matched_pairs:
@@ -327,7 +535,8 @@ if __name__ == "__main__":
             print(f"Training denoising model for dataset: {dataset_name}")
 
             dataset = HDF5DenoisingDataset(interf_file, clean_file)
-            best_model_path, best_val_loss = train_unet_pytorch(dataset, model_output_dir, prev_model_path)
+            best_model_path, best_val_loss = train_unet_pytorch(dataset, model_output_dir, prev_model_path,
+                                                                arch_config=arch_config)
 
             previous_model_path = best_model_path  # Update model for potential reuse
 
@@ -346,14 +555,16 @@ if __name__ == "__main__":
 
         # Save final best model
         final_model_path = os.path.join(output_dir, "final_best_model.pth")
-        shutil.copy(best_model_path, final_model_path)
+        with io_accounting.stage("training_output"):
+            io_accounting.copy_file(best_model_path, final_model_path)
         print(f"Final best model saved at {final_model_path}")
 
         # Optional final version copy
         if final_version:
             parent_dir = os.path.dirname(output_dir.rstrip('/'))
             denoising_model_path = os.path.join(parent_dir, "denoising_best_model.pth")
-            shutil.copy(best_model_path, denoising_model_path)
+            with io_accounting.stage("training_output"):
+                io_accounting.copy_file(best_model_path, denoising_model_path)
             print(f"Final denoising model saved at {denoising_model_path}")
 
     # ==========================
@@ -361,5 +572,11 @@ if __name__ == "__main__":
     # ==========================
     else:
         print("Usage (classic autoencoder): python train.py <clean_dataset_dir> <output_dir>")
-        print("Usage (denoising autoencoder): python train.py <clean_dataset_dir> <interf_dataset_dir> <output_dir> <trained_model_path> <final model? (optional)>")
+        print("Usage (denoising autoencoder): python train.py <clean_dataset_dir> <interf_dataset_dir> <output_dir> <trained_model_path | None | arch_config.json> <final model? (optional)>")
+        print("Usage (distillation): python train.py distill <clean_dataset_dir> <interf_dataset_dir> <output_dir> <teacher_model_path> [student_k_neurons | student_config.json] [student_depth] [alpha]")
         sys.exit(1)
+
+    io_accounting.print_summary()
+
+if __name__ == "__main__":
+    cli(sys.argv[1:])
@@ -1,46 +1,253 @@
 import os
 import sys
-import torch
 import numpy as np
 import shutil
-import h5py
 import gc
 import json
-from torch.amp import autocast
-from unet_model_pytorch import UNet1D   # Custom 1D U-Net model
-from utils import *
-from sklearn.metrics import mean_squared_error
+import multiprocessing
+from contextlib import ExitStack
+from concurrent.futures import ThreadPoolExecutor
+try:
+    import torch
+    from torch.amp import autocast
+    from unet_model_pytorch import load_checkpoint   # Custom 1D U-Net model
+except ImportError:  # Full-frame inference with the ONNX backend runs without PyTorch
+    torch = None
+from onnx_runtime import OnnxModel
+from file_utils import parse_cli_options, file_fingerprint, file_sha256, copy_metadata_files, io_accounting
+from signal_metrics import SignalMetrics, save_metric_tables, load_metric_tables
+from ber_metrics import evaluate_ber, save_ber_results
 
 # ==============================
 # Device Configuration
 # ==============================
 
 # Use CUDA if available, otherwise fallback to CPU
-device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+device = torch.device("cuda" if torch.cuda.is_available() else "cpu") if torch is not None else None
 
 # ==============================
 # Model Loading
 # ==============================
 
-def load_model(model_path):
+def load_model(model_path, first_conv=None, backend='torch', num_threads=None):
     """
     Load a trained UNet1D model from a checkpoint.
 
+    The architecture is rebuilt from the configuration stored in the checkpoint
+    (plain state dicts fall back to the default UNet1D). Int8 checkpoints written by
+    `quantize_unet.py` are recognised and loaded as quantized CPU models.
+
+    With the 'onnx' backend the model runs in ONNX Runtime: `model_path` is either an
+    exported .onnx file (no PyTorch needed) or a .pth checkpoint, which is exported next
+    to itself first. `first_conv` does not apply (exported models use the direct
+    convolution) and is rejected.
+
     Parameters:
     -----------
     model_path : str
         Path to the model checkpoint (.pth file).
+    first_conv : str or None
+        Optional implementation of the long first convolution ('direct', 'fft' or 'auto').
+        Defaults to the one stored in the checkpoint.
+    backend : str
+        'torch' (PyTorch eager) or 'onnx' (ONNX Runtime on CPU).
+    num_threads : int or None
+        Intra-op threads of the ONNX Runtime session (None lets ONNX Runtime decide). PyTorch
+        threads are set by the caller (`torch.set_num_threads`).
 
     Returns:
     --------
-    model : torch.nn.Module
+    model : torch.nn.Module or OnnxModel
         Loaded model in evaluation mode.
     """
-    model = UNet1D(input_channels=2, output_channels=2).to(device)
-    model.load_state_dict(torch.load(model_path, map_location=device))
+    if backend == 'onnx':
+        if first_conv is not None:
+            raise ValueError("first_conv only applies to the torch backend: exported ONNX models "
+                             "always use the direct first convolution")
+        return OnnxModel(onnx_model_path(model_path), num_threads=num_threads)
+
+    model = load_checkpoint(model_path, map_location=device)
+    if first_conv is not None and not getattr(model, 'is_quantized', False):
+        model.set_first_conv(first_conv)
     model.eval()
     return model
 
+def onnx_model_path(model_path):
+    """
+    Path of the ONNX model for `model_path`, exporting a .pth checkpoint next to itself if
+    the .onnx file is missing or older than the checkpoint.
+    """
+    if model_path.endswith('.onnx'):
+        return model_path
+    if torch is None:
+        raise ImportError("Exporting a .pth checkpoint to ONNX requires PyTorch; pass an exported .onnx model")
+    onnx_path = os.path.splitext(model_path)[0] + '.onnx'
+    if not os.path.exists(onnx_path) or os.path.getmtime(onnx_path) < os.path.getmtime(model_path):
+        from onnx_export import export_onnx  # Optional dependency (onnx, onnxruntime)
+        export_onnx(load_checkpoint(model_path, map_location='cpu'), onnx_path)
+    return onnx_path
+
+
+def model_device(model):
+    """
+    Device where the model's inputs must be placed (quantized and ONNX models only run on CPU).
+    """
+    return torch.device('cpu') if getattr(model, 'cpu_only', False) else device
+
+# ==============================
+# Arbitrary-Length and Tiled Inference
+# ==============================
+
+def valid_length_multiple(model):
+    """
+    Signal lengths accepted by the model must be a multiple of this value (2 ** depth).
+    """
+    return 2 ** getattr(model, 'depth', 5)
+
+
+def run_model(model, signals):
+    """
+    Run the model on a batch of signals of any length.
+
+    The batch is zero-padded at the end up to the next valid length and the output
+    is cropped back to the input length.
+
+    Parameters:
+    -----------
+    model : torch.nn.Module
+        Trained model for inference.
+    signals : torch.Tensor
+        Input batch of shape [B, 2, L] on the model's device (see `model_device`).
+
+    Returns:
+    --------
+    torch.Tensor
+        Cleaned batch of shape [B, 2, L].
+    """
+    length = signals.shape[-1]
+    multiple = valid_length_multiple(model)
+    pad = -length % multiple
+    if pad:
+        signals = torch.nn.functional.pad(signals, (0, pad))
+
+    with torch.no_grad():
+        with autocast(device_type='cuda'):
+            cleaned = model(signals)
+    return cleaned[..., :length].float()
+
+
+def overlap_add_window(tile_length, overlap):
+    """
+    Tile weighting window: sin² fade-in and cos² fade-out over `overlap` samples, flat in between.
+
+    Consecutive tiles with hop `tile_length - overlap` add up to exactly one in the overlaps,
+    and the window never reaches zero, so normalizing by the summed weights is always defined.
+
+    Parameters:
+    -----------
+    tile_length : int
+        Tile length in samples.
+    overlap : int
+        Overlap between consecutive tiles in samples.
+
+    Returns:
+    --------
+    torch.Tensor
+        Window of shape [tile_length].
+    """
+    window = torch.ones(tile_length)
+    if overlap > 0:
+        ramp = torch.sin(0.5 * np.pi * (torch.arange(overlap) + 0.5) / overlap) ** 2
+        window[:overlap] = ramp
+        window[-overlap:] = ramp.flip(0)
+    return window
+
+
+def tiled_inference(model, signals, tile_length, overlap, tile_batch_size=16):
+    """
+    Run the model on long signals tile by tile and stitch the tiles with windowed overlap-add.
+
+    Activation memory is bounded by `tile_batch_size` tiles of `tile_length` samples,
+    whatever the length of the signals.
+
+    Parameters:
+    -----------
+    model : torch.nn.Module
+        Trained model for inference.
+    signals : torch.Tensor
+        Input batch of shape [B, 2, L] (on CPU or on the model's device).
+    tile_length : int
+        Tile length; rounded up to the model's valid length multiple.
+    overlap : int
+        Overlap between consecutive tiles (smaller than `tile_length`).
+    tile_batch_size : int
+        Number of tiles pushed through the model at once.
+
+    Returns:
+    --------
+    torch.Tensor
+        Cleaned batch of shape [B, 2, L], on CPU.
+    """
+    multiple = valid_length_multiple(model)
+    tile_length = -(-tile_length // multiple) * multiple
+    if not 0 <= overlap < tile_length:
+        raise ValueError("overlap must be in [0, tile_length)")
+
+    batch, channels, length = signals.shape
+    hop = tile_length - overlap
+    n_tiles = max(1, -(-(length - overlap) // hop))
+    padded_length = (n_tiles - 1) * hop + tile_length
+
+    signals = torch.nn.functional.pad(signals.cpu().float(), (0, padded_length - length))
+    window = overlap_add_window(tile_length, overlap)
+    output = torch.zeros(batch, channels, padded_length)
+    weights = torch.zeros(padded_length)
+    for t in range(n_tiles):
+        weights[t * hop:t * hop + tile_length] += window
+
+    # (signal, tile) pairs processed in chunks of tile_batch_size
+    pairs = [(b, t) for b in range(batch) for t in range(n_tiles)]
+    for start in range(0, len(pairs), tile_batch_size):
+        chunk = pairs[start:start + tile_batch_size]
+        tiles = torch.stack([signals[b, :, t * hop:t * hop + tile_length] for b, t in chunk]).to(model_device(model))
+        cleaned = run_model(model, tiles).cpu() * window
+        for (b, t), tile in zip(chunk, cleaned):
+            output[b, :, t * hop:t * hop + tile_length] += tile
+
+    return (output / weights)[..., :length]
+
+
+def check_tiling_accuracy(model, signal, tile_length, overlap, tile_batch_size=16, max_length=None):
+    """
+    Compare tiled inference against full-frame inference on one signal.
+
+    Parameters:
+    -----------
+    model : torch.nn.Module
+        Trained model for inference.
+    signal : np.ndarray
+        Input signal of shape [2, L].
+    tile_length, overlap, tile_batch_size : int
+        Tiling parameters (see `tiled_inference`).
+    max_length : int or None
+        Only the first `max_length` samples are compared (full-frame inference of very
+        long captures is what tiling avoids). Defaults to 8 tiles.
+
+    Returns:
+    --------
+    dict
+        Relative squared error and maximum absolute difference between both outputs.
+    """
+    max_length = max_length or 8 * tile_length
+    signal_tensor = torch.tensor(signal[..., :max_length], dtype=torch.float32).unsqueeze(0)
+    full = run_model(model, signal_tensor.to(model_device(model))).cpu()
+    tiled = tiled_inference(model, signal_tensor, tile_length, overlap, tile_batch_size)
+    return {
+        "compared_samples": signal_tensor.shape[-1],
+        "relative_error": float(((tiled - full) ** 2).sum() / (full ** 2).sum().clamp_min(1e-20)),
+        "max_abs_diff": float((tiled - full).abs().max())
+    }
+
 # ==============================
 # Inference
 # ==============================
@@ -61,16 +268,65 @@ def predict_signal(model, signal):
     np.ndarray
         Cleaned signal of shape [2, L].
     """
-    signal_tensor = torch.tensor(signal, dtype=torch.float32).unsqueeze(0).to(device)  # Add batch dimension: [1, 2, L]
-    with torch.no_grad():
-        with autocast(device_type='cuda'):  # Mixed precision for faster inference on GPU
-            cleaned_tensor = model(signal_tensor)
+    signal_tensor = torch.tensor(signal, dtype=torch.float32).unsqueeze(0).to(model_device(model))  # Add batch dimension: [1, 2, L]
+    cleaned_tensor = run_model(model, signal_tensor)  # Mixed precision for faster inference on GPU
     return cleaned_tensor.squeeze(0).cpu().numpy()  # Remove batch dimension
 
-def process_dataset(model, input_file, output_file, reference_file=None):
+def infer_batch(model, noisy, tile_length=None, overlap=0, tile_batch_size=16):
+    """
+    Clean one batch of signals, full-frame or tiled.
+
+    Parameters:
+    -----------
+    model : torch.nn.Module
+        Trained model for inference.
+    noisy : np.ndarray
+        Signals of shape [B, 2, L] (float32).
+    tile_length, overlap, tile_batch_size : int
+        Tiled inference parameters (see `tiled_inference`); no tiling if `tile_length` is None.
+
+    Returns:
+    --------
+    np.ndarray
+        Cleaned signals of shape [B, 2, L] (float32).
+    """
+    if isinstance(model, OnnxModel) and not tile_length:
+        return model.infer(noisy)  # NumPy in and out, no torch round trip
+    noisy_tensor = torch.from_numpy(noisy)
+    if tile_length:
+        return tiled_inference(model, noisy_tensor, tile_length, overlap, tile_batch_size).numpy()
+    return run_model(model, noisy_tensor.to(model_device(model))).cpu().numpy()
+
+
+def read_batch(dataset, reference, start, stop):
+    # One slice of the input (and reference) file; runs on the reader threads
+    noisy = io_accounting.read(dataset, slice(start, stop)).astype(np.float32, copy=False)
+    clean = io_accounting.read(reference, slice(start, stop)) if reference is not None else None
+    return noisy, clean
+
+
+def _write_batch(dataset, start, noisy, cleaned, clean, metrics):
+    # Runs on the writer thread: store the slice and accumulate the metrics
+    io_accounting.write(dataset, slice(start, start + cleaned.shape[0]), cleaned)
+    if clean is not None:
+        metrics.update(noisy, cleaned, clean)
+
+
+def process_dataset(model, input_file, output_file, reference_file=None, tile_length=None, overlap=0, tile_batch_size=16,
+                    batch_size=64, metrics=None):
     """
     Run inference on an entire HDF5 dataset and optionally compute MSE against a reference file.
 
+    Signals are streamed in batches of `batch_size`: a reader thread prefetches the next
+    slice of the input (and reference) file while the current batch runs through the
+    model, and a writer thread stores each cleaned batch into the pre-allocated output
+    dataset and accumulates the metrics. Memory use is bounded by a few batches,
+    whatever the size of the file.
+
+    Signals of any length are accepted (padded to a valid length). With `tile_length`,
+    signals are processed as overlapping tiles (see `tiled_inference`) and the deviation
+    from full-frame inference is reported on the first signal.
+
     Parameters:
     -----------
     model : torch.nn.Module
@@ -81,56 +337,260 @@ def process_dataset(model, input_file, output_file, reference_file=None):
         Path where the cleaned signals will be saved.
     reference_file : str or None
         Optional path to a clean signal file to compute MSE.
+    tile_length : int or None
+        Tile length for tiled inference; None runs each signal as one frame.
+    overlap : int
+        Overlap between consecutive tiles.
+    tile_batch_size : int
+        Number of tiles per forward pass.
+    batch_size : int
+        Number of signals read, processed and written at a time.
+    metrics : SignalMetrics or None
+        Accumulator of the per-signal metrics (SNR, SIR, EVM...), updated batch by batch
+        when a valid reference is given. A private one is used if None.
 
     Returns:
     --------
     float or None
         MSE value if reference is provided and valid, otherwise None.
     """
-    with h5py.File(input_file, 'r') as f:
-        noisy_signals = f['dataset'][:]
-        frame_size = f['dataset'].attrs.get('FrameSize', None)
-
-    print(f"  → Inference on {os.path.basename(input_file)} | Signals: {noisy_signals.shape[0]}")
-
-    noisy_tensor = torch.tensor(noisy_signals, dtype=torch.float32).to(device)
-
-    with torch.no_grad():
-        with autocast(device_type='cuda'):
-            cleaned_tensor = model(noisy_tensor)
-
-    cleaned_signals = cleaned_tensor.cpu().numpy()
-
-    mse_value = None
-    if reference_file and os.path.exists(reference_file):
-        with h5py.File(reference_file, 'r') as ref_f:
-            if 'dataset' in ref_f:
-                reference_signals = ref_f['dataset'][:]
-                if reference_signals.shape == cleaned_signals.shape:
-                    mse_value = np.mean((cleaned_signals - reference_signals) ** 2)
-                else:
-                    print("  [!] Shapes don't match for MSE.")
-            else:
+    with io_accounting.stage("inference"), ExitStack() as stack:
+        in_f = stack.enter_context(io_accounting.open_h5(input_file, 'r'))
+        dataset = in_f['dataset']
+        num_signals = dataset.shape[0]
+        frame_size = dataset.attrs.get('FrameSize', None)
+
+        print(f"  → Inference on {os.path.basename(input_file)} | Signals: {num_signals}")
+
+        reference = None
+        if reference_file and os.path.exists(reference_file):
+            ref_f = stack.enter_context(io_accounting.open_h5(reference_file, 'r'))
+            if 'dataset' not in ref_f:
                 print("  [!] Reference file missing 'dataset' key.")
+            elif ref_f['dataset'].shape != dataset.shape:
+                print("  [!] Shapes don't match for MSE.")
+            else:
+                reference = ref_f['dataset']
 
-    with h5py.File(output_file, 'w') as out_f:
-        dset = out_f.create_dataset('dataset', data=cleaned_signals, dtype='float32')
+        out_f = stack.enter_context(io_accounting.open_h5(output_file, 'w'))
+        output = out_f.create_dataset('dataset', shape=dataset.shape, dtype='float32')
         if frame_size is not None:
-            dset.attrs['FrameSize'] = frame_size
+            output.attrs['FrameSize'] = frame_size
+
+        # One thread each, so that reads and writes stay in file order
+        reader = stack.enter_context(ThreadPoolExecutor(max_workers=1))
+        writer = stack.enter_context(ThreadPoolExecutor(max_workers=1))
+        metrics = metrics if metrics is not None else SignalMetrics()
+
+        starts = range(0, num_signals, batch_size)
+        pending_read = reader.submit(read_batch, dataset, reference, 0, batch_size) if num_signals else None
+        pending_write = None
+        for start in starts:
+            noisy, clean = pending_read.result()
+            next_start = start + batch_size
+            if next_start < num_signals:  # Prefetch while this batch computes
+                pending_read = reader.submit(read_batch, dataset, reference, next_start, next_start + batch_size)
+
+            cleaned = infer_batch(model, noisy, tile_length, overlap, tile_batch_size)
+            if tile_length and start == 0:
+                check = check_tiling_accuracy(model, noisy[0], tile_length, overlap, tile_batch_size)
+                print(f"  → Tiling check on {check['compared_samples']} samples: "
+                      f"relative error {check['relative_error']:.2e}, max abs diff {check['max_abs_diff']:.2e}")
+
+            if pending_write is not None:
+                pending_write.result()  # At most one batch waiting to be written
+            pending_write = writer.submit(_write_batch, output, start, noisy, cleaned, clean, metrics)
+
+        if pending_write is not None:
+            pending_write.result()
 
     # Free memory
-    del noisy_tensor, cleaned_tensor, cleaned_signals
-    torch.cuda.empty_cache()
+    if torch is not None:
+        torch.cuda.empty_cache()
     gc.collect()
 
-    return mse_value
+    return metrics.mse if reference is not None else None
 
 
+# ==============================
+# Parallel Multi-File Inference
+# ==============================
+
+def collect_inference_jobs(datasets_dir, output_dir, reference_dir=None, create_dirs=True):
+    """
+    List the files to process and where their outputs go, creating the output folders.
+
+    Parameters:
+    -----------
+    datasets_dir : str
+        Directory containing noisy .h5 files or subfolders of .h5 files.
+    output_dir : str
+        Root of the output tree (same layout as `datasets_dir`).
+    reference_dir : str or None
+        Optional directory containing reference clean .h5 files (same names).
+    create_dirs : bool
+        Create the output subfolders.
+
+    Returns:
+    --------
+    list of dict
+        One job per file, in processing order, with its input, output and reference paths,
+        its MSE group (relative folder) and the folders its metadata is copied between.
+    """
+    jobs = []
+
+    # Case 1: HDF5 files are directly inside the dataset folder
+    h5_files = [f for f in os.listdir(datasets_dir) if f.endswith('.h5') and not f.startswith('bits_')]
+    if h5_files:
+        walk = [(datasets_dir, '.', output_dir, sorted(h5_files))]
+
+    # Case 2: Dataset directory contains subfolders with HDF5 files
+    else:
+        walk = []
+        for root, dirs, files in os.walk(datasets_dir):
+            rel_path = os.path.relpath(root, datasets_dir)
+            target_dir = os.path.join(output_dir, rel_path)
+            if create_dirs:
+                os.makedirs(target_dir, exist_ok=True)
+            walk.append((root, rel_path, target_dir,
+                         [f for f in sorted(files) if f.endswith('.h5') and not f.startswith('bits_')]))
+
+    for root, rel_path, target_dir, files in walk:
+        for file in files:
+            jobs.append({
+                "input_path": os.path.join(root, file),
+                "output_path": os.path.join(target_dir, file),
+                "reference_path": os.path.join(reference_dir, file) if reference_dir else None,
+                "group": rel_path,
+                "file": file,
+                "source_dir": root,
+                "target_dir": target_dir
+            })
+    return jobs
+
+
+def run_inference_job(model, job, inference_options):
+    """
+    Process one file of the job list and copy its metadata files next to the output.
+
+    Parameters:
+    -----------
+    model : torch.nn.Module
+        Trained model for inference.
+    job : dict
+        Entry of `collect_inference_jobs`.
+    inference_options : dict
+        Keyword arguments of `process_dataset` (tiling and batch size).
+
+    Returns:
+    --------
+    mse : float or None
+        MSE of the file if a valid reference exists.
+    table : dict or None
+        Per-signal metrics table (see `SignalMetrics.table`) if a valid reference exists.
+    """
+    print(f"Processing: {os.path.join(job['group'], job['file']) if job['group'] != '.' else job['file']}")
+    metrics = SignalMetrics()
+    mse = process_dataset(model, job["input_path"], job["output_path"], job["reference_path"],
+                          metrics=metrics, **inference_options)
+
+    base_key = os.path.splitext(job["file"])[0]
+    copy_metadata_files(job["source_dir"], job["target_dir"], base_key)
+    return mse, metrics.table() if mse is not None else None
+
+
+# Model of each worker process, loaded once by `_init_worker`
+_worker_model = None
+_worker_options = None
+
+
+def _init_worker(model_path, first_conv, backend, num_threads, inference_options):
+    global _worker_model, _worker_options
+    if torch is not None:
+        torch.set_num_threads(num_threads)
+    _worker_model = load_model(model_path, first_conv, backend, num_threads)
+    _worker_options = inference_options
+
+
+def _run_worker_job(job):
+    # The I/O counters of the job go back with its results, to be added up by the parent
+    io_accounting.reset()
+    mse, table = run_inference_job(_worker_model, job, _worker_options)
+    return mse, table, io_accounting.snapshot()
+
+# ==============================
+# Incremental Inference Manifest
+# ==============================
+
+MANIFEST_NAME = 'inference_manifest.json'
+
+
+def load_inference_manifest(output_dir, model_key):
+    """
+    Load the manifest of a previous run into `output_dir`.
+
+    The manifest maps each output file to the fingerprints of its input, reference and
+    output files and to its MSE. It is only reused if it was written for the same model
+    (`model_key`); otherwise every file has to be recomputed.
+
+    Parameters:
+    -----------
+    output_dir : str
+        Root of the output tree.
+    model_key : dict
+        Checkpoint hash and the inference options that change the outputs.
+
+    Returns:
+    --------
+    dict
+        Manifest entries by output path (relative to `output_dir`), empty if none is valid.
+    """
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    if not os.path.exists(manifest_path):
+        return {}
+    with open(manifest_path, 'r') as f:
+        manifest = json.load(f)
+    if manifest.get("model") != model_key:
+        print("Model checkpoint or inference options changed: recomputing all files.")
+        return {}
+    return manifest.get("files", {})
+
+
+def save_inference_manifest(output_dir, model_key, entries):
+    """
+    Write the manifest of the current run (see `load_inference_manifest`).
+    """
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    with open(manifest_path + '.tmp', 'w') as f:
+        json.dump({"model": model_key, "files": entries}, f, indent=4)
+    os.replace(manifest_path + '.tmp', manifest_path)  # Never leave a half-written manifest
+
+
+def job_fingerprints(job):
+    """
+    Fingerprints of the files that determine the output and the MSE of a job.
+    """
+    return {
+        "input": file_fingerprint(job["input_path"]),
+        "reference": file_fingerprint(job["reference_path"])
+    }
+
+
+def is_cached(entry, job):
+    """
+    Whether a manifest entry still describes the output of `job`.
+    """
+    return (entry is not None
+            and {key: entry.get(key) for key in ("input", "reference")} == job_fingerprints(job)
+            and entry.get("output") is not None
+            and entry.get("output") == file_fingerprint(job["output_path"]))
+
 # ==============================
 # Main Inference Function
 # ==============================
 
-def main(model_path, datasets_dir, reference_dir=None):
+def main(model_path, datasets_dir, reference_dir=None, first_conv=None, tile_length=None, overlap=0, tile_batch_size=16,
+         backend='torch', batch_size=64, workers=1, threads_per_worker=None, force=False, ber=False):
     """
     Perform inference using a trained U-Net model on a set of noisy datasets,
     optionally comparing against clean reference datasets to compute MSE.
@@ -143,8 +603,34 @@ def main(model_path, datasets_dir, reference_dir=None):
         Directory containing noisy .h5 files or subfolders of .h5 files.
     reference_dir : str or None
         Optional directory containing reference clean .h5 files (same names).
+    first_conv : str or None
+        Optional implementation of the long first convolution ('direct', 'fft' or 'auto').
+    tile_length, overlap, tile_batch_size : int
+        Tiled inference parameters (see `process_dataset`).
+    backend : str
+        'torch' (PyTorch eager) or 'onnx' (ONNX Runtime, see `load_model`).
+    batch_size : int
+        Number of signals per inference batch (see `process_dataset`).
+    workers : int
+        Number of worker processes. Each one loads its own copy of the model and processes
+        whole files; 1 runs everything in this process.
+    threads_per_worker : int or None
+        Intra-op threads of each worker (`torch.set_num_threads`, or the ONNX Runtime
+        session). Defaults to the CPU cores divided evenly between the workers.
+    force : bool
+        Recompute every file, ignoring the outputs of previous runs.
+    ber : bool
+        Demodulate the outputs and inputs and compare them with the transmitted bits
+        (`bits_<name>.h5`) of every file whose modulation is supported (see `ber_metrics`).
+
+    Files whose output, input and reference are unchanged since a previous run with the
+    same checkpoint and options (see `load_inference_manifest`) are not recomputed; their
+    stored MSE still goes into `mse_results.json`.
     """
     
+    if torch is None and (backend != 'onnx' or tile_length):
+        raise ImportError("PyTorch is required, except for full-frame inference with backend='onnx'")
+
     # Prepare output directory
     parent_dir = os.path.dirname(os.path.abspath(datasets_dir))
     base_name = os.path.basename(datasets_dir.rstrip('/'))
@@ -153,48 +639,75 @@ def main(model_path, datasets_dir, reference_dir=None):
 
     mse_log = {}  # Store MSE values grouped by folder
 
-    # Load the trained model
-    model = load_model(model_path)
-
-    # Case 1: HDF5 files are directly inside the dataset folder
-    h5_files = [f for f in os.listdir(datasets_dir) if f.endswith('.h5') and not f.startswith('bits_')]
-
-    if h5_files:
-        for file in sorted(h5_files):
-            input_path = os.path.join(datasets_dir, file)
-            output_path = os.path.join(output_dir, file)
-            reference_path = os.path.join(reference_dir, file) if reference_dir else None
-
-            print(f"Processing: {file}")
-            mse = process_dataset(model, input_path, output_path, reference_path)
+    jobs = collect_inference_jobs(datasets_dir, output_dir, reference_dir)
+    inference_options = {"tile_length": tile_length, "overlap": overlap,
+                         "tile_batch_size": tile_batch_size, "batch_size": batch_size}
+
+    # Skip the files whose outputs are still valid for this checkpoint and these options
+    model_key = {"checkpoint_sha256": file_sha256(model_path), "backend": backend, "first_conv": first_conv,
+                 "tile_length": tile_length, "overlap": overlap if tile_length else 0}
+    previous = {} if force else load_inference_manifest(output_dir, model_key)
+    previous_tables = load_metric_tables(output_dir) if previous else {}
+    entries = {}
+    tables = {}  # Per-signal metrics tables by folder and file
+    pending = []
+    for job in jobs:
+        key = os.path.relpath(job["output_path"], output_dir)
+        entry = previous.get(key)
+        table = previous_tables.get(job["group"], {}).get(job["file"])
+        if is_cached(entry, job) and (entry["mse"] is None or table is not None):
+            entries[key] = entry
+            tables[key] = table
+        else:
+            pending.append(job)
+    if len(pending) < len(jobs):
+        print(f"Reusing {len(jobs) - len(pending)} up-to-date outputs, processing {len(pending)} files")
+
+    def record(job, mse, table):
+        key = os.path.relpath(job["output_path"], output_dir)
+        entries[key] = dict(job_fingerprints(job), output=file_fingerprint(job["output_path"]),
+                            mse=float(mse) if mse is not None else None)
+        tables[key] = table
+        save_inference_manifest(output_dir, model_key, entries)  # Progress survives an interruption
+
+    if pending and workers > 1:
+        if backend == 'onnx':
+            model_path = onnx_model_path(model_path)  # Export once, not once per worker
+        threads_per_worker = threads_per_worker or max(1, (os.cpu_count() or 1) // workers)
+        print(f"Running {workers} workers with {threads_per_worker} threads each")
+
+        # 'spawn' keeps CUDA and the intra-op thread pools of the workers independent
+        context = multiprocessing.get_context('spawn')
+        with context.Pool(workers, initializer=_init_worker,
+                          initargs=(model_path, first_conv, backend, threads_per_worker, inference_options)) as pool:
+            results = pool.imap(_run_worker_job, pending)  # Results come back in job order
+            for job, (mse, table, io_stats) in zip(pending, results):
+                io_accounting.merge(io_stats)
+                record(job, mse, table)
+                if mse is not None:
+                    print(f"  → Average MSE ({job['file']}): {mse:.6f}")
+    elif pending:
+        # Load the trained model
+        if threads_per_worker and torch is not None:
+            torch.set_num_threads(threads_per_worker)
+        model = load_model(model_path, first_conv, backend, threads_per_worker)
+
+        for job in pending:
+            mse, table = run_inference_job(model, job, inference_options)
+            record(job, mse, table)
             if mse is not None:
-                mse_log.setdefault('.', {})[file] = mse
                 print(f"  → Average MSE: {mse:.6f}")
 
-            base_key = os.path.splitext(file)[0]
-            copy_metadata_files(datasets_dir, output_dir, base_key)
-
-    # Case 2: Dataset directory contains subfolders with HDF5 files
-    else:
-        for root, dirs, files in os.walk(datasets_dir):
-            rel_path = os.path.relpath(root, datasets_dir)
-            target_dir = os.path.join(output_dir, rel_path)
-            os.makedirs(target_dir, exist_ok=True)
-
-            for file in sorted(files):
-                if file.endswith('.h5') and not file.startswith('bits_'):
-                    input_path = os.path.join(root, file)
-                    output_path = os.path.join(target_dir, file)
-                    reference_path = os.path.join(reference_dir, file) if reference_dir else None
+    save_inference_manifest(output_dir, model_key, entries)  # Drops files that no longer exist
 
-                    print(f"Processing: {os.path.join(rel_path, file)}")
-                    mse = process_dataset(model, input_path, output_path, reference_path)
-                    if mse is not None:
-                        mse_log.setdefault(rel_path, {})[file] = mse
-                        print(f"  → Average MSE: {mse:.6f}")
-
-                    base_key = os.path.splitext(file)[0]
-                    copy_metadata_files(root, target_dir, base_key)
+    # MSE and metrics of every file, recomputed or reused, in processing order
+    metric_tables = {}
+    for job in jobs:
+        key = os.path.relpath(job["output_path"], output_dir)
+        mse = entries[key]["mse"]
+        if mse is not None:
+            mse_log.setdefault(job["group"], {})[job["file"]] = mse
+            metric_tables.setdefault(job["group"], {})[job["file"]] = tables[key]
 
     # Save MSE summary if any MSE values were computed
     if mse_log:
@@ -211,19 +724,61 @@ def main(model_path, datasets_dir, reference_dir=None):
             json.dump(mse_summary, f, indent=4)
         print(f"\n MSE results saved in: {output_json}")
 
+        save_metric_tables(metric_tables, output_dir)
+        print(f" Per-signal metrics saved in: {os.path.join(output_dir, 'metrics_per_signal.h5')} "
+              f"(summary in metrics_summary.json)")
+
+    # Optional bit-level evaluation against the transmitted bits
+    if ber:
+        print("\nBit error rates:")
+        ber_results = evaluate_ber(jobs, batch_size)
+        if ber_results:
+            save_ber_results(ber_results, output_dir)
+            print(f" BER results saved in: {os.path.join(output_dir, 'ber_results.json')}")
+        else:
+            print(" No file with transmitted bits and a supported modulation.")
+
     print(f"\nInference completed. Cleaned files saved in: {output_dir}")
+    io_accounting.print_summary()
 
 # ==============================
 # Script Entry Point
 # ==============================
 
-if __name__ == "__main__":
-    if len(sys.argv) < 3:
-        print("Usage: python unet_inference_batch.py <model_path> <datasets_dir> [reference_dir]")
-        sys.exit(1)
+def cli(argv):
+    """
+    Command-line entry point (see the usage message).
 
-    model_path = sys.argv[1]
-    datasets_dir = sys.argv[2]
-    reference_dir = sys.argv[3] if len(sys.argv) > 3 else None
+    Parameters:
+    -----------
+    argv : list of str
+        Arguments, without the program name.
+    """
+    args, options = parse_cli_options(argv)
+    if len(args) < 2:
+        print("Usage: python unet_inference_batch.py <model_path> <datasets_dir> [reference_dir] "
+              "[--batch-size=64] [--workers=N] [--threads-per-worker=N] [--force] [--ber] [--backend=torch|onnx] [--first-conv=direct|fft|auto] [--tile-length=N] [--overlap=N] [--tile-batch=N] [--io-trace=trace.jsonl]")
+        sys.exit(1)
+    if 'io_trace' in options:
+        # Through the environment too, so that spawned workers append to the same trace
+        os.environ['IO_TRACE'] = options['io_trace']
+        io_accounting.enable_trace(options['io_trace'])
+
+    model_path = args[0]
+    datasets_dir = args[1]
+    reference_dir = args[2] if len(args) > 2 else None
+
+    main(model_path, datasets_dir, reference_dir,
+         first_conv=options.get('first_conv'),
+         tile_length=int(options['tile_length']) if 'tile_length' in options else None,
+         overlap=int(options.get('overlap', 0)),
+         tile_batch_size=int(options.get('tile_batch', 16)),
+         backend=options.get('backend', 'torch'),
+         batch_size=int(options.get('batch_size', 64)),
+         workers=int(options.get('workers', 1)),
+         threads_per_worker=int(options['threads_per_worker']) if 'threads_per_worker' in options else None,
+         force=options.get('force') == 'true',
+         ber=options.get('ber') == 'true')
 
-    main(model_path, datasets_dir, reference_dir)
+if __name__ == "__main__":
+    cli(sys.argv[1:])
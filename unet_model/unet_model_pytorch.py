@@ -1,6 +1,73 @@
+import math
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
+from torch.utils.checkpoint import checkpoint
+from fft_conv import FFTConv1d, FIRST_CONV_MODES
+
+# ==============================
+# Architecture Configuration
+# ==============================
+
+# Declarative description of the production UNet1D. Any subset of these keys can be
+# given to `UNet1D.from_config`; missing keys fall back to these values.
+DEFAULT_ARCH_CONFIG = {
+    "input_channels": 2,
+    "output_channels": 2,
+    "k_sz": 3,
+    "long_k_sz": 101,
+    "k_neurons": 32,
+    "k_list": [8, 8, 8, 8, 8],
+    "k_decoder_list": [8, 8, 4, 2, 1],
+    "dropout": [0.25, 0.5],
+    "conv_type": "standard",
+    "groups": 1,
+    "upsample_mode": "transpose",
+    "first_conv": "direct",
+    "checkpoint_encoders": [],
+    "checkpoint_decoders": []
+}
+
+CONV_TYPES = ("standard", "separable", "grouped")
+UPSAMPLE_MODES = ("transpose", "interp")
+
+
+def make_conv1d(in_channels, out_channels, kernel_size, conv_type="standard", groups=1):
+    """
+    Build a 'same'-padded 1D convolution of the requested type.
+
+    Parameters:
+    -----------
+    in_channels : int
+        Number of input channels.
+    out_channels : int
+        Number of output channels.
+    kernel_size : int
+        Kernel size (odd, so that the output keeps the input length).
+    conv_type : str
+        'standard' (dense Conv1d), 'separable' (depthwise Conv1d followed by a 1x1 pointwise
+        Conv1d) or 'grouped' (Conv1d with `groups` groups).
+    groups : int
+        Number of groups for 'grouped' convolutions. It is reduced to the largest value that
+        divides both channel counts.
+
+    Returns:
+    --------
+    torch.nn.Module
+        The convolution module.
+    """
+    if conv_type == "standard":
+        return nn.Conv1d(in_channels, out_channels, kernel_size, padding=kernel_size // 2)
+    if conv_type == "separable":
+        return nn.Sequential(
+            nn.Conv1d(in_channels, in_channels, kernel_size, padding=kernel_size // 2, groups=in_channels),
+            nn.Conv1d(in_channels, out_channels, kernel_size=1)
+        )
+    if conv_type == "grouped":
+        groups = math.gcd(groups, math.gcd(in_channels, out_channels))
+        return nn.Conv1d(in_channels, out_channels, kernel_size, padding=kernel_size // 2, groups=groups)
+    raise ValueError(f"Unknown conv_type '{conv_type}'. Use one of {CONV_TYPES}")
+
 
 class UNet1D(nn.Module):
     """
@@ -24,71 +91,211 @@ class UNet1D(nn.Module):
         Larger kernel size for the first convolutional layer to capture long-range dependencies.
     k_neurons : int
         Base number of filters to scale the channel dimensions.
+    k_list : sequence of int
+        Filter multipliers of the encoder levels. Its length sets the depth of the network.
+    k_decoder_list : sequence of int
+        Filter multipliers of the decoder levels (same length as `k_list`).
+    dropout : sequence of float
+        Dropout after the first pooling stage and after every other pooling stage.
+    conv_type : str
+        Type of the `k_sz` convolutions: 'standard', 'separable' or 'grouped'
+        (see `make_conv1d`). The long first convolution is always dense, since it
+        only sees the input channels (see `first_conv`).
+    groups : int
+        Number of groups when `conv_type` is 'grouped'.
+    upsample_mode : str
+        'transpose' (ConvTranspose1d) or 'interp' (linear interpolation followed by a convolution).
+    first_conv : str
+        Implementation of the long first convolution: 'direct', 'fft' (frequency domain,
+        overlap-save for long inputs) or 'auto' (faster of both for the signal length).
+        All of them share the same weights.
+    checkpoint_encoders : sequence of int
+        Indices of the encoder blocks whose activations are recomputed during backward
+        instead of being stored (activation checkpointing). Only used while training.
+    checkpoint_decoders : sequence of int
+        Same for the decoder blocks (index 0 is the deepest decoder, the last index works
+        at full resolution).
     """
-    def __init__(self, input_channels, output_channels, k_sz=3, long_k_sz=101, k_neurons=32):
+    def __init__(self, input_channels, output_channels, k_sz=3, long_k_sz=101, k_neurons=32,
+                 k_list=(8, 8, 8, 8, 8), k_decoder_list=(8, 8, 4, 2, 1), dropout=(0.25, 0.5),
+                 conv_type="standard", groups=1, upsample_mode="transpose", first_conv="direct",
+                 checkpoint_encoders=(), checkpoint_decoders=()):
         super(UNet1D, self).__init__()
 
         self.encoders = nn.ModuleList()
         self.pools = nn.ModuleList()
         self.decoders = nn.ModuleList()
         self.upsamples = nn.ModuleList()
-        
+
+        if len(k_list) != len(k_decoder_list):
+            raise ValueError("k_list and k_decoder_list must have the same length")
+        if upsample_mode not in UPSAMPLE_MODES:
+            raise ValueError(f"Unknown upsample_mode '{upsample_mode}'. Use one of {UPSAMPLE_MODES}")
+        self.depth = len(k_list)  # Number of MaxPool1d(2) stages
+
+        # Keep the full architecture description so checkpoints can rebuild the model
+        self.config = {
+            "input_channels": input_channels,
+            "output_channels": output_channels,
+            "k_sz": k_sz,
+            "long_k_sz": long_k_sz,
+            "k_neurons": k_neurons,
+            "k_list": list(k_list),
+            "k_decoder_list": list(k_decoder_list),
+            "dropout": list(dropout),
+            "conv_type": conv_type,
+            "groups": groups,
+            "upsample_mode": upsample_mode,
+            "first_conv": first_conv
+        }
+        self.set_checkpointing(checkpoint_encoders, checkpoint_decoders)
+
+        def conv(in_channels, out_channels):
+            return make_conv1d(in_channels, out_channels, k_sz, conv_type, groups)
+
         # ========== Encoder Path ==========
-        k_list = [8, 8, 8, 8, 8]  # Number of filter multipliers per layer
         for i, k in enumerate(k_list):
             if i == 0:
                 # First encoder block uses a large kernel to capture broader context
                 self.encoders.append(nn.Sequential(
-                    nn.Conv1d(input_channels, k_neurons * k, long_k_sz, padding=long_k_sz // 2),
+                    self._make_first_conv(input_channels, k_neurons * k, long_k_sz, first_conv),
                     nn.ReLU(),
-                    nn.Conv1d(k_neurons * k, k_neurons * k, k_sz, padding=k_sz // 2),
+                    conv(k_neurons * k, k_neurons * k),
                     nn.ReLU()
                 ))
             else:
                 self.encoders.append(nn.Sequential(
-                    nn.Conv1d(k_neurons * k_list[i-1], k_neurons * k, k_sz, padding=k_sz // 2),
+                    conv(k_neurons * k_list[i-1], k_neurons * k),
                     nn.ReLU(),
-                    nn.Conv1d(k_neurons * k, k_neurons * k, k_sz, padding=k_sz // 2),
+                    conv(k_neurons * k, k_neurons * k),
                     nn.ReLU()
                 ))
             # Downsampling and dropout
             self.pools.append(nn.Sequential(
                 nn.MaxPool1d(2),
-                nn.Dropout(0.25 if i == 0 else 0.5)
+                nn.Dropout(dropout[0] if i == 0 else dropout[1])
             ))
 
         # ========== Bottleneck (Middle Block) ==========
+        k_middle = k_list[-1]
         self.middle = nn.Sequential(
-            nn.Conv1d(k_neurons * 8, k_neurons * 8, k_sz, padding=k_sz // 2),
+            conv(k_neurons * k_middle, k_neurons * k_middle),
             nn.ReLU(),
-            nn.Conv1d(k_neurons * 8, k_neurons * 8, k_sz, padding=k_sz // 2),
+            conv(k_neurons * k_middle, k_neurons * k_middle),
             nn.ReLU()
         )
-        
+
         # ========== Decoder Path ==========
-        k_decoder_list = [8, 8, 4, 2, 1]  # Channel scaling for decoder layers
-        last_k = 8  # Start with the last encoder output channel multiplier
+        last_k = k_middle  # Start with the last encoder output channel multiplier
         for i, k in enumerate(k_decoder_list):
-            # Upsampling with transposed convolution
-            self.upsamples.append(nn.ConvTranspose1d(
-                in_channels=k_neurons * last_k,
-                out_channels=k_neurons * k,
-                kernel_size=k_sz,
-                stride=2,
-                padding=k_sz // 2,
-                output_padding=1
-            ))
+            k_skip = k_list[-(i + 1)]  # Encoder level feeding this decoder through the skip connection
+            if upsample_mode == "transpose":
+                # Upsampling with transposed convolution
+                self.upsamples.append(nn.ConvTranspose1d(
+                    in_channels=k_neurons * last_k,
+                    out_channels=k_neurons * k,
+                    kernel_size=k_sz,
+                    stride=2,
+                    padding=k_sz // 2,
+                    output_padding=1
+                ))
+            else:
+                # Upsampling with linear interpolation, then a convolution to mix channels
+                self.upsamples.append(nn.Sequential(
+                    nn.Upsample(scale_factor=2, mode="linear", align_corners=False),
+                    conv(k_neurons * last_k, k_neurons * k)
+                ))
             # Decoder block with skip connection input
             self.decoders.append(nn.Sequential(
-                nn.Conv1d(k_neurons * (k + 8), k_neurons * k, k_sz, padding=k_sz // 2),  # input = upsample + skip
+                conv(k_neurons * (k + k_skip), k_neurons * k),  # input = upsample + skip
                 nn.ReLU(),
-                nn.Conv1d(k_neurons * k, k_neurons * k, k_sz, padding=k_sz // 2),
+                conv(k_neurons * k, k_neurons * k),
                 nn.ReLU()
             ))
             last_k = k  # Update for next iteration
-        
+
         # ========== Output Layer ==========
-        self.output_layer = nn.Conv1d(k_neurons, output_channels, kernel_size=1)
+        self.output_layer = nn.Conv1d(k_neurons * k_decoder_list[-1], output_channels, kernel_size=1)
+
+    @staticmethod
+    def _make_first_conv(in_channels, out_channels, kernel_size, mode):
+        if mode not in FIRST_CONV_MODES:
+            raise ValueError(f"Unknown first_conv '{mode}'. Use one of {FIRST_CONV_MODES}")
+        if mode == "direct":
+            return nn.Conv1d(in_channels, out_channels, kernel_size, padding=kernel_size // 2)
+        return FFTConv1d(in_channels, out_channels, kernel_size, padding=kernel_size // 2, mode=mode)
+
+    def set_first_conv(self, mode):
+        """
+        Switch the implementation of the long first convolution, keeping its weights.
+
+        Parameters:
+        -----------
+        mode : str
+            'direct', 'fft' or 'auto' (see the `first_conv` parameter).
+        """
+        old_conv = self.encoders[0][0]
+        new_conv = self._make_first_conv(old_conv.in_channels, old_conv.out_channels, old_conv.kernel_size[0], mode)
+        new_conv.weight = old_conv.weight
+        new_conv.bias = old_conv.bias
+        self.encoders[0][0] = new_conv
+        self.config["first_conv"] = mode
+
+    def set_checkpointing(self, encoders=(), decoders=()):
+        """
+        Select the encoder and decoder blocks trained with activation checkpointing.
+
+        Checkpointed blocks only keep their input for backward and run their forward
+        pass a second time when gradients are computed: less memory, longer steps.
+        The weights and the outputs are unchanged, so this can be switched at any time.
+
+        Parameters:
+        -----------
+        encoders : sequence of int
+            Indices of the checkpointed encoder blocks (0 is the full-resolution block).
+        decoders : sequence of int
+            Indices of the checkpointed decoder blocks (-1 or depth - 1 is the full-resolution block).
+        """
+        encoders = sorted({i % self.depth for i in self._check_block_indices(encoders)})
+        decoders = sorted({i % self.depth for i in self._check_block_indices(decoders)})
+        self.checkpoint_encoders, self.checkpoint_decoders = set(encoders), set(decoders)
+        self.config["checkpoint_encoders"] = encoders
+        self.config["checkpoint_decoders"] = decoders
+
+    def _check_block_indices(self, indices):
+        indices = list(indices)
+        for i in indices:
+            if not -self.depth <= i < self.depth:
+                raise ValueError(f"Block index {i} out of range for a network of depth {self.depth}")
+        return indices
+
+    def _run_block(self, block, x, checkpointed):
+        # Checkpointing only pays off when a backward pass follows
+        if checkpointed and self.training and torch.is_grad_enabled():
+            return checkpoint(block, x, use_reentrant=False)
+        return block(x)
+
+    @classmethod
+    def from_config(cls, config=None):
+        """
+        Build a UNet1D from a (possibly partial) architecture configuration.
+
+        Parameters:
+        -----------
+        config : dict or None
+            Architecture keys (see `DEFAULT_ARCH_CONFIG`). Missing keys take their default value.
+
+        Returns:
+        --------
+        UNet1D
+            The newly built model.
+        """
+        full_config = dict(DEFAULT_ARCH_CONFIG)
+        full_config.update(config or {})
+        unknown = set(full_config) - set(DEFAULT_ARCH_CONFIG)
+        if unknown:
+            raise ValueError(f"Unknown architecture keys: {sorted(unknown)}")
+        return cls(**full_config)
 
     def forward(self, x):
         """
@@ -100,7 +307,7 @@ class UNet1D(nn.Module):
             Input tensor of shape [B, C_in, L], where:
             - B is batch size
             - C_in is number of input channels (e.g., 2)
-            - L is signal length
+            - L is signal length (divisible by 2 ** depth)
 
         Returns:
         --------
@@ -108,23 +315,76 @@ class UNet1D(nn.Module):
             Output tensor of shape [B, C_out, L]
         """
         skips = []  # To store outputs for skip connections
-        
+
         # Encoder path
-        for encoder, pool in zip(self.encoders, self.pools):
-            x = encoder(x)
+        for i, (encoder, pool) in enumerate(zip(self.encoders, self.pools)):
+            x = self._run_block(encoder, x, i in self.checkpoint_encoders)
             skips.append(x)
             x = pool(x)
-        
+
         # Middle block
         x = self.middle(x)
-        
+
         # Decoder path with skip connections
-        for upsample, decoder in zip(self.upsamples, self.decoders):
+        for i, (upsample, decoder) in enumerate(zip(self.upsamples, self.decoders)):
             x = upsample(x)
-            x = torch.cat([x, skips[-(len(self.upsamples) - len(self.decoders) + self.decoders.index(decoder))]], dim=1)
-            x = decoder(x)
-        
+            x = torch.cat([x, skips[-(i + 1)]], dim=1)  # Deepest skip first
+            x = self._run_block(decoder, x, i in self.checkpoint_decoders)
+
         # Final output layer
         x = self.output_layer(x)
-        
+
         return x
+
+# ==============================
+# Checkpoint Saving and Loading
+# ==============================
+
+def save_checkpoint(model, path):
+    """
+    Save a UNet1D checkpoint together with its architecture configuration.
+
+    Parameters:
+    -----------
+    model : UNet1D
+        Model to save.
+    path : str
+        Destination path (.pth).
+    """
+    torch.save({"arch_config": model.config, "state_dict": model.state_dict()}, path)
+
+
+def load_checkpoint(path, map_location=None):
+    """
+    Rebuild a UNet1D from a checkpoint and load its weights.
+
+    Checkpoints written by `save_checkpoint` carry their architecture configuration.
+    Plain state dicts (older checkpoints) are loaded into the default architecture.
+    Int8 checkpoints written by `quantize_unet.save_quantized_checkpoint` are rebuilt
+    as quantized models, which always run on CPU.
+
+    Parameters:
+    -----------
+    path : str
+        Path to the checkpoint (.pth).
+    map_location : torch.device or str or None
+        Device where the weights are loaded.
+
+    Returns:
+    --------
+    UNet1D or torch.fx.GraphModule
+        Model with the checkpoint weights, on `map_location` if given.
+    """
+    checkpoint = torch.load(path, map_location=map_location)
+    if checkpoint.get("format") == "int8_static":
+        from quantize_unet import load_quantized_checkpoint  # Only needed for quantized checkpoints
+        return load_quantized_checkpoint(checkpoint)
+    if "state_dict" in checkpoint:
+        model = UNet1D.from_config(checkpoint.get("arch_config"))
+        model.load_state_dict(checkpoint["state_dict"])
+    else:
+        model = UNet1D.from_config()
+        model.load_state_dict(checkpoint)
+    if map_location is not None:
+        model = model.to(map_location)
+    return model
@@ -1,14 +1,47 @@
-import h5py
 import os
+import time
 import torch
 from torch.utils.data import Dataset
-import matplotlib.pyplot as plt
 import json
+import warnings
+from shm_cache import default_cache
+# Torch-free helpers (command line, fingerprints, JSON metadata), re-exported for existing imports
+from file_utils import (parse_cli_options, file_fingerprint, file_sha256, json_equal_except_snr,
+                        load_json_metadata, get_matching_pairs, copy_metadata_files, io_accounting)
 
 # ==============================
 # Custom Dataset Classes
 # ==============================
 
+def load_signals(hdf5_file, cache=None):
+    """
+    Load the 'dataset' array of an HDF5 file as a float32 tensor.
+
+    With a shared cache (see `shm_cache.SharedDatasetCache`), the tensor is a read-only view
+    of the copy shared by every process on the node instead of a private copy.
+
+    Parameters:
+    -----------
+    hdf5_file : str
+        Path to the HDF5 file.
+    cache : SharedDatasetCache or None
+        Shared cache to attach to (default: the one enabled by SHM_CACHE_MB, if any).
+
+    Returns:
+    --------
+    torch.Tensor
+        Signals, e.g. of shape [N, 2, L].
+    """
+    cache = cache if cache is not None else default_cache()
+    shared = cache.attach(hdf5_file) if cache is not None else None
+    if shared is not None:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', UserWarning)  # Non-writable array: never written in place
+            return torch.from_numpy(shared)
+    with io_accounting.open_h5(hdf5_file, 'r') as f:
+        return torch.tensor(io_accounting.read(f['dataset']), dtype=torch.float32)
+
+
 class HDF5Dataset(Dataset):
     """
     Basic dataset class for loading 1D signals from an HDF5 file.
@@ -18,11 +51,12 @@ class HDF5Dataset(Dataset):
     -----------
     hdf5_file : str
         Path to the HDF5 file containing a dataset under the key 'dataset'.
+    cache : SharedDatasetCache or None
+        Shared-memory cache to attach to (see `load_signals`).
     """
-    def __init__(self, hdf5_file):
-        with h5py.File(hdf5_file, 'r') as f:
-            self.data = f['dataset'][:]
-        self.data = torch.tensor(self.data, dtype=torch.float32)
+    def __init__(self, hdf5_file, cache=None):
+        with io_accounting.stage("training_load"):
+            self.data = load_signals(hdf5_file, cache)
 
     def __len__(self):
         return self.data.shape[0]
@@ -43,22 +77,17 @@ class HDF5DenoisingDataset(Dataset):
         Path to the HDF5 file containing interference-corrupted signals.
     clean_file : str
         Path to the HDF5 file containing clean reference signals.
+    cache : SharedDatasetCache or None
+        Shared-memory cache to attach to (see `load_signals`).
     """
-    def __init__(self, interf_file, clean_file):
-        # Load clean signals
-        with h5py.File(clean_file, 'r') as f:
-            self.clean = f['dataset'][:]
-        
-        # Load interference signals
-        with h5py.File(interf_file, 'r') as f:
-            self.interf = f['dataset'][:]
-        
+    def __init__(self, interf_file, clean_file, cache=None):
+        with io_accounting.stage("training_load"):
+            # Load clean and interference signals
+            self.clean = load_signals(clean_file, cache)
+            self.interf = load_signals(interf_file, cache)
+
         # Validate that shapes match
         assert self.interf.shape == self.clean.shape, "interf and clean datasets must have the same shape"
-        
-        # Convert to torch tensors
-        self.interf = torch.tensor(self.interf, dtype=torch.float32)
-        self.clean = torch.tensor(self.clean, dtype=torch.float32)
 
     def __len__(self):
         return self.clean.shape[0]
@@ -85,6 +114,8 @@ def plot_training_history(train_losses, val_losses, output_dir):
     output_dir : str
         Directory where the plot will be saved as a PNG image.
     """
+    import matplotlib.pyplot as plt  # Only needed here: not loaded by scripts that never plot
+
     plt.figure(figsize=(8, 5))
     plt.plot(train_losses, label="Train Loss")
     plt.plot(val_losses, label="Validation Loss")
@@ -117,124 +148,40 @@ def save_training_metrics(train_losses, val_losses, output_dir):
         json.dump(metrics, f)
 
 # ==============================
-# JSON Metadata Utilities
+# Timing Utilities
 # ==============================
 
-def json_equal_except_snr(json1, json2):
-    """
-    Compare two JSON objects while ignoring the 'snr' field (case-insensitive).
-
-    Parameters:
-    -----------
-    json1 : dict
-    json2 : dict
-
-    Returns:
-    --------
-    bool
-        True if all keys/values match except for 'snr'; False otherwise.
-    """
-    dict1 = {k: v for k, v in json1.items() if k.lower() != 'snr'}
-    dict2 = {k: v for k, v in json2.items() if k.lower() != 'snr'}
-    return dict1 == dict2
-
-
-def load_json_metadata(json_path):
-    """
-    Load metadata from a JSON file.
-
-    Parameters:
-    -----------
-    json_path : str
-        Path to the JSON file.
-
-    Returns:
-    --------
-    dict
-        Parsed JSON content.
+def measure_latency(model, example_input, n_runs=10, warmup=2):
     """
-    with open(json_path, 'r') as f:
-        return json.load(f)
-
-
-def get_matching_pairs(clean_dir, interf_dir):
-    """
-    Match clean and interference files based on their JSON metadata,
-    ignoring differences in the 'snr' field.
+    Measure the median forward-pass latency of a model in evaluation mode.
 
     Parameters:
     -----------
-    clean_dir : str
-        Directory containing clean .json and .h5 files.
-    interf_dir : str
-        Directory containing interfering .json and .h5 files.
+    model : torch.nn.Module
+        Model to time. It must live on the same device as `example_input`.
+    example_input : torch.Tensor
+        Input batch of shape [B, C, L].
+    n_runs : int
+        Number of timed forward passes.
+    warmup : int
+        Number of untimed forward passes run first (allocator and kernel warm-up).
 
     Returns:
     --------
-    list of tuple
-        List of matched pairs as (clean_file_path, interfered_file_path).
-    
-    Raises:
-    -------
-    ValueError
-        If no .json files are found or no match exists for a clean file.
-    """
-    clean_jsons = [f for f in os.listdir(clean_dir) if f.endswith('.json')]
-    interf_jsons = [f for f in os.listdir(interf_dir) if f.endswith('.json')]
-
-    if not clean_jsons or not interf_jsons:
-        raise ValueError("No .json files found in one or both directories")
-
-    matched_pairs = []
-
-    for clean_json_name in clean_jsons:
-        clean_json_path = os.path.join(clean_dir, clean_json_name)
-        clean_meta = load_json_metadata(clean_json_path)
-
-        found_match = False
-        for interf_json_name in interf_jsons:
-            interf_json_path = os.path.join(interf_dir, interf_json_name)
-            interf_meta = load_json_metadata(interf_json_path)
-
-            if json_equal_except_snr(clean_meta, interf_meta):
-                base_clean = clean_json_name.replace('.json', '.h5')
-                base_interf = interf_json_name.replace('.json', '.h5')
-
-                matched_pairs.append((
-                    os.path.join(clean_dir, base_clean),
-                    os.path.join(interf_dir, base_interf)
-                ))
-                found_match = True
-                break
-
-        if not found_match:
-            raise ValueError(f"No matching interf file found for {clean_json_name}")
-
-    return matched_pairs
-
-# ==============================
-# Metadata Copying Utility
-# ==============================
-
-def copy_metadata_files(src_dir, dst_dir, base_name):
-    """
-    Copy related metadata files (.json, .mat, bits_*.h5) based on base filename.
-
-    Parameters:
-    -----------
-    src_dir : str
-        Directory containing source metadata files.
-    dst_dir : str
-        Destination directory for copied files.
-    base_name : str
-        Base name of the dataset (without extension).
-    """
-    for ext in ['.json', '.mat', '.h5']:
-        if ext == '.h5':
-            fname = f"bits_{base_name}{ext}"
-        else:
-            fname = f"{base_name}{ext}"
-        src_path = os.path.join(src_dir, fname)
-        dst_path = os.path.join(dst_dir, fname)
-        if os.path.exists(src_path):
-            shutil.copy(src_path, dst_path)
\ No newline at end of file
+    float
+        Median latency of one forward pass, in seconds.
+    """
+    model.eval()
+    timings = []
+    with torch.no_grad():
+        for run in range(warmup + n_runs):
+            if example_input.is_cuda:
+                torch.cuda.synchronize()
+            start = time.perf_counter()
+            model(example_input)
+            if example_input.is_cuda:
+                torch.cuda.synchronize()
+            if run >= warmup:
+                timings.append(time.perf_counter() - start)
+    timings.sort()
+    return timings[len(timings) // 2]
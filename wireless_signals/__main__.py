@@ -0,0 +1,5 @@
+import sys
+from wireless_signals.cli import main
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+import os
+import sys
+import json
+import importlib
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _scripts_root():
+    # A regular install carries the script folders inside the package; an editable install (or a
+    # plain checkout) finds them next to it. WIRELESS_SIGNALS_ROOT points to another checkout.
+    if os.environ.get("WIRELESS_SIGNALS_ROOT"):
+        return os.environ["WIRELESS_SIGNALS_ROOT"]
+    if os.path.isdir(os.path.join(PACKAGE_DIR, "unet_model")):
+        return PACKAGE_DIR
+    return os.path.dirname(PACKAGE_DIR)
+
+
+# Folder holding the script folders
+REPO_ROOT = _scripts_root()
+
+# Subcommands: script folder, module, minimum number of positional arguments, usage and summary.
+# Nothing is imported until a subcommand runs, and then only its own module (and folder, so the
+# 'utils' modules of different folders never shadow each other).
+COMMANDS = {
+    "generate": {
+        "folder": "DatasetGeneration_Python", "module": "generate_signals", "min_args": 1,
+        "usage": "<output_dir> [--config=modulations.json] [--signals=100] [--bits=25000] [--batch-size=64] "
+                 "[--workers=N] [--seed=0]",
+        "summary": "Generate PSK, QAM, OFDM and DSSS datasets (HDF5 + JSON + bits)"
+    },
+    "train": {
+        "folder": "unet_model", "module": "train_unet_model_pytorch_interf", "min_args": 2,
+        "usage": "<clean_dir> <output_dir>\n"
+                 "       <clean_dir> <interf_dir> <output_dir> <model.pth | None | arch_config.json> [final]\n"
+                 "       distill <clean_dir> <interf_dir> <output_dir> <teacher.pth> "
+                 "[student_k_neurons | student_config.json] [student_depth] [alpha]",
+        "summary": "Train a UNet1D (classic, denoising or distillation)"
+    },
+    "infer": {
+        "folder": "unet_model", "module": "unet_inference_pytorch", "min_args": 2,
+        "usage": "<model_path> <datasets_dir> [reference_dir] [--batch-size=64] [--workers=N] [--force] [--ber] "
+                 "[--backend=torch|onnx] [--first-conv=direct|fft|auto] [--tile-length=N] [--overlap=N] "
+                 "[--io-trace=trace.jsonl]",
+        "summary": "Denoise datasets with a trained model and compute metrics"
+    },
+    "match": {
+        "folder": "unet_model", "module": "file_utils", "min_args": 2,
+        "usage": "<clean_dir> <interf_dir> [--json]",
+        "summary": "List the clean / interfered file pairs (JSON metadata equal except 'snr')"
+    },
+    "report": {
+        "folder": "DatasetVisualization_Python", "module": "generate_report", "min_args": 1,
+        "usage": "<folder> [--output=DIR] [--reference=DIR] [--interfered=DIR] [--signals=2] [--workers=N] "
+                 "[--seed=0] [--dpi=80]",
+        "summary": "Render time, spectrum and constellation plots to PNG with an HTML index"
+    }
+}
+
+PROG = "wireless-signals"
+
+
+def print_usage(command=None, file=sys.stdout):
+    """
+    Print the usage of one subcommand, or the list of subcommands.
+    """
+    if command is None:
+        print(f"Usage: {PROG} <command> [arguments]\n\nCommands:", file=file)
+        for name, spec in COMMANDS.items():
+            print(f"  {name:<10}{spec['summary']}", file=file)
+        print(f"\nRun '{PROG} <command> --help' for the arguments of a command.", file=file)
+    else:
+        print(f"Usage: {PROG} {command} {COMMANDS[command]['usage']}", file=file)
+
+
+def load_command(command):
+    """
+    Import the module of a subcommand from its script folder.
+
+    Parameters:
+    -----------
+    command : str
+        Key of `COMMANDS`.
+
+    Returns:
+    --------
+    module
+        The imported module.
+    """
+    folder = os.path.join(REPO_ROOT, COMMANDS[command]["folder"])
+    if not os.path.isdir(folder):
+        raise FileNotFoundError(f"{folder} not found: reinstall the package ('pip install .' or "
+                                f"'pip install -e .' from a checkout) or set WIRELESS_SIGNALS_ROOT")
+    sys.path.insert(0, folder)
+    return importlib.import_module(COMMANDS[command]["module"])
+
+
+def run_match(module, argv):
+    # Only needs the torch-free metadata helpers of unet_model/file_utils.py
+    args, options = module.parse_cli_options(argv)
+    try:
+        pairs = module.get_matching_pairs(args[0], args[1])
+    except (ValueError, OSError) as error:
+        print(f"{PROG} match: {error}", file=sys.stderr)
+        return 2
+    if options.get('json') == 'true':
+        print(json.dumps([{"clean": clean, "interfered": interf} for clean, interf in sorted(pairs)], indent=4))
+    else:
+        for clean, interf in sorted(pairs):
+            print(f"{clean} <- {interf}")
+    return 0
+
+
+def main(argv=None):
+    """
+    Entry point of the `wireless-signals` command.
+
+    Usage errors and `--help` are answered before anything is imported. A valid subcommand
+    imports only the module it runs (`--import-only` stops right after that import, to
+    measure cold start).
+
+    Parameters:
+    -----------
+    argv : list of str or None
+        Arguments, without the program name (default: sys.argv[1:]).
+
+    Returns:
+    --------
+    int
+        Exit code.
+    """
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv or argv[0] in ("-h", "--help"):
+        print_usage()
+        return 0
+    command, rest = argv[0], argv[1:]
+    if command not in COMMANDS:
+        print(f"Unknown command: {command}\n", file=sys.stderr)
+        print_usage(file=sys.stderr)
+        return 2
+
+    if "-h" in rest or "--help" in rest:
+        print_usage(command)
+        return 0
+    import_only = "--import-only" in rest
+    rest = [arg for arg in rest if arg != "--import-only"]
+    if not import_only and len([arg for arg in rest if not arg.startswith('--')]) < COMMANDS[command]["min_args"]:
+        print_usage(command, file=sys.stderr)
+        return 2
+
+    module = load_command(command)
+    if import_only:
+        return 0
+
+    sys.argv = [f"{PROG} {command}"] + rest  # Usage messages and argparse show the subcommand
+    if command == "match":
+        return run_match(module, rest)
+    module.cli(rest)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
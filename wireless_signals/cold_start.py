@@ -0,0 +1,80 @@
+import sys
+import json
+import time
+import subprocess
+import statistics
+from wireless_signals.cli import COMMANDS
+
+# Modules whose import dominates start-up time
+HEAVY_MODULES = ("torch", "matplotlib", "scipy", "sklearn", "IPython", "ipywidgets")
+
+# Reports the heavy modules loaded by a subcommand, from a fresh interpreter
+_PROBE = ("import sys, json; from wireless_signals.cli import main; main(sys.argv[1:]); "
+          "print(json.dumps(sorted(m for m in {heavy} if m in sys.modules)))")
+
+
+def _time_process(command):
+    start = time.perf_counter()
+    subprocess.run(command, capture_output=True)
+    return time.perf_counter() - start
+
+
+def time_command(args, runs=5):
+    """
+    Median wall-clock time of `python -m wireless_signals <args>` in fresh interpreters.
+
+    Parameters:
+    -----------
+    args : list of str
+        Subcommand and arguments.
+    runs : int
+        Number of processes started.
+
+    Returns:
+    --------
+    float
+        Median time in seconds.
+    """
+    return statistics.median(_time_process([sys.executable, "-m", "wireless_signals"] + args) for _ in range(runs))
+
+
+def heavy_imports(args):
+    """
+    Heavy modules (see `HEAVY_MODULES`) loaded by a subcommand.
+    """
+    probe = _PROBE.format(heavy=repr(HEAVY_MODULES))
+    output = subprocess.run([sys.executable, "-c", probe] + args, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def measure_cold_start(runs=5):
+    """
+    Cold-start time of every subcommand: the usage path (`--help`, nothing imported) and the
+    import path (`--import-only`, everything the subcommand loads before it starts working).
+
+    Returns:
+    --------
+    dict
+        {command: {'help_s', 'import_s', 'heavy_modules'}}, plus the bare interpreter
+        start-up time under 'python'.
+    """
+    results = {"python": {"import_s": statistics.median(_time_process([sys.executable, "-c", "pass"])
+                                                        for _ in range(runs))}}
+    for command in COMMANDS:
+        results[command] = {"help_s": time_command([command, "--help"], runs),
+                            "import_s": time_command([command, "--import-only"], runs),
+                            "heavy_modules": heavy_imports([command, "--import-only"])}
+    return results
+
+
+if __name__ == "__main__":
+    # Usage: python -m wireless_signals.cold_start [runs] [output.json]
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    results = measure_cold_start(runs)
+    print(f"{'command':<10}{'--help':>10}{'import':>10}  heavy modules")
+    for command, result in results.items():
+        help_time = f"{result['help_s']:.3f}" if 'help_s' in result else '-'
+        print(f"{command:<10}{help_time:>10}{result['import_s']:>10.3f}  {', '.join(result.get('heavy_modules', []))}")
+    if len(sys.argv) > 2:
+        with open(sys.argv[2], 'w') as f:
+            json.dump(results, f, indent=4)
@@ -0,0 +1,243 @@
+import os
+import json
+import time
+import shutil
+import threading
+from contextlib import contextmanager
+import h5py
+import numpy as np
+
+# I/O accounting shared by the data pipeline scripts (InterferenceDatasetGeneration, unet_model).
+# Every HDF5 open, read and write and every file copy of a pipeline stage goes through the wrappers
+# below, which add bytes, file counts and latencies to the counters of the current stage. Set the
+# IO_TRACE environment variable to a .jsonl path to also log one line per operation (spawned worker
+# processes inherit it and append to the same file).
+
+# Stage that operations are charged to when no `stage()` block is active
+DEFAULT_STAGE = "other"
+
+_COUNTERS = ("wall_s", "files_opened", "open_s", "reads", "bytes_read", "read_s",
+             "writes", "bytes_written", "write_s", "files_copied", "bytes_copied", "copy_s")
+
+_lock = threading.Lock()
+_stats = {}
+# A process-wide stage (not thread-local) so reader / writer threads are charged to the stage
+# of the code that started them
+_current_stage = DEFAULT_STAGE
+_trace = None
+
+
+def _stage_stats(name):
+    if name not in _stats:
+        _stats[name] = dict.fromkeys(_COUNTERS, 0)
+    return _stats[name]
+
+
+def enable_trace(path):
+    """
+    Append one JSON line per I/O operation to `path` (also set through IO_TRACE).
+
+    Parameters:
+    -----------
+    path : str or None
+        Trace file, or None to stop tracing.
+    """
+    global _trace
+    with _lock:
+        if _trace is not None:
+            _trace.close()
+        _trace = open(path, 'a', buffering=1) if path else None
+
+
+def _record(op, path, nbytes, seconds, count_key, bytes_key, time_key):
+    with _lock:
+        stats = _stage_stats(_current_stage)
+        stats[count_key] += 1
+        if bytes_key is not None:
+            stats[bytes_key] += int(nbytes)
+        stats[time_key] += seconds
+        if _trace is not None:
+            _trace.write(json.dumps({"time": time.time(), "pid": os.getpid(), "stage": _current_stage,
+                                     "op": op, "path": path, "bytes": int(nbytes),
+                                     "seconds": round(seconds, 6)}) + "\n")
+
+
+@contextmanager
+def stage(name):
+    """
+    Charge the I/O done inside the block to stage `name` and add the block's wall time to it.
+    Stages are not meant to be nested: the I/O of an inner stage is not counted in the outer one.
+
+    Parameters:
+    -----------
+    name : str
+        Stage name (e.g. 'interference_generation', 'metadata_copy', 'training_load', 'inference').
+    """
+    global _current_stage
+    previous, _current_stage = _current_stage, name
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        with _lock:
+            _stage_stats(name)["wall_s"] += time.perf_counter() - start
+        _current_stage = previous
+
+
+def open_h5(path, mode='r', **kwargs):
+    """
+    `h5py.File(path, mode, **kwargs)`, counting the file and its open latency.
+    """
+    start = time.perf_counter()
+    h5_file = h5py.File(path, mode, **kwargs)
+    _record("open", str(path), 0, time.perf_counter() - start, "files_opened", None, "open_s")
+    return h5_file
+
+
+def read(dataset, selection=()):
+    """
+    `dataset[selection]`, counting the bytes read.
+
+    Parameters:
+    -----------
+    dataset : h5py.Dataset
+        Dataset to read from.
+    selection : slice, tuple or ()
+        Selection (default: the whole dataset).
+
+    Returns:
+    --------
+    np.ndarray
+        The data read.
+    """
+    start = time.perf_counter()
+    data = dataset[selection]
+    _record("read", dataset.file.filename, np.asarray(data).nbytes, time.perf_counter() - start,
+            "reads", "bytes_read", "read_s")
+    return data
+
+
+def read_direct(dataset, out):
+    """
+    `dataset.read_direct(out)` (whole dataset into a pre-allocated array), counting the bytes read.
+    """
+    start = time.perf_counter()
+    dataset.read_direct(out)
+    _record("read", dataset.file.filename, out.nbytes, time.perf_counter() - start, "reads", "bytes_read", "read_s")
+    return out
+
+
+def write(dataset, selection, data):
+    """
+    `dataset[selection] = data`, counting the bytes written.
+    """
+    start = time.perf_counter()
+    dataset[selection] = data
+    _record("write", dataset.file.filename, np.asarray(data).nbytes, time.perf_counter() - start,
+            "writes", "bytes_written", "write_s")
+
+
+def create_dataset(group, name, data=None, **kwargs):
+    """
+    `group.create_dataset(name, data=data, **kwargs)`, counting the bytes of `data` (if given).
+    """
+    start = time.perf_counter()
+    dataset = group.create_dataset(name, data=data, **kwargs)
+    nbytes = np.asarray(data).nbytes if data is not None else 0
+    _record("write", group.file.filename, nbytes, time.perf_counter() - start, "writes", "bytes_written", "write_s")
+    return dataset
+
+
+def copy_file(src, dst):
+    """
+    `shutil.copy(src, dst)`, counting the file and its size.
+
+    Returns:
+    --------
+    str
+        Path of the copy.
+    """
+    start = time.perf_counter()
+    copied = shutil.copy(src, dst)
+    _record("copy", str(src), os.path.getsize(src), time.perf_counter() - start,
+            "files_copied", "bytes_copied", "copy_s")
+    return copied
+
+
+def snapshot():
+    """
+    Copy of the raw counters, {stage: {counter: value}} (picklable, to send back from workers).
+    """
+    with _lock:
+        return {name: dict(stats) for name, stats in _stats.items()}
+
+
+def merge(other):
+    """
+    Add the counters of a `snapshot()` (e.g. from a worker process) to this process.
+    """
+    with _lock:
+        for name, stats in other.items():
+            own = _stage_stats(name)
+            for key, value in stats.items():
+                own[key] += value
+
+
+def reset():
+    """
+    Clear all counters.
+    """
+    with _lock:
+        _stats.clear()
+
+
+def summary():
+    """
+    Per-stage counters plus derived figures: total I/O time, compute time (wall time not spent
+    in I/O, when the stage was timed with `stage()`) and read / write / copy throughput in MB/s.
+    I/O time is summed over threads, so with prefetching it can overlap compute.
+
+    Returns:
+    --------
+    dict
+        {stage: {counter: value}}.
+    """
+    result = {}
+    for name, stats in snapshot().items():
+        stats["io_s"] = stats["open_s"] + stats["read_s"] + stats["write_s"] + stats["copy_s"]
+        stats["compute_s"] = max(stats["wall_s"] - stats["io_s"], 0.0) if stats["wall_s"] else None
+        for kind, bytes_key, time_key in (("read", "bytes_read", "read_s"), ("write", "bytes_written", "write_s"),
+                                          ("copy", "bytes_copied", "copy_s")):
+            stats[f"{kind}_MBps"] = stats[bytes_key] / 1e6 / stats[time_key] if stats[time_key] > 0 else None
+        result[name] = stats
+    return result
+
+
+def print_summary(title="I/O summary"):
+    """
+    Print `summary()`, one block per stage (nothing if no I/O was recorded).
+    """
+    stages = summary()
+    if not stages:
+        return
+    print(f"\n{title}:")
+    for name, stats in stages.items():
+        print(f"  {name}:")
+        if stats["files_opened"]:
+            print(f"    opened  {stats['files_opened']} HDF5 files, "
+                  f"{1e3 * stats['open_s'] / stats['files_opened']:.2f} ms per open")
+        for kind, count_key, bytes_key, noun in (("read", "reads", "bytes_read", "reads"),
+                                                 ("write", "writes", "bytes_written", "writes"),
+                                                 ("copy", "files_copied", "bytes_copied", "files")):
+            if stats[count_key]:
+                throughput = stats[f"{kind}_MBps"]
+                rate = f" at {throughput:.1f} MB/s" if throughput is not None else ""
+                print(f"    {kind:<7} {stats[bytes_key] / 1e6:.2f} MB in {stats[count_key]} {noun}{rate}")
+        timing = f"    I/O     {stats['io_s']:.3f} s"
+        if stats["compute_s"] is not None:
+            timing += f" / compute {stats['compute_s']:.3f} s (wall {stats['wall_s']:.3f} s)"
+        print(timing)
+
+
+if os.environ.get("IO_TRACE"):
+    enable_trace(os.environ["IO_TRACE"])